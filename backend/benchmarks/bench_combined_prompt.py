@@ -0,0 +1,114 @@
+"""
+Benchmark the combined single-call Groq analysis against the three-call path
+
+Runs contract details + entity extraction + risk assessment per contract as
+three sequential requests, as three concurrent requests, and as one
+combined request (with per-section fallback), and reports Groq requests,
+prompt/completion tokens and wall time per mode. The LLM response cache is
+bypassed. Needs GROQ_API_KEY.
+
+Usage (from the backend directory):
+    python benchmarks/bench_combined_prompt.py contract1.txt contract2.txt
+    python benchmarks/bench_combined_prompt.py --size-kb 20 --repeat 3
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_keyword_matcher import synthesize_dump
+from services.groq_services import GroqService
+
+
+def instrument(service: GroqService) -> dict:
+    """Count requests and token usage of every Groq call made by service"""
+    totals = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    chat_completion = service._chat_completion
+
+    async def counted(*args, **kwargs):
+        completion = await chat_completion(*args, **kwargs)
+        totals["requests"] += 1
+        for key in ("prompt_tokens", "completion_tokens"):
+            totals[key] += completion["usage"].get(key) or 0
+        return completion
+
+    service._chat_completion = counted
+    return totals
+
+
+async def three_sequential(service: GroqService, text: str):
+    await service.analyze_contract_details(text)
+    await service.extract_entities_with_groq(text)
+    await service.assess_risk_with_groq(text)
+    return None
+
+
+async def three_concurrent(service: GroqService, text: str):
+    result = await service.analyze_contract_full(text, combined=False)
+    return result.get("sources")
+
+
+async def combined(service: GroqService, text: str):
+    result = await service.analyze_contract_full(text, combined=True)
+    return result.get("sources")
+
+
+async def run(texts, repeat: int):
+    service = GroqService()
+    if not service.is_available():
+        print("Groq service not available (GROQ_API_KEY missing or groq not installed)")
+        return
+    service.response_cache = None
+    totals = instrument(service)
+
+    modes = [("3 sequential", three_sequential), ("3 concurrent", three_concurrent), ("combined", combined)]
+    print(f"{'mode':<14} {'requests':>9} {'prompt tok':>11} {'compl tok':>10} {'wall s':>8}  sections")
+
+    for name, fn in modes:
+        for key in totals:
+            totals[key] = 0
+        wall = 0.0
+        fallbacks = 0
+        for _ in range(repeat):
+            for text in texts:
+                start = time.perf_counter()
+                sources = await fn(service, text)
+                wall += time.perf_counter() - start
+                if sources and name == "combined":
+                    fallbacks += sum(1 for source in sources.values() if source != "combined")
+
+        runs = repeat * len(texts)
+        note = f"{fallbacks} section fallbacks" if name == "combined" else "-"
+        print(
+            f"{name:<14} {totals['requests'] / runs:>9.1f} {totals['prompt_tokens'] / runs:>11.0f} "
+            f"{totals['completion_tokens'] / runs:>10.0f} {wall / runs:>8.2f}  {note}"
+        )
+
+    await service.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("texts", nargs="*", help="Contract text files, one contract per file (default: synthesized)")
+    parser.add_argument("--size-kb", type=int, default=20, help="Size of the synthesized contract")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the texts (averages are reported)")
+    args = parser.parse_args()
+
+    if args.texts:
+        texts = []
+        for path in args.texts:
+            with open(path, encoding="utf-8") as f:
+                texts.append(f.read())
+    else:
+        texts = [synthesize_dump(args.size_kb * 1024)]
+
+    print(f"{len(texts)} contract(s), {sum(len(text) for text in texts) / len(texts) / 1024:.1f} KB average")
+    asyncio.run(run(texts, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
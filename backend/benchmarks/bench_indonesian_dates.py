@@ -0,0 +1,149 @@
+"""
+Microbenchmark and accuracy check of the Indonesian date parser
+
+Compares utils.indonesian_dates.normalize_date with the previous lookup-table
+converter of GroqService._convert_indonesian_dates on the test corpus in
+benchmarks/data/indonesian_dates.tsv (text<TAB>expected "DD Bulan YYYY",
+empty expected when the text holds no date). Mismatches are listed.
+
+Usage (from the backend directory):
+    python benchmarks/bench_indonesian_dates.py
+    python benchmarks/bench_indonesian_dates.py --corpus my_dates.tsv --repeat 2000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.indonesian_dates import normalize_date
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "indonesian_dates.tsv")
+
+
+def legacy_convert(date_text: str) -> str:
+    """Previous lookup-table converter from GroqService._convert_indonesian_dates (rebuilt per call)"""
+    # Mapping number words to digits
+    number_map = {
+        'satu': '1', 'dua': '2', 'tiga': '3', 'empat': '4', 'lima': '5',
+        'enam': '6', 'tujuh': '7', 'delapan': '8', 'sembilan': '9', 'sepuluh': '10',
+        'sebelas': '11', 'dua belas': '12', 'tiga belas': '13', 'empat belas': '14', 'lima belas': '15',
+        'enam belas': '16', 'tujuh belas': '17', 'delapan belas': '18', 'sembilan belas': '19',
+        'dua puluh': '20', 'dua puluh satu': '21', 'dua puluh dua': '22', 'dua puluh tiga': '23',
+        'dua puluh empat': '24', 'dua puluh lima': '25', 'dua puluh enam': '26', 'dua puluh tujuh': '27',
+        'dua puluh delapan': '28', 'dua puluh sembilan': '29', 'tiga puluh': '30', 'tiga puluh satu': '31',
+        'ribu': '1000', 'dua ribu': '2000', 'dua ribu dua puluh': '2020', 'dua ribu dua puluh lima': '2025',
+        'dua ribu dua puluhan lima': '2025', 'dua ribu dua puluh empat': '2024', 'dua ribu dua puluh tiga': '2023',
+        'dua ribu dua puluh enam': '2026', 'dua ribu dua puluh tujuh': '2027'
+    }
+
+    # Month mapping
+    month_map = {
+        'januari': 'Januari', 'februari': 'Februari', 'maret': 'Maret', 'april': 'April',
+        'mei': 'Mei', 'juni': 'Juni', 'juli': 'Juli', 'agustus': 'Agustus',
+        'september': 'September', 'oktober': 'Oktober', 'november': 'November', 'desember': 'Desember'
+    }
+
+    if not date_text or len(date_text) < 10:
+        return date_text
+
+    original = date_text
+    text = date_text.lower().strip()
+
+    # If already in correct format, return as is
+    if re.match(r'\d{1,2}\s+(januari|februari|maret|april|mei|juni|juli|agustus|september|oktober|november|desember)\s+\d{4}', text):
+        return date_text
+
+    # Try to extract day, month, year from Indonesian text
+    day = None
+    month = None
+    year = None
+
+    # Find day number
+    for word_num, digit in number_map.items():
+        if word_num in text and len(digit) <= 2:  # Day should be 1-31
+            day = digit
+            break
+
+    # Find month
+    for month_word, month_name in month_map.items():
+        if month_word in text:
+            month = month_name
+            break
+
+    # Find year  
+    for word_num, digit in number_map.items():
+        if word_num in text and len(digit) >= 4:  # Year should be 4 digits
+            year = digit
+            break
+
+    # Additional year patterns
+    if 'dua ribu dua puluh lima' in text:
+        year = '2025'
+    elif 'dua ribu dua puluhan lima' in text:
+        year = '2025'
+    elif 'dua ribu dua puluh empat' in text:
+        year = '2024'
+
+    # If we found all components, format properly
+    if day and month and year:
+        return f"{day} {month} {year}"
+
+    return original
+
+
+def legacy_normalize(text: str):
+    """Legacy converter with the same contract as normalize_date (None when unchanged)"""
+    converted = legacy_convert(text)
+    if converted != text:
+        return converted
+    match = re.match(r'(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})$', text.strip())
+    return text if match else None
+
+
+def load_corpus(path: str):
+    cases = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            text, _, expected = line.rstrip("\n").partition("\t")
+            cases.append((text, expected or None))
+    return cases
+
+
+def evaluate(name: str, convert, cases, repeat: int, verbose: bool):
+    failures = [(text, expected, convert(text)) for text, expected in cases]
+    failures = [case for case in failures if case[1] != case[2]]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text, _ in cases:
+            convert(text)
+    per_call_us = (time.perf_counter() - start) / (repeat * len(cases)) * 1e6
+
+    correct = len(cases) - len(failures)
+    print(f"{name:<10} {correct:>4}/{len(cases):<4} {per_call_us:>10.1f}")
+    if verbose:
+        for text, expected, got in failures:
+            print(f"    {text!r}: expected {expected!r}, got {got!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="TSV file with text and expected date")
+    parser.add_argument("--repeat", type=int, default=500, help="Timed passes over the corpus")
+    parser.add_argument("--quiet", action="store_true", help="Do not list mismatches")
+    args = parser.parse_args()
+
+    cases = load_corpus(args.corpus)
+    print(f"{'parser':<10} {'correct':>9} {'us / call':>10}")
+    evaluate("legacy", legacy_normalize, cases, args.repeat, not args.quiet)
+    evaluate("compiled", normalize_date, cases, args.repeat, not args.quiet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark the contract keyword matcher against per-keyword substring scans
+
+Runs the three keyword consumers (risk factors over the full text, risk
+sentence selection, per-line section keywords) the old way (`kw in text`
+for every keyword) and through KeywordMatcher with the regex fallback and,
+if installed, pyahocorasick. Results are checked for equality.
+
+Without a file argument a ~500 KB OCR-like dump is synthesized.
+
+Usage (from the backend directory):
+    python benchmarks/bench_keyword_matcher.py
+    python benchmarks/bench_keyword_matcher.py ocr_dump.txt --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.keyword_matcher import (  # noqa: E402
+    AHOCORASICK_AVAILABLE, KeywordMatcher, segment_bounds,
+    RISK_SENTENCE_KEYWORDS, RISK_FACTOR_KEYWORDS, SECTION_KEYWORDS, ADDRESS_INDICATORS
+)
+
+SAMPLE_LINES = [
+    "--- Page {page} ---",
+    "PERJANJIAN KERJASAMA PENGADAAN BARANG Nomor: {n}/PKS/ILCS/2024",
+    "Pada hari ini Senin tanggal {day} Januari 2024 kami yang bertanda tangan di bawah ini:",
+    "PT Integrasi Logistik Cipta Solusi, berkedudukan di Jl. Raya Pelabuhan No. {n} Jakarta",
+    "yang selanjutnya disebut PIHAK PERTAMA, diwakili oleh Direktur Utama.",
+    "CV Maju Bersama beralamat di Jalan Diponegoro Nomor {n}, Kota Surabaya, PIHAK KEDUA.",
+    "Pasal {n} NILAI KONTRAK: Rp {n}.000.000,- (terbilang: {n} juta rupiah) termasuk pajak.",
+    "Pembayaran dilakukan paling lambat 30 hari; keterlambatan pembayaran dikenakan denda 1‰ per hari.",
+    "Dalam hal force majeure atau keadaan kahar seperti bencana alam, para pihak dibebaskan dari sanksi.",
+    "PIHAK KEDUA memberikan garansi dan jaminan atas barang selama masa berlaku perjanjian.",
+    "Pemutusan kontrak sepihak tunduk pada peraturan dan undang-undang yang berlaku di Indonesia.",
+    "lnl adalah teks 0CR yang rusak ,, ; ; dengan karakter ~~ acak dan k4ta tid4k jel4s",
+    "Jangka waktu perjanjian berlaku sejak {day}/03/2024 sampai dengan berakhir pada 2025-03-{day}.",
+]
+
+
+def synthesize_dump(target_bytes: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    page = 1
+    while size < target_bytes:
+        template = rng.choice(SAMPLE_LINES)
+        if template.startswith("---"):
+            page += 1
+        line = template.format(page=page, n=rng.randint(1, 999), day=rng.randint(1, 28))
+        lines.append(line)
+        size += len(line.encode("utf-8")) + 1
+    return "\n".join(lines)
+
+
+def naive(text: str):
+    text_lower = text.lower()
+    factors = {
+        risk_type: [kw for kw in keywords if kw in text_lower]
+        for risk_type, keywords in RISK_FACTOR_KEYWORDS.items()
+    }
+    sentences = [
+        i for i, sentence in enumerate(text.split('.'))
+        if any(kw in sentence.strip().lower() for kw in RISK_SENTENCE_KEYWORDS)
+    ]
+    line_keywords = []
+    for line in text.split('\n'):
+        line_lower = line.strip().lower()
+        line_keywords.append(
+            {kw for kw in SECTION_KEYWORDS if kw in line_lower}
+            | {kw for kw in ADDRESS_INDICATORS if kw in line_lower}
+        )
+    return factors, sentences, line_keywords
+
+
+def matched(matcher: KeywordMatcher, text: str):
+    text_lower = text.lower()
+    found = matcher.find(text_lower, groups=[f"risk_factor:{t}" for t in RISK_FACTOR_KEYWORDS])
+    factors = {
+        risk_type: [kw for kw in keywords if kw in found]
+        for risk_type, keywords in RISK_FACTOR_KEYWORDS.items()
+    }
+    _, starts, ends = segment_bounds(text_lower, '.')
+    sentence_keywords = matcher.find_in_segments(text_lower, starts, ends, groups=["risk_sentence"])
+    sentences = [i for i, keywords in enumerate(sentence_keywords) if keywords]
+    _, starts, ends = segment_bounds(text_lower, '\n')
+    line_keywords = matcher.find_in_segments(text_lower, starts, ends, groups=["section", "address"])
+    return factors, sentences, line_keywords
+
+
+def build_matcher(use_automaton: bool) -> KeywordMatcher:
+    return KeywordMatcher({
+        "risk_sentence": RISK_SENTENCE_KEYWORDS,
+        **{f"risk_factor:{t}": keywords for t, keywords in RISK_FACTOR_KEYWORDS.items()},
+        "section": SECTION_KEYWORDS,
+        "address": ADDRESS_INDICATORS
+    }, use_automaton=use_automaton)
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dump", nargs="?", help="OCR text dump (default: synthesized)")
+    parser.add_argument("--size-kb", type=int, default=500, help="Size of the synthesized dump")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant (best time is reported)")
+    args = parser.parse_args()
+
+    if args.dump:
+        with open(args.dump, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthesize_dump(args.size_kb * 1024)
+
+    print(f"text: {len(text.encode('utf-8')) / 1024:.0f} KB, {text.count(chr(10)) + 1} lines")
+
+    baseline_seconds, expected = timed(lambda: naive(text), args.repeat)
+    print(f"{'variant':<14} {'seconds':>9} {'speedup':>8}  same result")
+    print(f"{'substring':<14} {baseline_seconds:>9.3f} {1.0:>8.1f}  -")
+
+    variants = [("regex", False)]
+    if AHOCORASICK_AVAILABLE:
+        variants.append(("pyahocorasick", True))
+
+    for name, use_automaton in variants:
+        matcher = build_matcher(use_automaton)
+        seconds, result = timed(lambda: matched(matcher, text), args.repeat)
+        print(f"{name:<14} {seconds:>9.3f} {baseline_seconds / seconds:>8.1f}  {result == expected}")
+
+
+if __name__ == "__main__":
+    main()
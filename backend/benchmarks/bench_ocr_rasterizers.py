@@ -0,0 +1,82 @@
+"""
+Benchmark PDF rasterizer backends used by the OCR pipeline
+
+Compares the poppler (pdf2image) and PyMuPDF renderers on pages/sec and peak
+RSS. Each backend runs in a fresh process so peak memory is not shared.
+
+Usage (from the backend directory):
+    python benchmarks/bench_ocr_rasterizers.py contract.pdf --dpi 300
+    python benchmarks/bench_ocr_rasterizers.py contract.pdf --ocr
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKENDS = ["pdf2image", "pymupdf"]
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB (Linux reports KB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_backend(rasterizer: str, pdf_path: str, dpi: int, run_ocr: bool, queue):
+    from services.ocr_services import iter_pdf_pages
+    import pytesseract
+
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    pages = 0
+
+    for _, image in iter_pdf_pages(pdf_path, dpi=dpi, rasterizer=rasterizer):
+        if run_ocr:
+            pytesseract.image_to_string(image, lang="eng+ind")
+        image.close()
+        pages += 1
+
+    elapsed = time.perf_counter() - start
+    queue.put({
+        "rasterizer": rasterizer,
+        "pages": pages,
+        "seconds": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "rss_growth_mb": _peak_rss_mb() - rss_before,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", help="PDF file to render")
+    parser.add_argument("--dpi", type=int, default=300, help="Rendering resolution")
+    parser.add_argument("--ocr", action="store_true", help="Also run Tesseract on every rendered page")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'backend':<10} {'pages':>6} {'seconds':>9} {'pages/s':>8} {'peak RSS MB':>12} {'RSS growth MB':>14}")
+
+    for backend in BACKENDS:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_backend, args=(backend, args.pdf, args.dpi, args.ocr, queue))
+        proc.start()
+        proc.join()
+
+        if proc.exitcode != 0:
+            print(f"{backend:<10} failed (exit code {proc.exitcode})")
+            continue
+
+        r = queue.get()
+        print(
+            f"{r['rasterizer']:<10} {r['pages']:>6} {r['seconds']:>9.2f} {r['pages_per_sec']:>8.2f} "
+            f"{r['peak_rss_mb']:>12.1f} {r['rss_growth_mb']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
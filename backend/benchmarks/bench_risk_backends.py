@@ -0,0 +1,138 @@
+"""
+Benchmark the PyTorch and ONNX Runtime (int8) risk model backends
+
+Reports latency, throughput and peak RSS per backend (each in a fresh
+process) and checks prediction parity: label agreement and the largest
+probability difference between backends. With a labelled CSV (text,label
+columns) accuracy is reported too.
+
+Usage (from the backend directory):
+    python benchmarks/bench_risk_backends.py contracts.txt
+    python benchmarks/bench_risk_backends.py --csv labelled.csv --repeat 3
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKENDS = ["pytorch", "onnx"]
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB (Linux reports KB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_backend(backend: str, texts, repeat: int, queue):
+    # Settings are read at import time, so select the backend before importing
+    os.environ["RISK_INFERENCE_BACKEND"] = backend
+    from services.risk_services import RiskAnalysisService
+
+    load_start = time.perf_counter()
+    service = RiskAnalysisService()
+    service.ensure_loaded()
+    load_seconds = time.perf_counter() - load_start
+
+    if not service.risk_available or service.backend != backend:
+        queue.put({"backend": backend, "error": f"backend not available (loaded: {service.backend})"})
+        return
+
+    processed = [service._preprocess_contract_text(text) for text in texts]
+    service._predict_proba(processed[:1])  # warm-up
+
+    latencies = []
+    probabilities = []
+    for _ in range(repeat):
+        probabilities = []
+        for text in processed:
+            start = time.perf_counter()
+            probabilities.extend(service._predict_proba([text]))
+            latencies.append(time.perf_counter() - start)
+
+    batch_start = time.perf_counter()
+    service._predict_proba(processed)
+    batch_seconds = time.perf_counter() - batch_start
+
+    latencies.sort()
+    queue.put({
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        "batch_texts_per_sec": len(processed) / batch_seconds if batch_seconds else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "probabilities": probabilities,
+        "id2label": {int(k): v for k, v in service.config.id2label.items()},
+    })
+
+
+def _load_texts(args):
+    if args.csv:
+        with open(args.csv, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        return [row["text"] for row in rows], [row["label"] for row in rows]
+
+    with open(args.texts, encoding="utf-8") as f:
+        # One contract per blank-line separated block
+        blocks = [block.strip() for block in f.read().split("\n\n")]
+    return [block for block in blocks if block], None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("texts", nargs="?", help="Text file with contracts separated by blank lines")
+    parser.add_argument("--csv", help="Labelled CSV with text,label columns")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed passes over the texts")
+    args = parser.parse_args()
+
+    if not args.texts and not args.csv:
+        parser.error("give a text file or --csv")
+
+    texts, labels = _load_texts(args)
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+
+    print(f"{'backend':<8} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'texts/s':>8} {'peak RSS MB':>12}")
+    for backend in BACKENDS:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_backend, args=(backend, texts, args.repeat, queue))
+        proc.start()
+        r = queue.get()
+        proc.join()
+
+        if "error" in r:
+            print(f"{backend:<8} {r['error']}")
+            continue
+
+        results[backend] = r
+        print(
+            f"{backend:<8} {r['load_seconds']:>7.2f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+            f"{r['batch_texts_per_sec']:>8.2f} {r['peak_rss_mb']:>12.1f}"
+        )
+
+    predictions = {}
+    for backend, r in results.items():
+        probs = r["probabilities"][:len(texts)]
+        predictions[backend] = [r["id2label"][max(range(len(p)), key=p.__getitem__)] for p in probs]
+        if labels:
+            correct = sum(1 for pred, label in zip(predictions[backend], labels) if pred == label)
+            print(f"{backend} accuracy: {correct / len(labels):.3f} ({correct}/{len(labels)})")
+
+    if len(results) == 2:
+        torch_probs = results["pytorch"]["probabilities"][:len(texts)]
+        onnx_probs = results["onnx"]["probabilities"][:len(texts)]
+        agreement = sum(1 for a, b in zip(predictions["pytorch"], predictions["onnx"]) if a == b)
+        max_diff = max(
+            abs(a - b) for pa, pb in zip(torch_probs, onnx_probs) for a, b in zip(pa, pb)
+        )
+        print(f"label agreement: {agreement}/{len(texts)}  max probability diff: {max_diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
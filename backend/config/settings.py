@@ -58,6 +58,96 @@ class Settings(BaseSettings):
         default="tesseract",
         description="Tesseract command path"
     )
+    OCR_ENGINE: str = Field(
+        default="auto",
+        description="OCR engine: 'tesserocr' (warm engine per worker), 'pytesseract' (subprocess per page) or 'auto'"
+    )
+    TESSDATA_PREFIX: str = Field(default="", description="Tesseract tessdata directory for tesserocr (empty = default)")
+    OCR_MAX_WORKERS: int = Field(
+        default=2,
+        description="Max OCR worker processes for page-parallel OCR (0 = number of CPUs)"
+    )
+    OCR_PAGE_WINDOW: int = Field(
+        default=3,
+        description="Max rendered PDF pages held in memory while waiting for OCR"
+    )
+    OCR_ADAPTIVE_DPI: bool = Field(
+        default=False,
+        description="OCR at OCR_LOW_DPI first and re-render only low-confidence pages (opt-in: output may differ)"
+    )
+    OCR_LOW_DPI: int = Field(default=200, description="First-pass DPI for adaptive OCR")
+    OCR_MIN_CONFIDENCE: float = Field(
+        default=75.0,
+        description="Mean Tesseract word confidence (0-100) below which a page is re-OCR'd at full DPI"
+    )
+    OCR_RASTERIZER: str = Field(
+        default="pymupdf",
+        description="PDF page renderer for OCR: 'pymupdf' (in-process) or 'pdf2image' (poppler)"
+    )
+    
+    # Hybrid PDF extraction settings (OCR only pages without a usable text layer)
+    HYBRID_MIN_PAGE_CHARS: int = Field(
+        default=50,
+        description="Pages whose text layer has fewer characters are OCR'd"
+    )
+    HYBRID_IMAGE_COVERAGE: float = Field(
+        default=0.5,
+        description="Image coverage ratio above which a page counts as scanned"
+    )
+    HYBRID_MIN_CHARS_IMAGE_PAGE: int = Field(
+        default=300,
+        description="Scanned pages with fewer text-layer characters are OCR'd"
+    )
+    
+    # Extraction cache settings
+    EXTRACTION_CACHE_ENABLED: bool = Field(default=True, description="Cache extracted text by file hash")
+    EXTRACTION_CACHE_DIR: str = Field(
+        default="./data/cache/extraction",
+        description="Directory for the on-disk extraction cache"
+    )
+    EXTRACTION_CACHE_MAX_BYTES: int = Field(
+        default=200 * 1024 * 1024,
+        description="Max size of the on-disk extraction cache in bytes (200MB)"
+    )
+    EXTRACTION_CACHE_MEMORY_ITEMS: int = Field(
+        default=32,
+        description="Max entries in the in-memory extraction cache tier"
+    )
+    
+    # LLM response cache settings
+    LLM_CACHE_ENABLED: bool = Field(default=True, description="Cache Groq responses by prompt fingerprint")
+    LLM_CACHE_DB_PATH: str = Field(
+        default="./data/cache/llm_responses.db",
+        description="SQLite database for cached LLM responses"
+    )
+    LLM_CACHE_TTL_SECONDS: int = Field(
+        default=7 * 24 * 3600,
+        description="Seconds a cached LLM response stays valid (7 days)"
+    )
+    LLM_CACHE_MAX_BYTES: int = Field(
+        default=50 * 1024 * 1024,
+        description="Max size of cached LLM responses in bytes (50MB), least recently used evicted first"
+    )
+    
+    # Background job settings
+    JOB_DB_PATH: str = Field(default="./data/jobs.db", description="SQLite database for analysis job state")
+    JOB_MAX_WORKERS: int = Field(default=1, description="Concurrent analysis jobs per server worker")
+    JOB_POLL_INTERVAL: float = Field(
+        default=5.0,
+        description="Seconds between checks for jobs queued by other workers"
+    )
+    JOB_LEASE_SECONDS: float = Field(
+        default=60.0,
+        description="Running jobs whose worker has not sent a heartbeat for this long are requeued"
+    )
+    JOB_MAX_ATTEMPTS: int = Field(
+        default=3,
+        description="Runs a job gets; a job whose worker died this many times is marked failed instead of requeued"
+    )
+    JOB_PROGRESS_INTERVAL: float = Field(
+        default=1.0,
+        description="Minimum seconds between progress writes within a job stage"
+    )
     
     # Translation settings
     TRANSLATION_MODEL: str = Field(
@@ -72,6 +162,63 @@ class Settings(BaseSettings):
     )
     GROQ_MAX_TOKENS: int = Field(default=1024, description="Max tokens for Groq responses")
     GROQ_TEMPERATURE: float = Field(default=0.1, description="Temperature for Groq model")
+    GROQ_MAX_CONNECTIONS: int = Field(default=20, description="Maximum open HTTP connections to the Groq API")
+    GROQ_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=10, description="Idle Groq connections kept for reuse")
+    GROQ_KEEPALIVE_EXPIRY: float = Field(default=30.0, description="Seconds an idle Groq connection is kept")
+    GROQ_CONNECT_TIMEOUT: float = Field(default=10.0, description="Groq connect timeout (seconds)")
+    GROQ_READ_TIMEOUT: float = Field(default=60.0, description="Groq read/write timeout (seconds)")
+    GROQ_POOL_TIMEOUT: float = Field(default=30.0, description="Seconds to wait for a free Groq connection")
+    GROQ_MAX_RETRIES: int = Field(default=2, description="Retries of rate-limited (429), 5xx and connection-failed Groq requests")
+    GROQ_RATE_LIMIT_RPM: int = Field(
+        default=30,
+        description="Groq requests per minute for the API key, split across server workers (0: no limit)"
+    )
+    GROQ_RATE_LIMIT_TPM: int = Field(
+        default=6000,
+        description="Groq tokens (prompt + max completion) per minute for the API key, split across server workers (0: no limit); "
+                    "GROQ_INPUT_TOKEN_BUDGET + GROQ_MAX_TOKENS should fit one worker's share"
+    )
+    GROQ_RATE_LIMIT_WORKERS: int = Field(
+        default=0,
+        description="Server worker processes sharing the Groq rate limits (0: WEB_CONCURRENCY, else 1)"
+    )
+    GROQ_MAX_CONCURRENT_REQUESTS: int = Field(default=8, description="Groq requests in flight per worker")
+    GROQ_BACKOFF_BASE: float = Field(default=1.0, description="Base delay (seconds) of the jittered exponential retry backoff")
+    GROQ_BACKOFF_MAX: float = Field(default=30.0, description="Max retry backoff (seconds) when no retry-after is sent")
+    GROQ_CONTEXT_WINDOW: int = Field(default=8192, description="Context window of the Groq model in tokens")
+    GROQ_INPUT_TOKEN_BUDGET: int = Field(
+        default=1400,
+        description="Maximum contract text tokens sent per Groq request"
+    )
+    GROQ_TOKENIZER: str = Field(
+        default="",
+        description="tokenizer.json path or Hugging Face name of the Groq model tokenizer (empty: estimate)"
+    )
+    SECTION_SCORER_WEIGHTS_PATH: str = Field(
+        default="",
+        description="JSON file overriding section scorer weights for long-contract context selection"
+    )
+    RULE_EXTRACTOR_ENABLED: bool = Field(
+        default=True,
+        description="Resolve contract fields with rule-based extraction first and ask Groq only for the rest"
+    )
+    RULE_EXTRACTOR_MIN_CONFIDENCE: float = Field(
+        default=0.8,
+        description="Confidence a rule-based field needs to skip asking Groq for it"
+    )
+    GROQ_COMBINED_ANALYSIS: bool = Field(
+        default=True,
+        description="Request contract details, entities and risk assessment in one Groq call for full analyses"
+    )
+    GROQ_MAP_REDUCE_ENABLED: bool = Field(
+        default=True,
+        description="Extract contracts that exceed the input token budget chunk by chunk and merge the results"
+    )
+    GROQ_MAP_REDUCE_CONCURRENCY: int = Field(default=4, description="Concurrent Groq requests per map-reduce analysis")
+    GROQ_MAP_REDUCE_MAX_CHUNKS: int = Field(
+        default=6,
+        description="Max chunks per map-reduce analysis; the most relevant chunks are kept"
+    )
     
     # Contract analysis settings
     CONTRACT_TEMPLATES_DIR: str = Field(
@@ -96,6 +243,45 @@ class Settings(BaseSettings):
     # Risk assessment settings
     RISK_THRESHOLD_HIGH: float = Field(default=0.7, description="High risk threshold")
     RISK_THRESHOLD_MEDIUM: float = Field(default=0.4, description="Medium risk threshold")
+    RISK_BATCH_SIZE: int = Field(default=16, description="Mini-batch size for risk model inference")
+    RISK_INFERENCE_BACKEND: str = Field(
+        default="pytorch",
+        description="Risk model backend: 'pytorch' or 'onnx' (exported + int8 quantized, onnxruntime)"
+    )
+    RISK_ONNX_DIR: str = Field(
+        default="./data/onnx/indo_finetuned",
+        description="Directory for the exported ONNX risk model"
+    )
+    RISK_ONNX_QUANTIZE: bool = Field(default=True, description="Serve the dynamically int8-quantized ONNX model")
+    RISK_NUM_THREADS: int = Field(default=0, description="Intra-op CPU threads for ONNX Runtime (0 = default)")
+    RISK_MICRO_BATCHING: bool = Field(
+        default=True,
+        description="Batch concurrent single-contract risk requests into shared forward passes"
+    )
+    RISK_BATCH_WAIT_MS: float = Field(default=5.0, description="How long a micro-batch waits for more requests (ms)")
+    RISK_MAX_BATCH_SIZE: int = Field(default=32, description="Maximum sequences per micro-batch")
+    RISK_MMAP_WEIGHTS: bool = Field(
+        default=True,
+        description="Memory-map safetensors weights so worker processes share model pages"
+    )
+    RISK_PRELOAD_MODEL: bool = Field(
+        default=False,
+        description="Load the risk model when the app is imported (gunicorn master with preload_app)"
+    )
+    RISK_WARMUP_ON_STARTUP: bool = Field(
+        default=False,
+        description="Load the risk model and run one inference in the background at worker startup"
+    )
+    RISK_WINDOWED_CLASSIFICATION: bool = Field(
+        default=True,
+        description="Classify the full contract with overlapping 512-token windows"
+    )
+    RISK_WINDOW_STRIDE: int = Field(default=128, description="Token overlap between risk windows")
+    RISK_MAX_WINDOWS: int = Field(default=16, description="Max windows classified per contract")
+    RISK_WINDOW_TIME_BUDGET_MS: int = Field(
+        default=3000,
+        description="CPU time budget for windowed classification; remaining windows are skipped"
+    )
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for the backend
+
+    gunicorn main:app -c gunicorn.conf.py
+
+With RISK_PRELOAD_MODEL=True the app (and the risk model) is imported once in
+the master before workers are forked, so the model weights are shared between
+workers copy-on-write instead of being loaded once per worker.
+"""
+
+import os
+
+from config.settings import settings
+
+bind = os.getenv("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+# Read by the workers to split the Groq rate limits between them
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+preload_app = settings.RISK_PRELOAD_MODEL
+
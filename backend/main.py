@@ -1,13 +1,25 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from routes import analyze, risk
+from routes import analyze, risk, jobs
 from config.settings import settings
+from services.ocr_services import shutdown_ocr_executor
+from services.job_services import get_job_runner
+from services.risk_services import get_risk_service
+from services.groq_services import get_groq_service
+from services.groq_rate_services import get_groq_rate_controller
+import asyncio
 import sys
 import os
 
 sys.path.append(os.path.dirname(__file__))
 
+# With gunicorn preload_app this runs once in the master, before workers fork,
+# so all workers share the loaded weights copy-on-write. ONNX Runtime sessions
+# are not fork-safe, so the ONNX backend is always loaded per worker.
+if settings.RISK_PRELOAD_MODEL and settings.RISK_INFERENCE_BACKEND != "onnx":
+    get_risk_service().ensure_loaded()
+
 app = FastAPI(title="ILCS Contract AI API", version="1.0.0")
 
 # Add CORS middleware
@@ -22,6 +34,23 @@ app.add_middleware(
 # Include routers
 app.include_router(analyze.router)
 app.include_router(risk.router)
+app.include_router(jobs.router)
+
+@app.on_event("startup")
+async def startup_event():
+    await get_job_runner().start()
+    # Per-worker Groq budgets; warns here if a full request does not fit them
+    get_groq_rate_controller()
+    if settings.RISK_WARMUP_ON_STARTUP:
+        # In the background so /health answers while the model loads
+        asyncio.create_task(get_risk_service().warm_up())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await get_job_runner().stop()
+    await get_risk_service().batcher.stop()
+    await get_groq_service().aclose()
+    shutdown_ocr_executor()
 
 @app.get("/")
 async def root():
@@ -1,161 +1,140 @@
 # routes/analyze.py
-from fastapi import APIRouter, UploadFile, HTTPException
-from services.ocr_services import OCRService
-from services.groq_services import get_groq_service
-from models.contract import ContractAnalysisResult, ContractDetails, ContractParty
-from utils.pdf_parser import PDFParser
+from fastapi import APIRouter, UploadFile, HTTPException, BackgroundTasks, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from models.contract import ContractAnalysisResult
+from services.cache_services import get_extraction_cache, get_llm_response_cache, is_cacheable_text
+from services.contract_analysis_services import get_contract_analysis_service
+from services.groq_rate_services import get_groq_rate_controller
+from typing import Dict, Any, AsyncIterator
+import asyncio
+import json
 import os
 import time
 
 router = APIRouter()
 
+extraction_cache = get_extraction_cache()
+contract_analysis_service = get_contract_analysis_service()
+
+# Background OCR backup jobs that are still pending, running or failed, keyed by
+# upload hash. Completed backups are looked up through the extraction cache.
+ocr_backup_jobs: Dict[str, Dict[str, Any]] = {}
+
+async def run_ocr_backup(
+    backup_id: str,
+    content: bytes,
+    filename: str,
+    extracted_text: str,
+    extraction_method: str
+):
+    """OCR a PDF in the background and record where the OCR artifact was saved"""
+    ocr_backup_jobs[backup_id] = {"status": "running", "filename": filename}
+    
+    try:
+        ocr_service = contract_analysis_service.ocr_service
+        ocr_text = await ocr_service.extract_text_from_pdf_bytes(content)
+        
+        if not is_cacheable_text(ocr_text):
+            raise RuntimeError(ocr_text or "OCR produced no text")
+        
+        original_name = filename.rsplit('.', 1)[0] if filename else "pdf"
+        ocr_filepath = ocr_service.save_ocr_result(ocr_text, f"{original_name}_ocr.txt")
+        if not ocr_filepath:
+            raise RuntimeError("Failed to save OCR result")
+        
+        await extraction_cache.put_async(
+            backup_id, extracted_text, extraction_method,
+            ocr_file_path=ocr_filepath
+        )
+        ocr_backup_jobs.pop(backup_id, None)
+        print(f"OCR backup {backup_id} saved to: {ocr_filepath}")
+        
+    except Exception as e:
+        print(f"OCR backup {backup_id} failed: {e}")
+        ocr_backup_jobs[backup_id] = {"status": "failed", "filename": filename, "error": str(e)}
+
 @router.get("/health")
 async def health():
     """Simple health check endpoint"""
     return {"status": "healthy", "message": "Analyze service is running"}
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Hit/miss counters of the extraction cache and the Groq response cache
+    
+    LLM cache savings (latency, prompt/completion tokens) are counted per
+    server worker since its start.
+    """
+    return {
+        "extraction": extraction_cache.get_stats(),
+        "llm": await asyncio.get_event_loop().run_in_executor(None, get_llm_response_cache().get_stats)
+    }
+
+@router.get("/contract/ocr-backup/{backup_id}")
+async def get_ocr_backup_status(backup_id: str):
+    """
+    Get the status of a background OCR backup started by /contract/details
+    
+    Args:
+        backup_id: Value of the X-OCR-Backup-Id response header
+    """
+    job = ocr_backup_jobs.get(backup_id)
+    if job:
+        return {"backup_id": backup_id, **job}
+    
+    cached = await extraction_cache.get_async(backup_id)
+    ocr_filepath = cached.get("ocr_file_path") if cached else None
+    if ocr_filepath and os.path.exists(ocr_filepath):
+        return {"backup_id": backup_id, "status": "completed", "ocr_file_path": ocr_filepath}
+    
+    raise HTTPException(status_code=404, detail="OCR backup not found")
+
 @router.post("/contract/details", response_model=ContractAnalysisResult)
-async def analyze_contract_details(file: UploadFile):
+async def analyze_contract_details(
+    file: UploadFile,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    ocr_backup: bool = False
+):
     """
     Extract contract details using OCR + Groq AI:
     - Nama kontrak
     - Pihak pertama 
     - Pihak kedua
     - Tanggal berakhir kontrak
+    
+    Set ocr_backup=true to also OCR a text-layer PDF in the background; the
+    X-OCR-Backup-Id response header can then be polled at
+    /contract/ocr-backup/{backup_id}.
+    
+    The X-OCR-Page-DPI response header lists the DPI used for each OCR'd
+    PDF page, e.g. "2=300,5=400".
     """
     start_time = time.time()
     
     try:
-        # Create uploads directory if it doesn't exist
-        upload_dir = "data/uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Initialize services
-        ocr_service = OCRService()
-        pdf_parser = PDFParser()
-        groq_service = get_groq_service()
-        
-        extracted_text = ""
-        extraction_method = ""
-        ocr_filepath = ""  # Path to saved OCR result
-        
-        # Check file type and extract text accordingly
-        file_extension = file.filename.lower().split('.')[-1] if '.' in file.filename else ""
-        
-        if file_extension == 'pdf':
-            # For PDF files, first try to extract text directly
-            try:
-                extracted_text = await pdf_parser.extract_text_from_pdf(file)
-                extraction_method = "PDF text extraction"
-                
-                # If PDF text extraction yields little content, use OCR
-                if len(extracted_text.strip()) < 100:
-                    print("PDF has little extractable text, using OCR...")
-                    # Reset file position
-                    await file.seek(0)
-                    extracted_text, ocr_filepath = await ocr_service.extract_and_save_from_pdf(file)
-                    extraction_method = "OCR (PDF to image) + saved to file"
-                else:
-                    # Even if PDF extraction is successful, also save OCR for backup
-                    print("PDF text extracted successfully, also saving OCR backup...")
-                    await file.seek(0)
-                    ocr_text, ocr_filepath = await ocr_service.extract_and_save_from_pdf(file)
-                    extraction_method = "PDF text extraction + OCR backup saved"
-                    
-            except Exception as pdf_error:
-                print(f"PDF extraction failed: {pdf_error}, trying OCR...")
-                # Reset file position and try OCR
-                await file.seek(0)
-                extracted_text, ocr_filepath = await ocr_service.extract_and_save_from_pdf(file)
-                extraction_method = "OCR (PDF to image) + saved to file"
-                
-        elif file_extension in ['jpg', 'jpeg', 'png', 'tiff', 'bmp']:
-            # For image files, use OCR directly and save result
-            extracted_text, ocr_filepath = await ocr_service.extract_and_save_from_image(file)
-            extraction_method = "OCR (image) + saved to file"
-            
-        else:
-            # For text files, read directly
-            content = await file.read()
-            extracted_text = content.decode('utf-8')
-            extraction_method = "Direct text reading"
-        
-        if not extracted_text or extracted_text.strip() == "":
-            return ContractAnalysisResult(
-                success=False,
-                error_message="Failed to extract text from file",
-                processing_time=time.time() - start_time
-            )
-        
-        # Analyze contract details with Groq
-        print("Analyzing contract details with Groq...")
-        groq_result = await groq_service.analyze_contract_details(extracted_text)
-        
-        if groq_result.get("error"):
-            return ContractAnalysisResult(
-                success=False,
-                error_message=f"Groq analysis failed: {groq_result['error']}",
-                extracted_text=extracted_text[:1000],
-                processing_time=time.time() - start_time,
-                analysis_method="groq_ai_failed"
-            )
-        
-        # Parse Groq result into our models
-        contract_details = ContractDetails()
-        
-        if "contract_name" in groq_result:
-            contract_details.contract_name = groq_result["contract_name"]
-        
-        if "first_party" in groq_result and groq_result["first_party"]:
-            first_party_data = groq_result["first_party"]
-            if isinstance(first_party_data, dict):
-                contract_details.first_party = ContractParty(
-                    name=first_party_data.get("name", ""),
-                    type=first_party_data.get("type"),
-                    address=first_party_data.get("address")
+        content = await file.read()
+        extraction = await contract_analysis_service.extract_text(content, file.filename)
+        extracted_text = extraction["text"]
+        file_hash = extraction["file_hash"]
+        page_dpis = [f"{page['page_number']}={page['ocr_dpi']}" for page in extraction["pages"] if page["ocr_dpi"]]
+        if page_dpis:
+            response.headers["X-OCR-Page-DPI"] = ",".join(page_dpis)
+        
+        # Optional OCR backup for text-layer PDFs runs after the response is sent
+        is_pdf = file.filename.lower().endswith('.pdf')
+        if ocr_backup and is_pdf and not extraction["ocr_file_path"] and is_cacheable_text(extracted_text):
+            if ocr_backup_jobs.get(file_hash, {}).get("status") not in ("queued", "running"):
+                ocr_backup_jobs[file_hash] = {"status": "queued", "filename": file.filename}
+                background_tasks.add_task(
+                    run_ocr_backup, file_hash, content, file.filename,
+                    extracted_text, extraction["method"]
                 )
-            elif isinstance(first_party_data, str):
-                contract_details.first_party = ContractParty(name=first_party_data)
-        
-        if "second_party" in groq_result and groq_result["second_party"]:
-            second_party_data = groq_result["second_party"]
-            if isinstance(second_party_data, dict):
-                contract_details.second_party = ContractParty(
-                    name=second_party_data.get("name", ""),
-                    type=second_party_data.get("type"),
-                    address=second_party_data.get("address")
-                )
-            elif isinstance(second_party_data, str):
-                contract_details.second_party = ContractParty(name=second_party_data)
-        
-        if "contract_end_date" in groq_result:
-            contract_details.contract_end_date = groq_result["contract_end_date"]
+            response.headers["X-OCR-Backup-Id"] = file_hash
         
-        if "contract_start_date" in groq_result:
-            contract_details.contract_start_date = groq_result["contract_start_date"]
-        
-        if "contract_duration" in groq_result:
-            contract_details.contract_duration = groq_result["contract_duration"]
-        
-        if "contract_value" in groq_result:
-            contract_details.contract_value = groq_result["contract_value"]
-        
-        if "contract_type" in groq_result:
-            contract_details.contract_type = groq_result["contract_type"]
-        
-        if "key_terms" in groq_result:
-            contract_details.key_terms = groq_result["key_terms"]
-        
-        # Return successful result
-        return ContractAnalysisResult(
-            success=True,
-            contract_details=contract_details,
-            extracted_text=extracted_text[:1000] + "..." if len(extracted_text) > 1000 else extracted_text,
-            ocr_file_path=ocr_filepath if ocr_filepath else None,
-            confidence_score=groq_result.get("confidence_score", 0.9),
-            analysis_method="groq_ai",
-            processing_time=time.time() - start_time
-        )
+        return await contract_analysis_service.analyze_extracted(extraction, start_time)
         
     except HTTPException:
         raise
@@ -166,3 +145,56 @@ async def analyze_contract_details(file: UploadFile):
             processing_time=time.time() - start_time,
             analysis_method="error"
         )
+
+@router.post("/contract/full-analysis")
+async def full_contract_analysis(file: UploadFile):
+    """
+    Contract details, entities and risk assessment of one contract
+    
+    With GROQ_COMBINED_ANALYSIS all three come from one Groq request; the
+    "sources" field tells which sections needed a separate request. "pages"
+    is the per-page extraction report of PDFs (source, ocr_dpi, ...).
+    """
+    content = await file.read()
+    return await contract_analysis_service.analyze_full(content, file.filename)
+
+async def _sse_events(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Format pipeline events as Server-Sent Events"""
+    async for event in events:
+        payload = {key: value for key, value in event.items() if key != "event"}
+        yield f"event: {event['event']}\ndata: {json.dumps(jsonable_encoder(payload), ensure_ascii=False)}\n\n"
+
+@router.post("/contract/details/stream")
+async def stream_contract_details(file: UploadFile):
+    """
+    Streaming variant of /contract/details (Server-Sent Events)
+    
+    Events:
+    - stage: {"stage": "extract" | "llm"}; the llm stage also carries
+      extraction_method and the per-page extraction report (pages, with ocr_dpi)
+    - field: {"field": "contract_name", "value": ...}, sent as soon as Groq
+      has generated the field
+    - result: {"result": ContractAnalysisResult, "timing": {"time_to_first_field_ms", "total_ms"}}
+    - error: {"error": ...}
+    """
+    content = await file.read()
+    return StreamingResponse(
+        _sse_events(contract_analysis_service.analyze_stream(content, file.filename)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/contract/details/stream/stats")
+async def get_stream_stats():
+    """Time-to-first-field and total latency (p50/p95) of recent streamed analyses"""
+    return contract_analysis_service.groq_service.get_stream_stats()
+
+@router.get("/groq/rate-limit/stats")
+async def get_groq_rate_limit_stats():
+    """
+    Groq rate controller metrics for alerting
+    
+    current_queue_wait_ms is how long the oldest caller has been waiting for
+    admission; rate_limited_for_ms is the remaining pause after a 429.
+    """
+    return get_groq_rate_controller().get_stats()
@@ -0,0 +1,64 @@
+# routes/jobs.py
+from fastapi import APIRouter, UploadFile, HTTPException
+from services.job_services import get_job_store, get_job_runner
+from config.settings import settings
+import asyncio
+import os
+import uuid
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+job_store = get_job_store()
+job_runner = get_job_runner()
+
+@router.post("/contract/details", status_code=202)
+async def submit_contract_details_job(file: UploadFile):
+    """
+    Submit a contract for background analysis (same pipeline as /contract/details)
+    
+    Returns immediately with a job id; poll GET /jobs/{job_id} for progress
+    and the final ContractAnalysisResult.
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    
+    content = await file.read()
+    if len(content) > settings.MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="File too large")
+    
+    # Persist the upload so the job can be resumed after a worker restart
+    upload_dir = os.path.join(settings.UPLOAD_DIR, "jobs")
+    os.makedirs(upload_dir, exist_ok=True)
+    upload_path = os.path.join(upload_dir, f"{uuid.uuid4().hex}_{os.path.basename(file.filename)}")
+    with open(upload_path, "wb") as f:
+        f.write(content)
+    
+    job_id = await asyncio.get_event_loop().run_in_executor(
+        None, job_store.create, "contract_details", file.filename, upload_path
+    )
+    job_runner.submit(job_id)
+    
+    return {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """
+    Get job status, progress per stage (extract, ocr page N/M, llm) and result
+    """
+    job = await asyncio.get_event_loop().run_in_executor(None, job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "filename": job["filename"],
+        "result": job["result"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
@@ -7,9 +7,10 @@ from models.risk import (
     RiskSummaryResult,
     ModelInfoResult
 )
-from services.risk_services import RiskAnalysisService
-from services.ocr_services import OCRService
-from utils.pdf_parser import PDFParser
+from services.risk_services import get_risk_service
+from services.contract_analysis_services import get_contract_analysis_service
+from services.cache_services import is_cacheable_text
+from config.settings import settings
 from datetime import datetime
 import time
 import os
@@ -18,9 +19,10 @@ import os
 router = APIRouter(prefix="/api/risk", tags=["risk-management"])
 
 # Initialize services
-risk_service = RiskAnalysisService()
-ocr_service = OCRService()
-pdf_parser = PDFParser()
+risk_service = get_risk_service()
+contract_analysis_service = get_contract_analysis_service()
+
+SUPPORTED_FILE_EXTENSIONS = ['pdf', 'jpg', 'jpeg', 'png', 'tiff', 'bmp', 'txt']
 
 @router.get("/model/info", response_model=ModelInfoResult)
 async def get_model_info():
@@ -28,6 +30,7 @@ async def get_model_info():
     Get information about the risk analysis model
     """
     try:
+        await risk_service.ensure_loaded_async()
         model_info = risk_service.get_model_info()
         
         if "error" in model_info:
@@ -52,6 +55,17 @@ async def get_model_info():
             error_message=f"Failed to get model info: {str(e)}"
         )
 
+@router.get("/batcher/stats")
+async def get_batcher_stats():
+    """
+    Micro-batcher metrics (queue depth, batch sizes, wait and inference times)
+    for tuning RISK_BATCH_WAIT_MS against throughput
+    """
+    return {
+        "enabled": settings.RISK_MICRO_BATCHING,
+        **risk_service.batcher.get_stats()
+    }
+
 @router.post("/analyze/text", response_model=ContractRiskAnalysisResult)
 async def analyze_contract_risk_from_text(request: ContractRiskAnalysisRequest):
     """
@@ -131,6 +145,44 @@ async def analyze_contract_risk_from_text(request: ContractRiskAnalysisRequest):
             processing_time=time.time() - start_time
         )
 
+@router.post("/analyze/heatmap")
+async def analyze_contract_risk_heatmap(request: ContractRiskAnalysisRequest):
+    """
+    Classify the full contract with sliding windows and return the
+    per-section risk heatmap alongside the document-level result
+    
+    Args:
+        request: Contract text and optional metadata
+        
+    Returns:
+        Document risk level, confidence and per-window scores with character offsets
+    """
+    start_time = time.time()
+    
+    if not request.contract_text or len(request.contract_text.strip()) < 10:
+        raise HTTPException(
+            status_code=400, 
+            detail="Contract text is required and must be at least 10 characters long"
+        )
+    
+    analysis_result = await risk_service.analyze_contract_risk(request.contract_text)
+    
+    if "error" in analysis_result:
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "error_message": analysis_result["error"]}
+        )
+    
+    return {
+        "success": True,
+        "risk_level": analysis_result["risk_level"],
+        "confidence": analysis_result["confidence"],
+        "window_count": analysis_result.get("window_count"),
+        "windows_classified": analysis_result.get("windows_classified"),
+        "section_heatmap": analysis_result.get("section_heatmap", []),
+        "processing_time": time.time() - start_time
+    }
+
 @router.post("/analyze/file", response_model=ContractRiskAnalysisResult)
 async def analyze_contract_risk_from_file(file: UploadFile):
     """
@@ -150,48 +202,19 @@ async def analyze_contract_risk_from_file(file: UploadFile):
             raise HTTPException(status_code=400, detail="No file uploaded")
         
         file_extension = file.filename.lower().split('.')[-1] if '.' in file.filename else ""
-        
-        # Extract text from file
-        extracted_text = ""
-        extraction_method = ""
-        
-        if file_extension == 'pdf':
-            # Try PDF text extraction first
-            try:
-                extracted_text = await pdf_parser.extract_text_from_pdf(file)
-                extraction_method = "PDF text extraction"
-                
-                # If little text found, use OCR
-                if len(extracted_text.strip()) < 100:
-                    await file.seek(0)  # Reset file position
-                    extracted_text = await ocr_service.extract_text_from_pdf_file(file)
-                    extraction_method = "OCR (PDF to image)"
-                    
-            except Exception:
-                # Fallback to OCR
-                await file.seek(0)
-                extracted_text = await ocr_service.extract_text_from_pdf_file(file)
-                extraction_method = "OCR (PDF to image)"
-                
-        elif file_extension in ['jpg', 'jpeg', 'png', 'tiff', 'bmp']:
-            # Use OCR for images
-            extracted_text = await ocr_service.extract_text_from_image_file(file)
-            extraction_method = "OCR (image)"
-            
-        elif file_extension in ['txt']:
-            # Read text file directly
-            content = await file.read()
-            extracted_text = content.decode('utf-8')
-            extraction_method = "Direct text reading"
-            
-        else:
+        if file_extension not in SUPPORTED_FILE_EXTENSIONS:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Unsupported file type: {file_extension}. Please upload PDF, JPG, PNG, TIFF, BMP, or TXT files."
             )
         
-        # Validate extracted text
-        if not extracted_text or len(extracted_text.strip()) < 10:
+        # Same extraction (and extraction cache) as /contract/details
+        content = await file.read()
+        extraction = await contract_analysis_service.extract_text(content, file.filename)
+        extracted_text = extraction["text"]
+        
+        # Validate extracted text (extractors return error messages instead of raising)
+        if not is_cacheable_text(extracted_text) or len(extracted_text.strip()) < 10:
             raise HTTPException(
                 status_code=400,
                 detail="Could not extract sufficient text from file for risk analysis"
@@ -280,12 +303,16 @@ async def analyze_multiple_contracts_risk(request: RiskSummaryRequest):
         all_risk_factors = []
         high_risk_contracts = []
         
-        for i, contract_text in enumerate(request.contract_texts):
-            if len(contract_text.strip()) < 10:
-                continue
-                
-            result = await risk_service.analyze_contract_risk(contract_text)
-            
+        # Classify all valid contracts together in batched forward passes
+        valid_indices = [
+            i for i, contract_text in enumerate(request.contract_texts)
+            if len(contract_text.strip()) >= 10
+        ]
+        batch_results = await risk_service.analyze_contracts_risk_batch(
+            [request.contract_texts[i] for i in valid_indices]
+        )
+        
+        for i, result in zip(valid_indices, batch_results):
             if "error" not in result:
                 analysis_results.append(result)
                 risk_level = result.get("risk_level", "Unknown")
@@ -0,0 +1,425 @@
+"""
+Caching services for contract processing
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from config.settings import settings
+
+
+# Prefixes of the messages returned by PDFParser/OCRService instead of raising;
+# these must never be cached as if they were document text
+EXTRACTION_ERROR_PREFIXES = (
+    "OCR not available",
+    "OCR extraction failed",
+    "PDF OCR extraction failed",
+    "PDF parsing not available",
+    "PDF text extraction failed",
+    "No text extracted from PDF",
+    "No text found in PDF",
+)
+
+# Marker written by the OCR services for pages that failed (e.g. a Tesseract crash)
+PAGE_ERROR_PATTERN = re.compile(r'^--- Page \d+ \(Error\) ---$', re.MULTILINE)
+
+
+def is_cacheable_text(text: str) -> bool:
+    """Check whether extracted text is real content worth caching"""
+    if not text or not text.strip():
+        return False
+    return not text.startswith(EXTRACTION_ERROR_PREFIXES)
+
+
+def has_page_errors(text: str) -> bool:
+    """Check whether OCR failed on some pages (the text may still be usable)"""
+    return bool(PAGE_ERROR_PATTERN.search(text or ""))
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache for extracted document text.
+
+    Entries are keyed by the SHA-256 of the uploaded file bytes and stored as
+    JSON files on disk (LRU, bounded by total size). A small in-memory LRU sits
+    in front of the disk tier for hot entries. Async callers use get_async()
+    and put_async(), which serve memory hits directly and run disk I/O in the
+    default executor.
+
+    The disk size is scanned once and then tracked per write; the directory
+    is only scanned again (and trimmed) when the tracked size is over budget.
+    Writes by other workers are picked up by those scans.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "./data/cache/extraction",
+        max_disk_bytes: int = 200 * 1024 * 1024,
+        max_memory_items: int = 32
+    ):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_items = max_memory_items
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def hash_content(content: bytes) -> str:
+        """Compute the cache key for file content"""
+        return hashlib.sha256(content).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        """Insert an entry into the in-memory tier"""
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up the in-memory tier (counts a hit)"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return dict(entry)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up cached extraction result
+
+        Args:
+            key: SHA-256 of the file content
+
+        Returns:
+            Cached entry with "text" and "method", or None on a miss
+        """
+        entry = self._memory_get(key)
+        if entry is not None:
+            return entry
+
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # Mark as recently used for disk LRU eviction
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Discarding unreadable extraction cache entry {key}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._remember(key, entry)
+        return dict(entry)
+
+    def put(self, key: str, text: str, method: str, **extra: Any):
+        """
+        Store extraction result
+
+        Args:
+            key: SHA-256 of the file content
+            text: Extracted text
+            method: Extraction method description
+            **extra: Additional JSON-serializable metadata
+        """
+        entry = {"text": text, "method": method, "created_at": time.time(), **extra}
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() for async callers: memory hits directly, disk reads in the executor"""
+        entry = self._memory_get(key)
+        if entry is not None:
+            return entry
+        return await asyncio.get_event_loop().run_in_executor(None, self.get, key)
+
+    async def put_async(self, key: str, text: str, method: str, **extra: Any):
+        """put() for async callers: the disk write and eviction run in the executor"""
+        entry = {"text": text, "method": method, "created_at": time.time(), **extra}
+        self._remember(key, entry)
+        await asyncio.get_event_loop().run_in_executor(None, self._write_disk, key, entry)
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        """Write an entry file and evict if the tracked disk size is over budget"""
+        path = self._entry_path(key)
+
+        try:
+            try:
+                replaced_size = os.path.getsize(path)
+            except OSError:
+                replaced_size = 0
+            # Write atomically so concurrent workers never read a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            written_size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to write extraction cache entry {key}: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += written_size - replaced_size
+            over_budget = self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Scan the disk tier and remove least recently used entries until it fits its budget"""
+        try:
+            entries = []
+            total_size = 0
+            with os.scandir(self.cache_dir) as it:
+                for item in it:
+                    if not item.name.endswith(".json"):
+                        continue
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+                    total_size += stat.st_size
+
+            if total_size > self.max_disk_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    if total_size <= self.max_disk_bytes:
+                        break
+                    try:
+                        os.remove(path)
+                        total_size -= size
+                    except FileNotFoundError:
+                        pass
+
+            with self._lock:
+                self._disk_bytes = total_size
+        except OSError as e:
+            print(f"Extraction cache eviction failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "memory_items": len(self._memory)
+        }
+
+
+def prompt_fingerprint(*template_parts: str) -> str:
+    """Short version id of a prompt template; changes whenever the template does"""
+    return hashlib.sha256("\x00".join(template_parts).encode("utf-8")).hexdigest()[:12]
+
+
+class LLMResponseCache:
+    """
+    SQLite cache of LLM responses.
+
+    Keyed by (model, prompt template version, normalized input hash,
+    max_tokens, temperature). Entries expire after a TTL and the least
+    recently used ones are evicted when the store exceeds its size budget.
+    The database is shared by all workers on the host.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "./data/cache/llm_responses.db",
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_bytes: int = 50 * 1024 * 1024
+    ):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_latency_ms = 0.0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    template_version TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    usage TEXT,
+                    latency_ms REAL,
+                    size_bytes INTEGER NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_last_access ON llm_responses (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def make_key(
+        model: str,
+        template_version: str,
+        input_text: str,
+        max_tokens: int,
+        temperature: float
+    ) -> str:
+        """
+        Compute the cache key of one LLM request
+
+        The input is whitespace-normalized first, so re-extracted text that
+        only differs in spacing or line breaks still hits.
+        """
+        normalized = re.sub(r"\s+", " ", input_text).strip()
+        input_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        fingerprint = json.dumps([model, template_version, input_hash, max_tokens, round(temperature, 4)])
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response
+
+        Returns:
+            Dictionary with content, usage and original latency_ms, or None
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT content, usage, latency_ms, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row["created_at"] > self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    row = None
+                if row is not None:
+                    conn.execute(
+                        "UPDATE llm_responses SET hit_count = hit_count + 1, last_access = ? WHERE key = ?",
+                        (now, key)
+                    )
+        except sqlite3.Error as e:
+            print(f"LLM cache lookup failed: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+
+            usage = json.loads(row["usage"]) if row["usage"] else {}
+            self.hits += 1
+            self.saved_latency_ms += row["latency_ms"] or 0.0
+            self.saved_prompt_tokens += usage.get("prompt_tokens") or 0
+            self.saved_completion_tokens += usage.get("completion_tokens") or 0
+
+        return {"content": row["content"], "usage": usage, "latency_ms": row["latency_ms"]}
+
+    def put(
+        self,
+        key: str,
+        model: str,
+        template_version: str,
+        content: str,
+        usage: Optional[Dict[str, Any]] = None,
+        latency_ms: Optional[float] = None
+    ):
+        """Store a response and evict expired / least recently used entries"""
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses "
+                    "(key, model, template_version, content, usage, latency_ms, size_bytes, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, model, template_version, content, json.dumps(usage or {}), latency_ms, size, now, now)
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"Failed to write LLM cache entry: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        total_size = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM llm_responses").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        rows = conn.execute("SELECT key, size_bytes FROM llm_responses ORDER BY last_access").fetchall()
+        for row in rows:
+            if total_size <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM llm_responses WHERE key = ?", (row["key"],))
+            total_size -= row["size_bytes"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters (this worker) and store size"""
+        try:
+            with self._connect() as conn:
+                entries, size_bytes = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_responses"
+                ).fetchone()
+        except sqlite3.Error:
+            entries, size_bytes = None, None
+
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "saved_latency_ms": round(self.saved_latency_ms, 1),
+            "saved_prompt_tokens": self.saved_prompt_tokens,
+            "saved_completion_tokens": self.saved_completion_tokens,
+            "entries": entries,
+            "size_bytes": size_bytes
+        }
+
+
+# Create global instances
+extraction_cache = ExtractionCache(
+    cache_dir=settings.EXTRACTION_CACHE_DIR,
+    max_disk_bytes=settings.EXTRACTION_CACHE_MAX_BYTES,
+    max_memory_items=settings.EXTRACTION_CACHE_MEMORY_ITEMS
+)
+
+def get_extraction_cache() -> ExtractionCache:
+    """Get the extraction cache instance"""
+    return extraction_cache
+
+llm_response_cache = LLMResponseCache(
+    db_path=settings.LLM_CACHE_DB_PATH,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    max_bytes=settings.LLM_CACHE_MAX_BYTES
+)
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Get the LLM response cache instance"""
+    return llm_response_cache
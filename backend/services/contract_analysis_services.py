@@ -0,0 +1,356 @@
+"""
+Contract details pipeline: text extraction (cache, hybrid PDF, OCR) + Groq analysis
+"""
+
+import io
+import os
+import time
+from typing import Dict, Any, Optional, Callable, AsyncIterator
+
+from fastapi import UploadFile
+
+from config.settings import settings
+from models.contract import ContractAnalysisResult, ContractDetails, ContractParty
+from services.cache_services import get_extraction_cache, has_page_errors, is_cacheable_text
+from services.extraction_services import HybridExtractionService
+from services.groq_services import get_groq_service
+from services.ocr_services import OCRService
+
+# Progress callback: progress(stage, **details), e.g. progress("ocr", page=3, total_pages=12)
+ProgressCallback = Callable[..., None]
+
+
+def _report(progress: Optional[ProgressCallback], stage: str, **details: Any):
+    """Invoke the progress callback if one was given"""
+    if progress is not None:
+        try:
+            progress(stage, **details)
+        except Exception as e:
+            print(f"Progress callback failed: {e}")
+
+
+class ContractAnalysisService:
+    """Service that runs the full /contract/details pipeline on file content"""
+
+    def __init__(self):
+        self.ocr_service = OCRService()
+        self.hybrid_extractor = HybridExtractionService(ocr_service=self.ocr_service)
+        self.extraction_cache = get_extraction_cache()
+
+    @property
+    def groq_service(self):
+        """Groq service, created lazily in the serving worker"""
+        return get_groq_service()
+
+    async def extract_text(
+        self,
+        content: bytes,
+        filename: str,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract contract text from file content
+
+        Args:
+            content: Uploaded file content
+            filename: Original file name (used to pick the extraction method)
+            progress: Optional progress callback
+
+        Returns:
+            Dictionary with text, method, ocr_file_path, file_hash and pages
+            (per-page report of PDFs: source, char_count, ocr_dpi,
+            ocr_confidence; empty for other files)
+        """
+        _report(progress, "extract")
+
+        file_hash = self.extraction_cache.hash_content(content)
+        cached = await self.extraction_cache.get_async(file_hash) if settings.EXTRACTION_CACHE_ENABLED else None
+
+        if cached:
+            print("Extraction cache hit, skipping PDF parsing and OCR")
+            cached_ocr_path = cached.get("ocr_file_path") or ""
+            return {
+                "text": cached["text"],
+                "method": f"{cached['method']} (cached)",
+                "ocr_file_path": cached_ocr_path if os.path.exists(cached_ocr_path) else "",
+                "file_hash": file_hash,
+                "pages": cached.get("pages") or []
+            }
+
+        extracted_text = ""
+        extraction_method = ""
+        ocr_filepath = ""  # Path to saved OCR result
+        page_report = []
+
+        # Check file type and extract text accordingly
+        file_extension = filename.lower().split('.')[-1] if '.' in filename else ""
+
+        if file_extension == 'pdf':
+            # Use the PDF text layer per page and OCR only the pages without one
+            def ocr_progress(pages_done: int, pages_total: Optional[int], dpi: int):
+                _report(progress, "ocr", page=pages_done, total_pages=pages_total, dpi=dpi)
+
+            hybrid_result = await self.hybrid_extractor.extract_pdf(content, progress_callback=ocr_progress)
+            extracted_text = hybrid_result["text"]
+            extraction_method = hybrid_result["method"]
+            page_report = hybrid_result["pages"]
+
+            if hybrid_result["ocr_pages"] and is_cacheable_text(extracted_text):
+                original_name = filename.rsplit('.', 1)[0]
+                ocr_filepath = self.ocr_service.save_ocr_result(extracted_text, f"{original_name}_ocr.txt")
+                if ocr_filepath:
+                    extraction_method += " + saved to file"
+
+        elif file_extension in ['jpg', 'jpeg', 'png', 'tiff', 'bmp']:
+            # For image files, use OCR directly and save result
+            _report(progress, "ocr", page=0, total_pages=1)
+            image_file = UploadFile(file=io.BytesIO(content), filename=filename)
+            extracted_text, ocr_filepath = await self.ocr_service.extract_and_save_from_image(image_file)
+            extraction_method = "OCR (image) + saved to file"
+            _report(progress, "ocr", page=1, total_pages=1)
+
+        else:
+            # For text files, read directly
+            extracted_text = content.decode('utf-8')
+            extraction_method = "Direct text reading"
+
+        # Failed pages may be transient (OCR errors): retry them on the next upload
+        cacheable = is_cacheable_text(extracted_text) and not has_page_errors(extracted_text)
+        if settings.EXTRACTION_CACHE_ENABLED and cacheable:
+            await self.extraction_cache.put_async(
+                file_hash, extracted_text, extraction_method,
+                ocr_file_path=ocr_filepath, pages=page_report
+            )
+
+        return {
+            "text": extracted_text,
+            "method": extraction_method,
+            "ocr_file_path": ocr_filepath,
+            "file_hash": file_hash,
+            "pages": page_report
+        }
+
+    async def analyze_extracted(
+        self,
+        extraction: Dict[str, Any],
+        start_time: Optional[float] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> ContractAnalysisResult:
+        """
+        Analyze already extracted contract text with Groq
+
+        Args:
+            extraction: Result of extract_text()
+            start_time: Pipeline start time used for processing_time
+            progress: Optional progress callback
+
+        Returns:
+            Contract analysis result
+        """
+        start_time = start_time or time.time()
+        extracted_text = extraction["text"]
+        ocr_filepath = extraction.get("ocr_file_path") or ""
+
+        if not extracted_text or extracted_text.strip() == "":
+            return ContractAnalysisResult(
+                success=False,
+                error_message="Failed to extract text from file",
+                processing_time=time.time() - start_time
+            )
+
+        # Analyze contract details with Groq
+        print("Analyzing contract details with Groq...")
+        _report(progress, "llm")
+        groq_result = await self.groq_service.analyze_contract_details(extracted_text)
+
+        if groq_result.get("error"):
+            return ContractAnalysisResult(
+                success=False,
+                error_message=f"Groq analysis failed: {groq_result['error']}",
+                extracted_text=extracted_text[:1000],
+                processing_time=time.time() - start_time,
+                analysis_method="groq_ai_failed"
+            )
+
+        # Return successful result
+        return ContractAnalysisResult(
+            success=True,
+            contract_details=self.build_contract_details(groq_result),
+            extracted_text=extracted_text[:1000] + "..." if len(extracted_text) > 1000 else extracted_text,
+            ocr_file_path=ocr_filepath if ocr_filepath else None,
+            confidence_score=groq_result.get("confidence_score", 0.9),
+            analysis_method="groq_ai",
+            processing_time=time.time() - start_time
+        )
+
+    async def analyze(
+        self,
+        content: bytes,
+        filename: str,
+        progress: Optional[ProgressCallback] = None
+    ) -> ContractAnalysisResult:
+        """
+        Run the full pipeline (extraction + Groq) on file content
+
+        Args:
+            content: Uploaded file content
+            filename: Original file name
+            progress: Optional progress callback
+
+        Returns:
+            Contract analysis result
+        """
+        start_time = time.time()
+
+        try:
+            extraction = await self.extract_text(content, filename, progress)
+            return await self.analyze_extracted(extraction, start_time, progress)
+        except Exception as e:
+            return ContractAnalysisResult(
+                success=False,
+                error_message=f"Contract details analysis failed: {str(e)}",
+                processing_time=time.time() - start_time,
+                analysis_method="error"
+            )
+
+    async def analyze_full(self, content: bytes, filename: str) -> Dict[str, Any]:
+        """
+        Extraction + contract details, entities and risk assessment
+
+        Returns:
+            GroqService.analyze_contract_full() result with success,
+            extraction_method, pages (see extract_text()) and processing_time
+        """
+        start_time = time.time()
+
+        try:
+            extraction = await self.extract_text(content, filename)
+            if not extraction["text"] or extraction["text"].strip() == "":
+                return {
+                    "success": False,
+                    "error": "Failed to extract text from file",
+                    "processing_time": time.time() - start_time
+                }
+
+            result = await self.groq_service.analyze_contract_full(extraction["text"])
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Contract analysis failed: {str(e)}",
+                "processing_time": time.time() - start_time
+            }
+
+        return {
+            "success": not result.get("error"),
+            **result,
+            "extraction_method": extraction["method"],
+            "pages": extraction["pages"],
+            "processing_time": time.time() - start_time
+        }
+
+    async def analyze_stream(self, content: bytes, filename: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of analyze()
+
+        Yields:
+            {"event": "stage", ...} when extraction and Groq start, a
+            {"event": "field", ...} per contract field as soon as Groq has
+            produced it, then {"event": "result", "result": ContractAnalysisResult,
+            "timing": ...} (or {"event": "error", ...})
+        """
+        start_time = time.time()
+
+        try:
+            yield {"event": "stage", "stage": "extract"}
+            extraction = await self.extract_text(content, filename)
+            extracted_text = extraction["text"]
+            if not extracted_text or extracted_text.strip() == "":
+                yield {"event": "error", "error": "Failed to extract text from file"}
+                return
+
+            yield {
+                "event": "stage",
+                "stage": "llm",
+                "extraction_method": extraction["method"],
+                "pages": extraction["pages"]
+            }
+            async for event in self.groq_service.stream_contract_details(extracted_text):
+                if event["event"] != "complete":
+                    yield event
+                    continue
+
+                groq_result = event["result"]
+                ocr_filepath = extraction.get("ocr_file_path") or ""
+                yield {
+                    "event": "result",
+                    "result": ContractAnalysisResult(
+                        success=True,
+                        contract_details=self.build_contract_details(groq_result),
+                        extracted_text=extracted_text[:1000] + "..." if len(extracted_text) > 1000 else extracted_text,
+                        ocr_file_path=ocr_filepath if ocr_filepath else None,
+                        confidence_score=groq_result.get("confidence_score", 0.9),
+                        analysis_method="groq_ai_stream",
+                        processing_time=time.time() - start_time
+                    ),
+                    "timing": event["timing"]
+                }
+        except Exception as e:
+            yield {"event": "error", "error": f"Contract details analysis failed: {str(e)}"}
+
+    @staticmethod
+    def _build_party(party_data: Any) -> Optional[ContractParty]:
+        """Convert a Groq party value (dict or plain name) into a ContractParty"""
+        if isinstance(party_data, dict):
+            return ContractParty(
+                name=party_data.get("name", ""),
+                type=party_data.get("type"),
+                address=party_data.get("address")
+            )
+        elif isinstance(party_data, str):
+            return ContractParty(name=party_data)
+        return None
+
+    def build_contract_details(self, groq_result: Dict[str, Any]) -> ContractDetails:
+        """Parse Groq result into our models"""
+        contract_details = ContractDetails()
+
+        if "contract_name" in groq_result:
+            contract_details.contract_name = groq_result["contract_name"]
+
+        if "first_party" in groq_result and groq_result["first_party"]:
+            first_party = self._build_party(groq_result["first_party"])
+            if first_party:
+                contract_details.first_party = first_party
+
+        if "second_party" in groq_result and groq_result["second_party"]:
+            second_party = self._build_party(groq_result["second_party"])
+            if second_party:
+                contract_details.second_party = second_party
+
+        if "contract_end_date" in groq_result:
+            contract_details.contract_end_date = groq_result["contract_end_date"]
+
+        if "contract_start_date" in groq_result:
+            contract_details.contract_start_date = groq_result["contract_start_date"]
+
+        if "contract_duration" in groq_result:
+            contract_details.contract_duration = groq_result["contract_duration"]
+
+        if "contract_value" in groq_result:
+            contract_details.contract_value = groq_result["contract_value"]
+
+        if "contract_type" in groq_result:
+            contract_details.contract_type = groq_result["contract_type"]
+
+        if "key_terms" in groq_result:
+            contract_details.key_terms = groq_result["key_terms"]
+
+        return contract_details
+
+
+# Create a global instance
+contract_analysis_service = ContractAnalysisService()
+
+def get_contract_analysis_service() -> ContractAnalysisService:
+    """Get the contract analysis service instance"""
+    return contract_analysis_service
@@ -0,0 +1,138 @@
+"""
+Hybrid PDF text extraction: PyMuPDF text layer per page, OCR only where needed
+"""
+
+import asyncio
+from typing import Dict, Any, List, Optional, Callable
+
+from config.settings import settings
+from services.ocr_services import OCRService
+from utils.pdf_parser import PDFParser
+
+
+class HybridExtractionService:
+    """Service that merges text-layer and OCR output page by page"""
+
+    def __init__(
+        self,
+        pdf_parser: Optional[PDFParser] = None,
+        ocr_service: Optional[OCRService] = None
+    ):
+        self.pdf_parser = pdf_parser or PDFParser()
+        self.ocr_service = ocr_service or OCRService()
+
+    async def extract_pdf(
+        self,
+        content: bytes,
+        dpi: int = 300,
+        language: str = 'eng+ind',
+        progress_callback: Optional[Callable[[int, int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract text from a PDF, OCR'ing only pages that lack a text layer
+
+        Args:
+            content: PDF file content
+            dpi: OCR rendering resolution
+            language: Tesseract language(s)
+            progress_callback: Forwarded to OCRService.ocr_pdf_bytes
+
+        Returns:
+            Dictionary with merged text, extraction method, OCR'd page numbers
+            and a per-page report
+        """
+        layout: Optional[List[Dict[str, Any]]] = None
+
+        if self.pdf_parser.pymupdf_available:
+            try:
+                layout = await asyncio.get_event_loop().run_in_executor(
+                    None,
+                    lambda: self.pdf_parser.analyze_page_layout(
+                        content,
+                        min_chars=settings.HYBRID_MIN_PAGE_CHARS,
+                        image_coverage_threshold=settings.HYBRID_IMAGE_COVERAGE,
+                        min_chars_on_image_page=settings.HYBRID_MIN_CHARS_IMAGE_PAGE
+                    )
+                )
+            except Exception as e:
+                print(f"PDF layout analysis failed: {e}, falling back to full OCR...")
+
+        if layout is None:
+            # No usable text layer information, OCR every page
+            ocr_pages = None
+        else:
+            ocr_pages = [page['page_number'] for page in layout if page['needs_ocr']]
+
+        ocr_results: Dict[int, Dict[str, Any]] = {}
+        if (ocr_pages is None or ocr_pages) and self.ocr_service.ocr_available:
+            if ocr_pages:
+                print(f"OCR needed for pages: {ocr_pages}")
+            page_results = await self.ocr_service.ocr_pdf_bytes(
+                content, dpi, language, pages=ocr_pages,
+                progress_callback=progress_callback
+            )
+            ocr_results = {result['page']: result for result in page_results}
+
+        if layout is None:
+            layout = [
+                {'page_number': page, 'text': '', 'char_count': 0, 'needs_ocr': True}
+                for page in sorted(ocr_results)
+            ]
+
+        # Merge text layer and OCR output in page order
+        text_parts = []
+        page_report = []
+        ocr_page_numbers = []
+
+        for page in layout:
+            page_number = page['page_number']
+            ocr_result = ocr_results.get(page_number)
+            source = "text_layer"
+            page_text = page['text']
+
+            if ocr_result is not None:
+                if ocr_result['error']:
+                    source = "ocr_failed"
+                    if not page_text.strip():
+                        text_parts.append(
+                            f"--- Page {page_number} (Error) ---\nOCR failed: {ocr_result['error']}"
+                        )
+                        page_text = ""
+                elif ocr_result['text'].strip():
+                    source = "ocr"
+                    page_text = ocr_result['text']
+                    ocr_page_numbers.append(page_number)
+
+            if page_text.strip():
+                text_parts.append(f"--- Page {page_number} ---\n{page_text}")
+
+            page_report.append({
+                'page_number': page_number,
+                'source': source,
+                'char_count': len(page_text.strip()),
+                'image_coverage': page.get('image_coverage'),
+                'ocr_dpi': ocr_result['dpi'] if ocr_result else None,
+                'ocr_confidence': ocr_result['confidence'] if ocr_result else None
+            })
+
+        if not ocr_page_numbers:
+            method = "PDF text extraction"
+        elif len(ocr_page_numbers) == len(layout):
+            method = "OCR (PDF to image)"
+        else:
+            method = f"Hybrid (PDF text + OCR on pages {', '.join(map(str, ocr_page_numbers))})"
+
+        if text_parts:
+            text = "\n\n".join(text_parts)
+        elif ocr_results:
+            text = "No text extracted from PDF"
+        else:
+            text = "No text found in PDF"
+
+        return {
+            'text': text,
+            'method': method,
+            'ocr_pages': ocr_page_numbers,
+            'pages': page_report,
+            'total_pages': len(layout)
+        }
@@ -0,0 +1,297 @@
+"""
+Shared rate control for Groq API requests
+"""
+
+import asyncio
+import email.utils
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config.settings import settings
+
+try:
+    from groq import APIConnectionError
+    GROQ_AVAILABLE = True
+except ImportError:
+    GROQ_AVAILABLE = False
+
+# Statuses worth retrying: rate limited, or a transient server error
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Budget of `limit` units per minute, refilled continuously"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.level = float(limit)
+        self.rate = limit / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.limit, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount units are available (0 when unlimited)"""
+        if self.limit <= 0:
+            return 0.0
+        self._refill(now)
+        # A request larger than the whole budget waits for a full bucket
+        amount = min(amount, self.limit)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def charge(self, amount: float) -> float:
+        """Units consume() takes for a request of amount units"""
+        if self.limit <= 0:
+            return 0.0
+        return min(amount, self.limit)
+
+    def consume(self, amount: float) -> float:
+        """Take a request's units from the budget and return how many were charged"""
+        charged = self.charge(amount)
+        self.level -= charged
+        return charged
+
+    def refund(self, amount: float):
+        if self.limit > 0:
+            self.level = min(self.limit, self.level + amount)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the server through retry-after-ms / retry-after headers"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limit, transient server error or connection failure"""
+    if getattr(error, "status_code", None) in RETRYABLE_STATUSES:
+        return True
+    return GROQ_AVAILABLE and isinstance(error, APIConnectionError)
+
+
+class GroqRateController:
+    """
+    Requests-per-minute / tokens-per-minute budgets and a concurrency limit
+    shared by every Groq call in this process
+
+    Callers are admitted in arrival order (asyncio.Lock is FIFO), each one
+    waiting until both budgets cover its request. A 429 pauses admission for
+    everyone until its retry-after has passed; failed requests are retried
+    with jittered exponential backoff.
+
+    The budgets are per process: with several server workers each one gets
+    its share of the API key's limits (see rate_limit_workers()).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 30,
+        tokens_per_minute: int = 6000,
+        max_concurrent: int = 8,
+        max_retries: int = 2,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._admission = asyncio.Lock()
+        self._concurrency = asyncio.Semaphore(self.max_concurrent)
+        self._blocked_until = 0.0
+        # Arrival time of each caller waiting for admission, oldest first
+        self._waiting: Dict[int, float] = {}
+        self._recent_waits: deque = deque(maxlen=200)
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "failed": 0,
+            "max_queue_wait_ms": 0.0,
+        }
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the max_concurrent request slots"""
+        async with self._concurrency:
+            yield
+
+    async def _admit(self, estimated_tokens: int):
+        """Wait (in arrival order) until the RPM and TPM budgets cover this request"""
+        ticket = object()
+        enqueued = time.monotonic()
+        self._waiting[id(ticket)] = enqueued
+        try:
+            async with self._admission:
+                while True:
+                    now = time.monotonic()
+                    wait = max(
+                        self._blocked_until - now,
+                        self.requests.wait_time(1, now),
+                        self.tokens.wait_time(estimated_tokens, now)
+                    )
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+
+                self.requests.consume(1)
+                self.tokens.consume(estimated_tokens)
+        finally:
+            del self._waiting[id(ticket)]
+
+        wait_ms = (time.monotonic() - enqueued) * 1000
+        self._recent_waits.append(wait_ms)
+        self._stats["max_queue_wait_ms"] = max(self._stats["max_queue_wait_ms"], wait_ms)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            # Small jitter so callers released together do not collide again
+            return retry_after + random.uniform(0, self.backoff_base)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def attempt(self, request_fn: Callable[[], Awaitable[Any]], estimated_tokens: int) -> Any:
+        """
+        Run request_fn within the rate budgets, retrying 429/5xx and connection errors
+
+        Every attempt is admitted (and counted) separately. Callers that
+        also need a concurrency slot use call() or slot().
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._admit(estimated_tokens)
+            self._stats["requests"] += 1
+            try:
+                return await request_fn()
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if status == 429:
+                    self._stats["rate_limited"] += 1
+                elif status is not None and status >= 500:
+                    self._stats["server_errors"] += 1
+
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self._stats["failed"] += 1
+                    raise
+
+                delay = self._backoff(attempt, e)
+                if status == 429:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+                self._stats["retries"] += 1
+                print(f"Groq request failed ({status or type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def call(self, request_fn: Callable[[], Awaitable[Any]], estimated_tokens: int) -> Any:
+        """Run request_fn in a concurrency slot and within the rate budgets"""
+        async with self.slot():
+            return await self.attempt(request_fn, estimated_tokens)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """
+        Return over-estimated tokens to the TPM budget once actual usage is known
+
+        Only what admission charged is refunded: a request estimated above the
+        whole budget was charged the budget, not its estimate.
+        """
+        if actual_tokens is not None:
+            self.tokens.refund(max(0, self.tokens.charge(estimated_tokens) - actual_tokens))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue wait and retry metrics (current_queue_wait_ms is the oldest waiting caller)"""
+        now = time.monotonic()
+        recent = sorted(self._recent_waits)
+        return {
+            "requests_per_minute": self.requests.limit,
+            "tokens_per_minute": self.tokens.limit,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": len(self._waiting),
+            "current_queue_wait_ms": round((now - min(self._waiting.values())) * 1000, 1) if self._waiting else 0.0,
+            "rate_limited_for_ms": round(max(0.0, self._blocked_until - now) * 1000, 1),
+            "avg_queue_wait_ms": round(sum(recent) / len(recent), 1) if recent else 0.0,
+            "p95_queue_wait_ms": round(recent[min(len(recent) - 1, int(0.95 * len(recent)))], 1) if recent else 0.0,
+            **self._stats,
+        }
+
+
+def rate_limit_workers() -> int:
+    """Number of server processes sharing the Groq API key's rate limits"""
+    if settings.GROQ_RATE_LIMIT_WORKERS > 0:
+        return settings.GROQ_RATE_LIMIT_WORKERS
+    try:
+        return max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    except ValueError:
+        return 1
+
+
+def _worker_share(limit: int, workers: int) -> int:
+    """This worker's part of a per-minute limit (0 stays unlimited)"""
+    return max(1, limit // workers) if limit > 0 else limit
+
+
+def check_token_budget(tokens_per_minute: int) -> bool:
+    """
+    Whether a full-size request (input budget + max completion) fits this
+    worker's TPM budget; logs a warning when it does not
+
+    A larger request waits for a full budget every time, so each worker
+    manages about one request per minute.
+    """
+    request_tokens = settings.GROQ_INPUT_TOKEN_BUDGET + settings.GROQ_MAX_TOKENS
+    if tokens_per_minute <= 0 or request_tokens <= tokens_per_minute:
+        return True
+    print(
+        f"Warning: a full Groq request (GROQ_INPUT_TOKEN_BUDGET + GROQ_MAX_TOKENS = {request_tokens} tokens) "
+        f"exceeds this worker's share of GROQ_RATE_LIMIT_TPM ({tokens_per_minute} tokens); "
+        "lower the budgets or raise the limit"
+    )
+    return False
+
+
+# Global instance, created on first use so that asyncio primitives belong to
+# the serving worker and not to a gunicorn master with preload_app
+groq_rate_controller = None
+
+def get_groq_rate_controller() -> GroqRateController:
+    """Get the Groq rate controller instance"""
+    global groq_rate_controller
+    if groq_rate_controller is None:
+        workers = rate_limit_workers()
+        tokens_per_minute = _worker_share(settings.GROQ_RATE_LIMIT_TPM, workers)
+        check_token_budget(tokens_per_minute)
+        groq_rate_controller = GroqRateController(
+            requests_per_minute=_worker_share(settings.GROQ_RATE_LIMIT_RPM, workers),
+            tokens_per_minute=tokens_per_minute,
+            max_concurrent=settings.GROQ_MAX_CONCURRENT_REQUESTS,
+            max_retries=settings.GROQ_MAX_RETRIES,
+            backoff_base=settings.GROQ_BACKOFF_BASE,
+            backoff_max=settings.GROQ_BACKOFF_MAX
+        )
+    return groq_rate_controller
@@ -3,11 +3,15 @@ Groq AI service for advanced contract analysis
 """
 
 import asyncio
-from typing import Dict, Any, List, Optional
+from collections import deque
+from typing import Dict, Any, List, Optional, AsyncIterator
 import json
+import re
+import time
 
 try:
-    from groq import Groq
+    from groq import AsyncGroq
+    import httpx
     GROQ_AVAILABLE = True
     print("Groq library loaded successfully")
 except ImportError:
@@ -15,201 +19,19 @@ except ImportError:
     GROQ_AVAILABLE = False
 
 from config.settings import settings
+from services.cache_services import get_llm_response_cache, prompt_fingerprint
+from services.groq_rate_services import get_groq_rate_controller
+from utils.context_packer import ContextPacker, TokenCounter, token_budget, packing_summary
+from utils.field_merger import is_informative, merge_contract_fields
+from utils.indonesian_dates import MONTHS, normalize_date
+from utils.json_stream import IncrementalJSONParser
+from utils.rule_extractor import CONTRACT_FIELDS, RULE_REQUIRED_FIELDS, extract_contract_fields
+from utils.section_scorer import ContractSectionScorer, load_section_weights
 
+# Prompt templates ({text} is the packed contract text)
+CONTRACT_DETAILS_SYSTEM_PROMPT = "Anda adalah AI ahli analisis kontrak Indonesia. TUGAS UTAMA: 1) Ekstrak nama spesifik perusahaan/individu (PT, CV, nama lengkap) BUKAN 'Pihak Pertama/Kedua', 2) WAJIB konversi tanggal teks Indonesia panjang menjadi format 'DD Bulan YYYY'. Contoh: 'Dua Puluh Bulan Februari Tahun Dua Ribu Dua Puluh Lima' HARUS menjadi '20 Februari 2025'. Response JSON valid tanpa teks tambahan."
 
-class GroqService:
-    """Service for using Groq API for contract analysis"""
-    
-    def __init__(self):
-        self.groq_available = GROQ_AVAILABLE
-        if self.groq_available and hasattr(settings, 'GROQ_API_KEY') and settings.GROQ_API_KEY:
-            self.client = Groq(api_key=settings.GROQ_API_KEY)
-            self.model = getattr(settings, 'GROQ_MODEL', 'llama-3.1-8b-instant')
-            self.max_tokens = getattr(settings, 'GROQ_MAX_TOKENS', 2000)
-            self.temperature = getattr(settings, 'GROQ_TEMPERATURE', 0.1)
-            print(f"Groq service initialized with model: {self.model}")
-        else:
-            print("Groq service not available - API key missing or library not installed")
-            self.groq_available = False
-    
-    async def analyze_contract_details(self, text: str) -> Dict[str, Any]:
-        """
-        Extract specific contract details using Groq AI:
-        - Contract name
-        - First party (pihak pertama)  
-        - Second party (pihak kedua)
-        - Contract end date (tanggal berakhir)
-        
-        For long texts (>10000 chars), uses smart chunking to find relevant sections.
-        
-        Args:
-            text: Contract text to analyze
-            
-        Returns:
-            Analysis result dictionary with contract details
-        """
-        if not self.groq_available:
-            return {
-                "error": "Groq service not available",
-                "fallback": True
-            }
-            
-        # Handle long texts with smart preprocessing
-        if len(text) > 15000:
-            print(f"Very long text detected: {len(text)} characters. Using smart chunking...")
-            text = self._extract_relevant_contract_sections(text, max_chars=12000)
-            print(f"Relevant sections extracted: {len(text)} characters")
-        elif len(text) > 8000:
-            # For medium-long texts, keep more content but focus on key sections
-            text = self._extract_relevant_contract_sections(text, max_chars=8000)
-            print(f"Medium text processed: {len(text)} characters")
-        
-        # Continue with analysis
-        return await self._continue_analysis(text)
-    
-    def _extract_relevant_contract_sections(self, text: str, max_chars: int = 6000) -> str:
-        """
-        Extract the most relevant sections for contract analysis from long text.
-        Enhanced version that preserves critical contract information.
-        """
-        # Keywords that indicate important contract sections (in Indonesian)
-        critical_keywords = [
-            # Core contract terms
-            'kontrak', 'perjanjian', 'agreement', 'surat',
-            
-            # Parties (high priority)
-            'pihak pertama', 'pihak kedua', 'pihak ketiga', 'pihak kesatu',
-            'yang selanjutnya disebut', 'yang dalam', 'berkedudukan',
-            'alamat', 'direktur', 'manager', 'wakil', 'bertindak',
-            
-            # Company identifiers
-            'pt ', 'cv ', 'ud ', 'firma', 'persero', 'tbk', 'ltd',
-            
-            # Personal info
-            'nama', 'nik', 'nomor induk', 'identitas', 'ktp',
-            
-            # Financial terms (very high priority)
-            'nilai', 'harga', 'biaya', 'rupiah', 'rp', 'usd', '$',
-            'pembayaran', 'tagihan', 'invoice', 'pelunasan',
-            
-            # Time terms (very high priority)
-            'tanggal', 'waktu', 'periode', 'jangka', 'masa',
-            'berlaku', 'berakhir', 'expired', 'mulai', 'sampai',
-            
-            # Legal structure
-            'pasal', 'ayat', 'point', 'butir', 'bab',
-            'kewajiban', 'hak', 'tanggung jawab'
-        ]
-        
-        # Split into lines for more granular control
-        lines = text.split('\n')
-        scored_lines = []
-        
-        for i, line in enumerate(lines):
-            line_stripped = line.strip()
-            if not line_stripped or len(line_stripped) < 5:
-                continue
-                
-            line_lower = line_stripped.lower()
-            score = 0
-            
-            # Score based on critical keywords
-            for keyword in critical_keywords:
-                if keyword in line_lower:
-                    if keyword in ['pihak pertama', 'pihak kedua', 'nama', 'nilai', 'tanggal', 'berakhir']:
-                        score += 25  # Super high priority for key contract info
-                    elif keyword in ['alamat', 'direktur', 'harga', 'berlaku', 'rupiah', 'rp']:
-                        score += 15  # High priority
-                    else:
-                        score += 8   # Medium priority
-            
-            # Extra scoring for specific patterns
-            
-            # Lines with monetary values
-            import re
-            money_patterns = [
-                r'rp\.?\s*\d+', r'rupiah\s*\d+', r'\$\s*\d+', 
-                r'\d+\s*rupiah', r'\d+\s*juta', r'\d+\s*milyar'
-            ]
-            for pattern in money_patterns:
-                if re.search(pattern, line_lower):
-                    score += 20
-            
-            # Lines with dates
-            date_patterns = [
-                r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}',  # DD-MM-YYYY
-                r'\d{1,2}\s+(januari|februari|maret|april|mei|juni|juli|agustus|september|oktober|november|desember)\s+\d{2,4}',
-                r'\d{4}[-/]\d{1,2}[-/]\d{1,2}'  # YYYY-MM-DD
-            ]
-            for pattern in date_patterns:
-                if re.search(pattern, line_lower):
-                    score += 20
-            
-            # Lines with proper names (capitalize first letter)
-            words = line_stripped.split()
-            capitalized_words = [w for w in words if len(w) > 2 and w[0].isupper()]
-            if len(capitalized_words) >= 2:
-                score += 10
-            
-            # Lines with addresses
-            address_indicators = ['jalan', 'jl.', 'no.', 'nomor', 'kota', 'jakarta', 'surabaya', 'bandung', 'medan', 'semarang']
-            if any(indicator in line_lower for indicator in address_indicators):
-                score += 12
-            
-            # Boost early lines (headers, important info usually at top)
-            if i < 50:
-                score += 5
-            elif i < 100:
-                score += 2
-            
-            # Penalize very long lines (might be noise or OCR artifacts)
-            if len(line) > 300:
-                score -= 5
-            
-            scored_lines.append((score, i, line))
-        
-        # Sort by score descending
-        scored_lines.sort(key=lambda x: x[0], reverse=True)
-        
-        # Select lines until we reach character limit
-        selected_lines = []
-        total_chars = 0
-        
-        for score, line_idx, line in scored_lines:
-            if score > 0 and total_chars + len(line) < max_chars:
-                selected_lines.append((line_idx, line))
-                total_chars += len(line) + 1  # +1 for newline
-                
-            # Stop if we have enough high-scoring content
-            if total_chars > max_chars * 0.9:
-                break
-        
-        # Sort selected lines back to original order
-        selected_lines.sort(key=lambda x: x[0])
-        
-        # Reconstruct text
-        result_lines = []
-        last_idx = -1
-        
-        for line_idx, line in selected_lines:
-            # Add gap indicator if we skipped many lines
-            if line_idx > last_idx + 5:
-                result_lines.append("[...]")
-            result_lines.append(line)
-            last_idx = line_idx
-        
-        result_text = '\n'.join(result_lines)
-        
-        # Add summary note
-        if len(result_text) < len(text) * 0.4:
-            result_text = f"[Dokumen dipotong untuk fokus pada informasi kontrak penting]\n\n{result_text}"
-        
-        return result_text
-        
-    async def _continue_analysis(self, text: str) -> Dict[str, Any]:
-        """Continue with the actual Groq analysis"""
-        try:
-            prompt = f"""
+CONTRACT_DETAILS_PROMPT = """
 TUGAS: Ekstrak informasi spesifik dari dokumen kontrak Indonesia ini.
 
 ATURAN KONVERSI TANGGAL WAJIB:
@@ -255,31 +77,629 @@ DOKUMEN KONTRAK:
 {text}
 
 OUTPUT HANYA JSON VALID:"""
+
+# Reduced prompt asking only for the fields the rule-based extractor could not resolve
+CONTRACT_FIELD_SCHEMAS = {
+    "contract_name": '"nama/judul kontrak yang spesifik"',
+    "first_party": '{{"name": "NAMA SPESIFIK (PT ABC, CV XYZ, atau Tuan John Doe)", "type": "perusahaan/individu", "address": "alamat lengkap jika disebutkan"}}',
+    "second_party": '{{"name": "NAMA SPESIFIK (bukan Pihak Kedua)", "type": "perusahaan/individu", "address": "alamat lengkap jika disebutkan"}}',
+    "contract_end_date": '"DD Bulan YYYY (WAJIB konversi dari teks panjang)"',
+    "contract_start_date": '"DD Bulan YYYY (WAJIB konversi dari teks panjang)"',
+    "contract_duration": '"durasi yang disebutkan"',
+    "contract_value": '"nilai dalam rupiah jika ada"',
+    "contract_type": '"jenis kontrak spesifik"',
+    "key_terms": '["poin-poin penting faktual"]'
+}
+
+CONTRACT_FIELDS_PROMPT_HEADER = """
+TUGAS: Ekstrak HANYA field berikut dari dokumen kontrak Indonesia ini.
+
+ATURAN:
+- NAMA SPESIFIK pihak-pihak (PT, CV, nama lengkap individu) - BUKAN "Pihak Pertama/Kedua"
+- KONVERSI tanggal teks Indonesia ke format DD Bulan YYYY, contoh: "Dua Puluh Bulan Februari Tahun Dua Ribu Dua Puluh Lima" → "20 Februari 2025"
+- NILAI KONTRAK dalam Rupiah jika disebutkan
+- Isi null jika informasi tidak ada di dokumen
+
+Format output JSON:
+"""
+
+
+def contract_fields_prompt(fields: List[str]) -> str:
+    """Contract details prompt template ({text}) asking only for fields"""
+    schema = ",\n".join(f'    "{field}": {CONTRACT_FIELD_SCHEMAS[field]}' for field in fields)
+    return CONTRACT_FIELDS_PROMPT_HEADER + "{{\n" + schema + "\n}}\n\nDOKUMEN KONTRAK:\n{text}\n\nOUTPUT HANYA JSON VALID:"
+
+
+ENTITY_MAX_TOKENS = 800
+
+ENTITY_SYSTEM_PROMPT = "Anda adalah sistem ekstraksi entitas yang akurat untuk dokumen kontrak Indonesia."
+
+ENTITY_PROMPT = """
+            Ekstrak entitas penting dari teks kontrak berikut dan berikan dalam format JSON:
             
-            # Make API call
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
+            {{
+                "parties": [
+                    {{
+                        "name": "nama lengkap pihak",
+                        "type": "individual/company/organization",
+                        "role": "peran dalam kontrak"
+                    }}
+                ],
+                "dates": [
+                    {{
+                        "type": "jenis tanggal",
+                        "date": "tanggal (YYYY-MM-DD)",
+                        "description": "deskripsi"
+                    }}
+                ],
+                "financial": [
+                    {{
+                        "type": "jenis keuangan",
+                        "amount": "jumlah",
+                        "currency": "mata uang",
+                        "description": "deskripsi"
+                    }}
+                ],
+                "locations": ["lokasi yang disebutkan"],
+                "obligations": [
+                    {{
+                        "party": "pihak yang berkewajiban",
+                        "obligation": "kewajiban",
+                        "deadline": "tenggat waktu jika ada"
+                    }}
+                ]
+            }}
+            
+            Teks kontrak:
+            {text}
+            """
+
+RISK_MAX_TOKENS = 1000
+
+RISK_SYSTEM_PROMPT = "Anda adalah ahli manajemen risiko kontrak dengan keahlian dalam hukum Indonesia."
+
+RISK_PROMPT = """
+            Lakukan penilaian risiko terhadap teks kontrak berikut dan berikan hasil dalam format JSON:
+            
+            {{
+                "overall_risk": "low/medium/high",
+                "risk_score": "1-10",
+                "risks": [
+                    {{
+                        "category": "kategori risiko",
+                        "risk": "deskripsi risiko",
+                        "probability": "kemungkinan (low/medium/high)",
+                        "impact": "dampak (low/medium/high)",
+                        "mitigation": "strategi mitigasi"
+                    }}
+                ],
+                "red_flags": ["bendera merah yang ditemukan"],
+                "recommendations": ["rekomendasi untuk mengurangi risiko"],
+                "legal_compliance": {{
+                    "compliant": true/false,
+                    "issues": ["masalah kepatuhan jika ada"]
+                }}
+            }}
+            
+            Fokus pada risiko keuangan, hukum, operasional, dan kepatuhan terhadap regulasi Indonesia.
+            
+            Teks kontrak:
+            {text}
+            """
+
+
+# Contract details, entities and risk assessment in one response
+COMBINED_SYSTEM_PROMPT = "Anda adalah AI ahli analisis kontrak dan manajemen risiko kontrak Indonesia. Ekstrak nama spesifik perusahaan/individu (PT, CV, nama lengkap) BUKAN 'Pihak Pertama/Kedua', konversi tanggal teks Indonesia panjang menjadi format 'DD Bulan YYYY', dan nilai risiko berdasarkan hukum Indonesia. Response JSON valid tanpa teks tambahan."
+
+COMBINED_PROMPT = """
+TUGAS: Analisis lengkap dokumen kontrak Indonesia ini dalam SATU objek JSON dengan tiga bagian.
+
+ATURAN:
+- NAMA SPESIFIK pihak-pihak (PT, CV, nama lengkap individu) - BUKAN "Pihak Pertama/Kedua"
+- KONVERSI tanggal teks Indonesia ke format DD Bulan YYYY, contoh: "Dua Puluh Bulan Februari Tahun Dua Ribu Dua Puluh Lima" → "20 Februari 2025"
+- NILAI KONTRAK dalam Rupiah jika disebutkan
+- Fokus risiko pada keuangan, hukum, operasional, dan kepatuhan terhadap regulasi Indonesia
+
+Format output JSON:
+{{
+    "contract_details": {{
+        "contract_name": "nama/judul kontrak yang spesifik",
+        "first_party": {{"name": "NAMA SPESIFIK", "type": "perusahaan/individu", "address": "alamat lengkap jika disebutkan"}},
+        "second_party": {{"name": "NAMA SPESIFIK", "type": "perusahaan/individu", "address": "alamat lengkap jika disebutkan"}},
+        "contract_end_date": "DD Bulan YYYY",
+        "contract_start_date": "DD Bulan YYYY",
+        "contract_duration": "durasi yang disebutkan",
+        "contract_value": "nilai dalam rupiah jika ada",
+        "contract_type": "jenis kontrak spesifik",
+        "key_terms": ["poin-poin penting faktual"]
+    }},
+    "entities": {{
+        "parties": [{{"name": "nama lengkap pihak", "type": "individual/company/organization", "role": "peran dalam kontrak"}}],
+        "dates": [{{"type": "jenis tanggal", "date": "tanggal (YYYY-MM-DD)", "description": "deskripsi"}}],
+        "financial": [{{"type": "jenis keuangan", "amount": "jumlah", "currency": "mata uang", "description": "deskripsi"}}],
+        "locations": ["lokasi yang disebutkan"],
+        "obligations": [{{"party": "pihak yang berkewajiban", "obligation": "kewajiban", "deadline": "tenggat waktu jika ada"}}]
+    }},
+    "risk_assessment": {{
+        "overall_risk": "low/medium/high",
+        "risk_score": "1-10",
+        "risks": [{{"category": "kategori risiko", "risk": "deskripsi risiko", "probability": "low/medium/high", "impact": "low/medium/high", "mitigation": "strategi mitigasi"}}],
+        "red_flags": ["bendera merah yang ditemukan"],
+        "recommendations": ["rekomendasi untuk mengurangi risiko"],
+        "legal_compliance": {{"compliant": true/false, "issues": ["masalah kepatuhan jika ada"]}}
+    }}
+}}
+
+DOKUMEN KONTRAK:
+{text}
+
+OUTPUT HANYA JSON VALID:"""
+
+COMBINED_SECTIONS = ("contract_details", "entities", "risk_assessment")
+
+
+# Template versions for the LLM response cache key; editing a prompt
+# invalidates its cached responses
+CONTRACT_DETAILS_TEMPLATE_VERSION = prompt_fingerprint(CONTRACT_DETAILS_SYSTEM_PROMPT, CONTRACT_DETAILS_PROMPT)
+ENTITY_TEMPLATE_VERSION = prompt_fingerprint(ENTITY_SYSTEM_PROMPT, ENTITY_PROMPT)
+RISK_TEMPLATE_VERSION = prompt_fingerprint(RISK_SYSTEM_PROMPT, RISK_PROMPT)
+COMBINED_TEMPLATE_VERSION = prompt_fingerprint(COMBINED_SYSTEM_PROMPT, COMBINED_PROMPT)
+
+
+# Dates already in the "DD Bulan YYYY" output format are kept as they are
+FORMATTED_DATE_PATTERN = re.compile(r'\d{1,2} (?:' + '|'.join(MONTHS) + r') \d{4}')
+
+
+def validate_combined_section(section: str, value: Any) -> bool:
+    """Whether one section of a combined response is usable"""
+    if not isinstance(value, dict):
+        return False
+    if section == "contract_details":
+        return any(
+            is_informative(value.get(field))
+            for field in ("contract_name", "first_party", "second_party", "contract_end_date")
+        )
+    if section == "entities":
+        return isinstance(value.get("parties"), list)
+    if section == "risk_assessment":
+        return str(value.get("overall_risk", "")).strip().lower() in ("low", "medium", "high")
+    return False
+
+
+def strip_json_fence(content: str) -> str:
+    """Remove a ```json markdown code block around a model response"""
+    if "```json" in content:
+        json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
+        if json_match:
+            return json_match.group(1).strip()
+    return content
+
+
+class GroqService:
+    """Service for using Groq API for contract analysis"""
+    
+    def __init__(self):
+        self.groq_available = GROQ_AVAILABLE
+        self.section_scorer = ContractSectionScorer(load_section_weights(settings.SECTION_SCORER_WEIGHTS_PATH))
+        self.token_counter = TokenCounter(settings.GROQ_TOKENIZER)
+        self.context_packer = ContextPacker(self.token_counter, self.section_scorer)
+        self.client = None
+        self.http_client = None
+        self.response_cache = get_llm_response_cache() if settings.LLM_CACHE_ENABLED else None
+        self.rate_controller = get_groq_rate_controller()
+        # Recent streamed analyses: (time to first field, total) in ms
+        self.stream_timings: deque = deque(maxlen=200)
+        if self.groq_available and hasattr(settings, 'GROQ_API_KEY') and settings.GROQ_API_KEY:
+            # One pooled HTTP client shared by all Groq calls in this process
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.GROQ_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(
+                    settings.GROQ_READ_TIMEOUT,
+                    connect=settings.GROQ_CONNECT_TIMEOUT,
+                    pool=settings.GROQ_POOL_TIMEOUT
+                )
+            )
+            # Retries are done by the rate controller, which honors retry-after
+            # and pauses all callers on a 429
+            self.client = AsyncGroq(
+                api_key=settings.GROQ_API_KEY,
+                http_client=self.http_client,
+                max_retries=0
+            )
+            self.model = getattr(settings, 'GROQ_MODEL', 'llama-3.1-8b-instant')
+            self.max_tokens = getattr(settings, 'GROQ_MAX_TOKENS', 2000)
+            self.temperature = getattr(settings, 'GROQ_TEMPERATURE', 0.1)
+            print(f"Groq service initialized with model: {self.model}")
+        else:
+            print("Groq service not available - API key missing or library not installed")
+            self.groq_available = False
+    
+    async def _chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        template_version: Optional[str] = None,
+        cache_input: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Send one chat completion request through the shared async client
+        
+        Awaiting the pooled HTTP request keeps slow LLM calls off the default
+        thread pool used by OCR and model inference. Requests go through the
+        shared rate controller (RPM/TPM budgets, concurrency limit, retries
+        of 429/5xx). When template_version and
+        cache_input (the document text filled into the template) are given,
+        the response cache is checked first and a hit skips the request;
+        only responses that parse as JSON are stored.
+        
+        Returns:
+            Dictionary with content, token usage and whether it was cached
+        """
+        cache_key = self._cache_key(template_version, cache_input, max_tokens, temperature)
+        if cache_key is not None:
+            cached = await self._cache_call(self.response_cache.get, cache_key)
+            if cached is not None:
+                return {"content": cached["content"], "usage": cached["usage"], "cached": True}
+        
+        estimated_tokens = self._estimate_tokens(messages, max_tokens)
+        start = time.perf_counter()
+        response = await self.rate_controller.call(
+            lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            ),
+            estimated_tokens
+        )
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        content = response.choices[0].message.content
+        usage = self._token_usage(response)
+        self.rate_controller.record_usage(estimated_tokens, self._total_tokens(usage))
+        await self._store_response(cache_key, template_version, content, usage, latency_ms)
+        
+        return {"content": content, "usage": usage, "cached": False}
+    
+    async def _stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        template_version: Optional[str] = None,
+        cache_input: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream one chat completion as content deltas
+        
+        Uses the response cache like _chat_completion; a cached response is
+        yielded as a single delta. The token usage reported at the end of the
+        stream is written into the usage dict, if given.
+        """
+        usage = usage if usage is not None else {}
+        cache_key = self._cache_key(template_version, cache_input, max_tokens, temperature)
+        if cache_key is not None:
+            cached = await self._cache_call(self.response_cache.get, cache_key)
+            if cached is not None:
+                usage.update(cached["usage"], cached=True)
+                yield cached["content"]
+                return
+        
+        estimated_tokens = self._estimate_tokens(messages, max_tokens)
+        start = time.perf_counter()
+        parts = []
+        # The concurrency slot is held until the stream is consumed
+        async with self.rate_controller.slot():
+            stream = await self.rate_controller.attempt(
                 lambda: self.client.chat.completions.create(
                     model=self.model,
-                    messages=[
-                        {"role": "system", "content": "Anda adalah AI ahli analisis kontrak Indonesia. TUGAS UTAMA: 1) Ekstrak nama spesifik perusahaan/individu (PT, CV, nama lengkap) BUKAN 'Pihak Pertama/Kedua', 2) WAJIB konversi tanggal teks Indonesia panjang menjadi format 'DD Bulan YYYY'. Contoh: 'Dua Puluh Bulan Februari Tahun Dua Ribu Dua Puluh Lima' HARUS menjadi '20 Februari 2025'. Response JSON valid tanpa teks tambahan."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=self.max_tokens,
-                    temperature=self.temperature
-                )
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True
+                ),
+                estimated_tokens
             )
             
-            # Extract and parse response
-            content = response.choices[0].message.content
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    parts.append(delta)
+                    yield delta
+                # Groq reports usage on the last chunk under x_groq
+                chunk_usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if chunk_usage is not None:
+                    usage.update(self._token_usage(chunk.x_groq))
+        
+        usage["cached"] = False
+        self.rate_controller.record_usage(estimated_tokens, self._total_tokens(usage))
+        latency_ms = (time.perf_counter() - start) * 1000
+        await self._store_response(
+            cache_key, template_version, "".join(parts),
+            {key: value for key, value in usage.items() if key != "cached"}, latency_ms
+        )
+    
+    def _estimate_tokens(self, messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """Upper bound of the tokens a request uses, for the TPM budget"""
+        return sum(self.token_counter.count_batch([message["content"] for message in messages])) + max_tokens
+    
+    @staticmethod
+    def _total_tokens(usage: Dict[str, Any]) -> Optional[int]:
+        if usage.get("prompt_tokens") is None:
+            return None
+        return usage["prompt_tokens"] + (usage.get("completion_tokens") or 0)
+    
+    def _cache_key(
+        self,
+        template_version: Optional[str],
+        cache_input: Optional[str],
+        max_tokens: int,
+        temperature: float
+    ) -> Optional[str]:
+        """Response cache key, or None when the request is not cacheable"""
+        if self.response_cache is None or not template_version or cache_input is None:
+            return None
+        return self.response_cache.make_key(self.model, template_version, cache_input, max_tokens, temperature)
+    
+    @staticmethod
+    async def _cache_call(fn, *args):
+        """Run a (blocking SQLite) response cache call in the default executor"""
+        return await asyncio.get_event_loop().run_in_executor(None, fn, *args)
+    
+    async def _store_response(
+        self,
+        cache_key: Optional[str],
+        template_version: Optional[str],
+        content: Optional[str],
+        usage: Dict[str, Any],
+        latency_ms: float
+    ):
+        """Cache a response if it is cacheable and parses as JSON"""
+        if cache_key is None or not content:
+            return
+        try:
+            json.loads(strip_json_fence(content))
+        except json.JSONDecodeError:
+            return
+        await self._cache_call(
+            self.response_cache.put, cache_key, self.model, template_version, content, usage, latency_ms
+        )
+    
+    async def aclose(self):
+        """Close the pooled HTTP connections (application shutdown)"""
+        if self.client is not None:
+            await self.client.close()
+        if self.http_client is not None and not self.http_client.is_closed:
+            await self.http_client.aclose()
+    
+    async def analyze_contract_details(self, text: str) -> Dict[str, Any]:
+        """
+        Extract specific contract details using Groq AI:
+        - Contract name
+        - First party (pihak pertama)  
+        - Second party (pihak kedua)
+        - Contract end date (tanggal berakhir)
+        
+        Long texts are packed into the Groq token budget, keeping the
+        highest-scoring sections; the result reports the tokens sent under
+        "context". Texts that do not fit the budget are analyzed chunk by
+        chunk instead when settings.GROQ_MAP_REDUCE_ENABLED is set.
+        
+        With settings.RULE_EXTRACTOR_ENABLED, fields the rule-based extractor
+        resolves confidently are not asked from Groq (a reduced prompt asks
+        for the rest, and Groq is skipped when all of RULE_REQUIRED_FIELDS
+        are resolved; contract_type and key_terms then come from the title
+        and the article headings);
+        "field_sources" tells where each field came from.
+        
+        Args:
+            text: Contract text to analyze
+            
+        Returns:
+            Analysis result dictionary with contract details
+        """
+        if not self.groq_available:
+            return {
+                "error": "Groq service not available",
+                "fallback": True
+            }
+        
+        rule_fields: Dict[str, Dict[str, Any]] = {}
+        fields = None
+        if settings.RULE_EXTRACTOR_ENABLED:
+            rule_fields = extract_contract_fields(text)
+            unresolved = [
+                field for field in CONTRACT_FIELDS
+                if rule_fields.get(field, {}).get("confidence", 0) < settings.RULE_EXTRACTOR_MIN_CONFIDENCE
+            ]
+            if not any(field in RULE_REQUIRED_FIELDS for field in unresolved):
+                return self._apply_rule_fields({"groq_analysis": False, "confidence_score": 0.9}, rule_fields)
+            if len(unresolved) < len(CONTRACT_FIELDS):
+                fields = unresolved
+        
+        max_tokens = self._fields_max_tokens(fields)
+        prompt_template = CONTRACT_DETAILS_PROMPT if fields is None else contract_fields_prompt(fields)
+        packed = self.pack_context(text, max_tokens, CONTRACT_DETAILS_SYSTEM_PROMPT, prompt_template)
+        
+        result = None
+        if packed["truncated"] and settings.GROQ_MAP_REDUCE_ENABLED:
+            result = await self._map_reduce_analysis(text, packed, fields)
+        
+        if result is None:
+            # Continue with analysis
+            result = await self._continue_analysis(packed["text"], fields)
+            result["context"] = self._context_report(packed)
+        
+        if rule_fields:
+            result = self._apply_rule_fields(result, rule_fields)
+        return result
+    
+    def _fields_max_tokens(self, fields: Optional[List[str]]) -> int:
+        """Completion budget for a (reduced) contract details prompt"""
+        if fields is None:
+            return self.max_tokens
+        return max(256, self.max_tokens * len(fields) // len(CONTRACT_FIELDS))
+    
+    def _apply_rule_fields(self, result: Dict[str, Any], rule_fields: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Combine Groq fields with rule-based fields
+        
+        Confident rule values are used as they are; less confident ones only
+        fill fields Groq left empty. If Groq failed but rules resolved fields,
+        the rule values are returned with the Groq error under "groq_error".
+        """
+        threshold = settings.RULE_EXTRACTOR_MIN_CONFIDENCE
+        if result.get("error"):
+            if not any(entry["confidence"] >= threshold for entry in rule_fields.values()):
+                return result
+            result = {
+                "groq_analysis": False,
+                "groq_error": result["error"],
+                "confidence_score": 0.6,
+                "context": result.get("context")
+            }
+        
+        sources = {}
+        for field in CONTRACT_FIELDS:
+            entry = rule_fields.get(field)
+            if entry and entry["confidence"] >= threshold:
+                result[field] = entry["value"]
+                sources[field] = "rules"
+            elif is_informative(result.get(field)):
+                sources[field] = "groq"
+            elif entry:
+                result[field] = entry["value"]
+                sources[field] = "rules_fallback"
+        
+        result = self._convert_indonesian_dates(result)
+        result["field_sources"] = sources
+        result["rule_confidence"] = {field: entry["confidence"] for field, entry in rule_fields.items()}
+        return result
+    
+    async def _map_reduce_analysis(
+        self,
+        text: str,
+        packed: Dict[str, Any],
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Analyze a long contract as pasal-aligned chunks and merge the results
+        
+        Chunks are sent concurrently (at most settings.GROQ_MAP_REDUCE_CONCURRENCY
+        at a time), so latency stays close to one Groq call. Fields are merged
+        with merge_contract_fields and dates converted afterwards.
+        
+        Returns:
+            Merged analysis result, or None if the text fits in one chunk
+        """
+        chunks = self.context_packer.chunk(text, packed["budget_tokens"], settings.GROQ_MAP_REDUCE_MAX_CHUNKS)
+        if len(chunks) <= 1:
+            return None
+        
+        print(f"Map-reduce analysis: {len(chunks)} chunks, {sum(c['tokens'] for c in chunks)} tokens")
+        semaphore = asyncio.Semaphore(max(1, settings.GROQ_MAP_REDUCE_CONCURRENCY))
+        
+        async def analyze_chunk(chunk: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._continue_analysis(chunk["text"], fields)
+        
+        chunk_results = await asyncio.gather(*(analyze_chunk(chunk) for chunk in chunks))
+        succeeded = [result for result in chunk_results if not result.get("error")]
+        if not succeeded:
+            result = chunk_results[0]
+            result["context"] = self._context_report(packed)
+            return result
+        
+        meta_keys = ("groq_analysis", "confidence_score", "token_usage", "cached")
+        merged, conflicts = merge_contract_fields([
+            {key: value for key, value in result.items() if key not in meta_keys} for result in succeeded
+        ])
+        
+        result = self._convert_indonesian_dates(merged)
+        result["groq_analysis"] = True
+        result["confidence_score"] = 0.9 if len(succeeded) == len(chunks) else 0.7
+        result["token_usage"] = {
+            key: sum((r.get("token_usage") or {}).get(key) or 0 for r in chunk_results)
+            for key in ("prompt_tokens", "completion_tokens")
+        }
+        result["cached"] = all(r.get("cached") for r in succeeded)
+        result["map_reduce"] = {
+            "chunks": len(chunks),
+            "failed_chunks": len(chunks) - len(succeeded),
+            "conflicts": conflicts
+        }
+        result["context"] = {
+            **self._context_report(packed),
+            "tokens": sum(chunk["tokens"] for chunk in chunks),
+            "chunk_tokens": [chunk["tokens"] for chunk in chunks]
+        }
+        return result
+    
+    def pack_context(self, text: str, max_tokens: int, system_prompt: str, prompt_template: str) -> Dict[str, Any]:
+        """
+        Fit contract text into the token budget of one Groq request
+        
+        The system prompt, the prompt template and max_tokens are reserved
+        from settings.GROQ_CONTEXT_WINDOW; the rest (capped at
+        settings.GROQ_INPUT_TOKEN_BUDGET) is filled with the most relevant lines.
+        
+        Returns:
+            ContextPacker.pack() result
+        """
+        budget = token_budget(
+            self.token_counter,
+            settings.GROQ_CONTEXT_WINDOW,
+            settings.GROQ_INPUT_TOKEN_BUDGET,
+            max_tokens,
+            system_prompt,
+            prompt_template.format(text="")
+        )
+        packed = self.context_packer.pack(text, budget)
+        print(packing_summary(packed))
+        return packed
+    
+    @staticmethod
+    def _context_report(packed: Dict[str, Any]) -> Dict[str, Any]:
+        """Packing details returned to callers (without the text itself)"""
+        return {key: value for key, value in packed.items() if key != "text"}
+    
+    async def _continue_analysis(self, text: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Continue with the actual Groq analysis
+        
+        Args:
+            text: Packed contract text
+            fields: Only ask for these fields (reduced prompt); None for all
+        """
+        try:
+            if fields is None:
+                prompt_template = CONTRACT_DETAILS_PROMPT
+                template_version = CONTRACT_DETAILS_TEMPLATE_VERSION
+            else:
+                prompt_template = contract_fields_prompt(fields)
+                template_version = prompt_fingerprint(CONTRACT_DETAILS_SYSTEM_PROMPT, prompt_template)
+            prompt = prompt_template.format(text=text)
+            
+            # Make API call (or reuse a cached response)
+            completion = await self._chat_completion(
+                [
+                    {"role": "system", "content": CONTRACT_DETAILS_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=self._fields_max_tokens(fields),
+                temperature=self.temperature,
+                template_version=template_version,
+                cache_input=text
+            )
             
             # Clean up the response - remove markdown code blocks if present
-            if "```json" in content:
-                # Extract JSON from markdown code blocks
-                import re
-                json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-                if json_match:
-                    content = json_match.group(1).strip()
+            content = strip_json_fence(completion["content"])
             
             # Try to parse as JSON
             try:
@@ -290,6 +710,8 @@ OUTPUT HANYA JSON VALID:"""
                 
                 result["groq_analysis"] = True
                 result["confidence_score"] = 0.9  # High confidence for Groq analysis
+                result["token_usage"] = completion["usage"]
+                result["cached"] = completion["cached"]
                 return result
             except json.JSONDecodeError:
                 # If not valid JSON, return as text analysis with parsing attempt
@@ -297,7 +719,8 @@ OUTPUT HANYA JSON VALID:"""
                     "groq_analysis": True,
                     "raw_analysis": content,
                     "error": "Failed to parse JSON response",
-                    "confidence_score": 0.5
+                    "confidence_score": 0.5,
+                    "token_usage": completion["usage"]
                 }
                 
         except Exception as e:
@@ -307,91 +730,203 @@ OUTPUT HANYA JSON VALID:"""
                 "confidence_score": 0.0
             }
     
+    async def stream_contract_details(self, text: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of analyze_contract_details
+        
+        Parses the completion incrementally and yields each top-level field
+        as soon as its value is complete, so the first fields reach the
+        client while the rest is still being generated.
+        
+        Yields:
+            {"event": "field", "field": name, "value": value} per field, then
+            one {"event": "complete", "result": ..., "timing": ...} (or
+            {"event": "error", "error": ...})
+        """
+        if not self.groq_available:
+            yield {"event": "error", "error": "Groq service not available", "fallback": True}
+            return
+        
+        start = time.perf_counter()
+        first_field_ms = None
+        packed = self.pack_context(text, self.max_tokens, CONTRACT_DETAILS_SYSTEM_PROMPT, CONTRACT_DETAILS_PROMPT)
+        parser = IncrementalJSONParser()
+        usage: Dict[str, Any] = {}
+        
+        try:
+            deltas = self._stream_chat_completion(
+                [
+                    {"role": "system", "content": CONTRACT_DETAILS_SYSTEM_PROMPT},
+                    {"role": "user", "content": CONTRACT_DETAILS_PROMPT.format(text=packed["text"])}
+                ],
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                template_version=CONTRACT_DETAILS_TEMPLATE_VERSION,
+                cache_input=packed["text"],
+                usage=usage
+            )
+            async for delta in deltas:
+                for field, value in parser.feed(delta):
+                    # Date fields are converted per field, as in _continue_analysis
+                    value = self._convert_indonesian_dates({field: value})[field]
+                    if first_field_ms is None:
+                        first_field_ms = (time.perf_counter() - start) * 1000
+                    yield {"event": "field", "field": field, "value": value}
+        except Exception as e:
+            yield {"event": "error", "error": f"Groq contract analysis failed: {str(e)}"}
+            return
+        
+        total_ms = (time.perf_counter() - start) * 1000
+        if first_field_ms is not None:
+            self.stream_timings.append((first_field_ms, total_ms))
+        timing = {"time_to_first_field_ms": first_field_ms, "total_ms": total_ms}
+        
+        parsed = parser.result()
+        if not isinstance(parsed, dict):
+            yield {
+                "event": "error",
+                "error": "Failed to parse JSON response",
+                "raw_analysis": parser.buffer,
+                "timing": timing
+            }
+            return
+        
+        result = self._convert_indonesian_dates(parsed)
+        result["groq_analysis"] = True
+        result["confidence_score"] = 0.9
+        result["cached"] = usage.pop("cached", False)
+        result["token_usage"] = usage
+        result["context"] = self._context_report(packed)
+        yield {"event": "complete", "result": result, "timing": timing}
+    
+    def get_stream_stats(self) -> Dict[str, Any]:
+        """Time-to-first-field and total latency of recent streamed analyses"""
+        if not self.stream_timings:
+            return {"samples": 0}
+        
+        first_field = sorted(timing[0] for timing in self.stream_timings)
+        total = sorted(timing[1] for timing in self.stream_timings)
+        
+        def percentile(values: List[float], q: float) -> float:
+            return round(values[min(len(values) - 1, int(q * len(values)))], 1)
+        
+        return {
+            "samples": len(first_field),
+            "time_to_first_field_ms": {"p50": percentile(first_field, 0.5), "p95": percentile(first_field, 0.95)},
+            "total_ms": {"p50": percentile(total, 0.5), "p95": percentile(total, 0.95)}
+        }
+    
+    @staticmethod
+    def _token_usage(response: Any) -> Dict[str, Any]:
+        """Prompt/completion tokens reported by Groq for a response"""
+        usage = getattr(response, "usage", None)
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None)
+        }
+    
     def _convert_indonesian_dates(self, result: Dict[str, Any]) -> Dict[str, Any]:
-        """Convert Indonesian date text to DD Bulan YYYY format"""
+        """Convert Indonesian date text (spelled-out or numeric) to DD Bulan YYYY format"""
         if not isinstance(result, dict):
             return result
         
-        # Mapping number words to digits
-        number_map = {
-            'satu': '1', 'dua': '2', 'tiga': '3', 'empat': '4', 'lima': '5',
-            'enam': '6', 'tujuh': '7', 'delapan': '8', 'sembilan': '9', 'sepuluh': '10',
-            'sebelas': '11', 'dua belas': '12', 'tiga belas': '13', 'empat belas': '14', 'lima belas': '15',
-            'enam belas': '16', 'tujuh belas': '17', 'delapan belas': '18', 'sembilan belas': '19',
-            'dua puluh': '20', 'dua puluh satu': '21', 'dua puluh dua': '22', 'dua puluh tiga': '23',
-            'dua puluh empat': '24', 'dua puluh lima': '25', 'dua puluh enam': '26', 'dua puluh tujuh': '27',
-            'dua puluh delapan': '28', 'dua puluh sembilan': '29', 'tiga puluh': '30', 'tiga puluh satu': '31',
-            'ribu': '1000', 'dua ribu': '2000', 'dua ribu dua puluh': '2020', 'dua ribu dua puluh lima': '2025',
-            'dua ribu dua puluhan lima': '2025', 'dua ribu dua puluh empat': '2024', 'dua ribu dua puluh tiga': '2023',
-            'dua ribu dua puluh enam': '2026', 'dua ribu dua puluh tujuh': '2027'
-        }
+        for field in ("contract_start_date", "contract_end_date"):
+            date_text = result.get(field)
+            if not date_text or not isinstance(date_text, str) or FORMATTED_DATE_PATTERN.fullmatch(date_text.strip()):
+                continue
+            converted = normalize_date(date_text)
+            if converted:
+                result[field] = converted
         
-        # Month mapping
-        month_map = {
-            'januari': 'Januari', 'februari': 'Februari', 'maret': 'Maret', 'april': 'April',
-            'mei': 'Mei', 'juni': 'Juni', 'juli': 'Juli', 'agustus': 'Agustus',
-            'september': 'September', 'oktober': 'Oktober', 'november': 'November', 'desember': 'Desember'
-        }
+        return result
+    
+    async def analyze_contract_full(self, text: str, combined: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Contract details, entities and risk assessment for one contract
         
-        def convert_date_text(date_text: str) -> str:
-            """Convert Indonesian date text to DD Bulan YYYY"""
-            if not date_text or len(date_text) < 10:
-                return date_text
-                
-            original = date_text
-            text = date_text.lower().strip()
-            
-            # If already in correct format, return as is
-            import re
-            if re.match(r'\d{1,2}\s+(januari|februari|maret|april|mei|juni|juli|agustus|september|oktober|november|desember)\s+\d{4}', text):
-                return date_text
-            
-            # Try to extract day, month, year from Indonesian text
-            day = None
-            month = None 
-            year = None
-            
-            # Find day number
-            for word_num, digit in number_map.items():
-                if word_num in text and len(digit) <= 2:  # Day should be 1-31
-                    day = digit
-                    break
-            
-            # Find month
-            for month_word, month_name in month_map.items():
-                if month_word in text:
-                    month = month_name
-                    break
+        In combined mode (settings.GROQ_COMBINED_ANALYSIS) one request with
+        one packed context returns all three sections; only sections that
+        fail validation are requested again with their own prompt. Otherwise
+        the three analyses run as separate (concurrent) requests.
+        
+        Args:
+            text: Contract text
+            combined: Override settings.GROQ_COMBINED_ANALYSIS
             
-            # Find year  
-            for word_num, digit in number_map.items():
-                if word_num in text and len(digit) >= 4:  # Year should be 4 digits
-                    year = digit
-                    break
+        Returns:
+            Dictionary with contract_details, entities, risk_assessment and
+            per-section "sources" (combined / separate / failed)
+        """
+        if not self.groq_available:
+            return {"error": "Groq service not available", "fallback": True}
+        
+        combined = settings.GROQ_COMBINED_ANALYSIS if combined is None else combined
+        result: Dict[str, Any] = {"mode": "combined" if combined else "separate"}
+        token_usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        pending = list(COMBINED_SECTIONS)
+        
+        if combined:
+            max_tokens = self.max_tokens + ENTITY_MAX_TOKENS + RISK_MAX_TOKENS
+            packed = self.pack_context(text, max_tokens, COMBINED_SYSTEM_PROMPT, COMBINED_PROMPT)
+            result["context"] = self._context_report(packed)
             
-            # Additional year patterns
-            if 'dua ribu dua puluh lima' in text:
-                year = '2025'
-            elif 'dua ribu dua puluhan lima' in text:
-                year = '2025'
-            elif 'dua ribu dua puluh empat' in text:
-                year = '2024'
+            try:
+                completion = await self._chat_completion(
+                    [
+                        {"role": "system", "content": COMBINED_SYSTEM_PROMPT},
+                        {"role": "user", "content": COMBINED_PROMPT.format(text=packed["text"])}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=self.temperature,
+                    template_version=COMBINED_TEMPLATE_VERSION,
+                    cache_input=packed["text"]
+                )
+                self._add_usage(token_usage, completion["usage"])
+                result["cached"] = completion["cached"]
+                parsed = json.loads(strip_json_fence(completion["content"]))
+            except Exception as e:
+                print(f"Combined Groq analysis failed, using separate requests: {e}")
+                parsed = {}
             
-            # If we found all components, format properly
-            if day and month and year:
-                return f"{day} {month} {year}"
+            if isinstance(parsed, dict):
+                for section in COMBINED_SECTIONS:
+                    if validate_combined_section(section, parsed.get(section)):
+                        result[section] = parsed[section]
+                        pending.remove(section)
             
-            return original
+            if "contract_details" in result:
+                details = self._convert_indonesian_dates(result["contract_details"])
+                details["groq_analysis"] = True
+                details["confidence_score"] = 0.9
+                result["contract_details"] = details
         
-        # Convert date fields if they exist
-        if 'contract_start_date' in result and result['contract_start_date']:
-            result['contract_start_date'] = convert_date_text(str(result['contract_start_date']))
-            
-        if 'contract_end_date' in result and result['contract_end_date']:
-            result['contract_end_date'] = convert_date_text(str(result['contract_end_date']))
+        sources = {section: "combined" for section in COMBINED_SECTIONS if section not in pending}
+        if pending:
+            separate = {
+                "contract_details": self.analyze_contract_details,
+                "entities": self.extract_entities_with_groq,
+                "risk_assessment": self.assess_risk_with_groq
+            }
+            outcomes = await asyncio.gather(*(separate[section](text) for section in pending))
+            for section, outcome in zip(pending, outcomes):
+                result[section] = outcome
+                # Entity / risk calls return the model's JSON as is, which need not be an object
+                if not isinstance(outcome, dict) or outcome.get("error"):
+                    sources[section] = "failed"
+                else:
+                    sources[section] = "separate"
+                if isinstance(outcome, dict):
+                    self._add_usage(token_usage, outcome.get("token_usage"))
         
+        result["sources"] = sources
+        result["token_usage"] = token_usage
         return result
     
+    @staticmethod
+    def _add_usage(total: Dict[str, int], usage: Optional[Dict[str, Any]]):
+        for key in total:
+            total[key] += (usage or {}).get(key) or 0
+    
     async def extract_entities_with_groq(self, text: str) -> Dict[str, Any]:
         """
         Extract entities from contract text using Groq
@@ -406,65 +941,29 @@ OUTPUT HANYA JSON VALID:"""
             return {"error": "Groq service not available"}
         
         try:
-            prompt = f"""
-            Ekstrak entitas penting dari teks kontrak berikut dan berikan dalam format JSON:
+            packed = self.pack_context(text, ENTITY_MAX_TOKENS, ENTITY_SYSTEM_PROMPT, ENTITY_PROMPT)
+            prompt = ENTITY_PROMPT.format(text=packed["text"])
             
-            {{
-                "parties": [
-                    {{
-                        "name": "nama lengkap pihak",
-                        "type": "individual/company/organization",
-                        "role": "peran dalam kontrak"
-                    }}
-                ],
-                "dates": [
-                    {{
-                        "type": "jenis tanggal",
-                        "date": "tanggal (YYYY-MM-DD)",
-                        "description": "deskripsi"
-                    }}
-                ],
-                "financial": [
-                    {{
-                        "type": "jenis keuangan",
-                        "amount": "jumlah",
-                        "currency": "mata uang",
-                        "description": "deskripsi"
-                    }}
+            completion = await self._chat_completion(
+                [
+                    {"role": "system", "content": ENTITY_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
                 ],
-                "locations": ["lokasi yang disebutkan"],
-                "obligations": [
-                    {{
-                        "party": "pihak yang berkewajiban",
-                        "obligation": "kewajiban",
-                        "deadline": "tenggat waktu jika ada"
-                    }}
-                ]
-            }}
-            
-            Teks kontrak:
-            {text[:3000]}
-            """
-            
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "Anda adalah sistem ekstraksi entitas yang akurat untuk dokumen kontrak Indonesia."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=800,
-                    temperature=0.1
-                )
+                max_tokens=ENTITY_MAX_TOKENS,
+                temperature=0.1,
+                template_version=ENTITY_TEMPLATE_VERSION,
+                cache_input=packed["text"]
             )
             
-            content = response.choices[0].message.content
+            content = completion["content"]
             
             try:
-                return json.loads(content)
+                result = json.loads(content)
             except json.JSONDecodeError:
                 return {"raw_extraction": content, "error": "Failed to parse JSON"}
+            if isinstance(result, dict):
+                result["token_usage"] = completion["usage"]
+            return result
                 
         except Exception as e:
             return {"error": f"Entity extraction failed: {str(e)}"}
@@ -483,54 +982,29 @@ OUTPUT HANYA JSON VALID:"""
             return {"error": "Groq service not available"}
         
         try:
-            prompt = f"""
-            Lakukan penilaian risiko terhadap teks kontrak berikut dan berikan hasil dalam format JSON:
+            packed = self.pack_context(text, RISK_MAX_TOKENS, RISK_SYSTEM_PROMPT, RISK_PROMPT)
+            prompt = RISK_PROMPT.format(text=packed["text"])
             
-            {{
-                "overall_risk": "low/medium/high",
-                "risk_score": "1-10",
-                "risks": [
-                    {{
-                        "category": "kategori risiko",
-                        "risk": "deskripsi risiko",
-                        "probability": "kemungkinan (low/medium/high)",
-                        "impact": "dampak (low/medium/high)",
-                        "mitigation": "strategi mitigasi"
-                    }}
+            completion = await self._chat_completion(
+                [
+                    {"role": "system", "content": RISK_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
                 ],
-                "red_flags": ["bendera merah yang ditemukan"],
-                "recommendations": ["rekomendasi untuk mengurangi risiko"],
-                "legal_compliance": {{
-                    "compliant": true/false,
-                    "issues": ["masalah kepatuhan jika ada"]
-                }}
-            }}
-            
-            Fokus pada risiko keuangan, hukum, operasional, dan kepatuhan terhadap regulasi Indonesia.
-            
-            Teks kontrak:
-            {text[:3000]}
-            """
-            
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "Anda adalah ahli manajemen risiko kontrak dengan keahlian dalam hukum Indonesia."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1000,
-                    temperature=0.1
-                )
+                max_tokens=RISK_MAX_TOKENS,
+                temperature=0.1,
+                template_version=RISK_TEMPLATE_VERSION,
+                cache_input=packed["text"]
             )
             
-            content = response.choices[0].message.content
+            content = completion["content"]
             
             try:
-                return json.loads(content)
+                result = json.loads(content)
             except json.JSONDecodeError:
                 return {"raw_assessment": content, "error": "Failed to parse JSON"}
+            if isinstance(result, dict):
+                result["token_usage"] = completion["usage"]
+            return result
                 
         except Exception as e:
             return {"error": f"Risk assessment failed: {str(e)}"}
@@ -540,9 +1014,13 @@ OUTPUT HANYA JSON VALID:"""
         return self.groq_available
 
 
-# Create a global instance
-groq_service = GroqService()
+# Global instance, created on first use so the pooled httpx client is built
+# in the serving worker and not in a gunicorn master with preload_app
+groq_service = None
 
 def get_groq_service() -> GroqService:
     """Get the Groq service instance"""
+    global groq_service
+    if groq_service is None:
+        groq_service = GroqService()
     return groq_service
\ No newline at end of file
@@ -0,0 +1,383 @@
+"""
+Background job store and runner for long-running contract analysis
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import Dict, Any, Optional, List
+
+from config.settings import settings
+from services.contract_analysis_services import get_contract_analysis_service
+
+
+class JobStore:
+    """
+    SQLite-backed job state shared by all workers on the host.
+
+    State survives worker restarts. Running jobs hold a lease that their
+    worker renews with heartbeat(); jobs whose lease expired (the worker
+    died or hung) are put back in the queue by recover_interrupted(), until
+    they have been claimed max_attempts times. A job that keeps killing its
+    worker (e.g. out of memory on a huge scan) is then marked failed.
+    """
+
+    def __init__(self, db_path: str = "./data/jobs.db", max_attempts: int = 3):
+        self.db_path = db_path
+        self.max_attempts = max(1, max_attempts)
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    progress TEXT,
+                    filename TEXT,
+                    upload_path TEXT,
+                    result TEXT,
+                    error TEXT,
+                    worker_id TEXT,
+                    heartbeat_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            # Databases created before leases identified workers by PID
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (
+                ("worker_id", "TEXT"),
+                ("heartbeat_at", "REAL"),
+                ("attempts", "INTEGER NOT NULL DEFAULT 0")
+            ):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, kind: str, filename: str, upload_path: str) -> str:
+        """Create a queued job and return its id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, stage, progress, filename, upload_path, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', 'queued', '{}', ?, ?, ?, ?)",
+                (job_id, kind, filename, upload_path, now, now)
+            )
+        return job_id
+
+    def claim(self, job_id: str, worker_id: str) -> bool:
+        """Atomically move a queued job to running and count the attempt; False if another worker got it"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, heartbeat_at = ?, updated_at = ?, "
+                "attempts = attempts + 1 "
+                "WHERE id = ? AND status = 'queued'",
+                (worker_id, now, now, job_id)
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, worker_id: str):
+        """Renew the lease of every job the worker is running"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE worker_id = ? AND status = 'running'",
+                (time.time(), worker_id)
+            )
+
+    def update_progress(self, job_id: str, stage: str, progress: Dict[str, Any]):
+        """Record the current stage and its progress details"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = ?, progress = ?, updated_at = ? WHERE id = ?",
+                (stage, json.dumps(progress), time.time(), job_id)
+            )
+
+    def complete(self, job_id: str, result: Dict[str, Any]):
+        """Store the final result of a job"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'completed', stage = 'done', result = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(result), time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str):
+        """Mark a job as failed"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job as a dictionary"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["progress"] = json.loads(job["progress"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def next_queued(self) -> Optional[str]:
+        """Get the oldest queued job id"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+        return row["id"] if row else None
+
+    def recover_interrupted(self, lease_seconds: float) -> Dict[str, List[str]]:
+        """
+        Handle running jobs whose worker has not renewed the lease for lease_seconds
+
+        Jobs with attempts left are requeued, the others are marked failed.
+
+        Returns:
+            Dictionary with the "requeued" and "failed" job ids
+        """
+        expired_before = time.time() - lease_seconds
+        recovered: Dict[str, List[str]] = {"requeued": [], "failed": []}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, attempts FROM jobs WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (expired_before,)
+            ).fetchall()
+            for row in rows:
+                if row["attempts"] >= self.max_attempts:
+                    cursor = conn.execute(
+                        "UPDATE jobs SET status = 'failed', worker_id = NULL, error = ?, updated_at = ? "
+                        "WHERE id = ? AND status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                        (
+                            f"Job interrupted {row['attempts']} times (worker crashed or was stopped); giving up",
+                            time.time(), row["id"], expired_before
+                        )
+                    )
+                    outcome = "failed"
+                else:
+                    cursor = conn.execute(
+                        "UPDATE jobs SET status = 'queued', stage = 'queued', worker_id = NULL, updated_at = ? "
+                        "WHERE id = ? AND status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                        (time.time(), row["id"], expired_before)
+                    )
+                    outcome = "requeued"
+                if cursor.rowcount == 1:
+                    recovered[outcome].append(row["id"])
+        return recovered
+
+
+class JobProgressWriter:
+    """
+    Progress callback that writes to the job store off the event loop
+
+    Writes run in the default executor one at a time (so they land in
+    order); within a stage they are throttled to one per interval, and the
+    latest progress is written by flush().
+    """
+
+    def __init__(self, store: JobStore, job_id: str, interval: float = 1.0):
+        self.store = store
+        self.job_id = job_id
+        self.interval = interval
+        self._latest = None
+        self._written_stage: Optional[str] = None
+        self._written_at = 0.0
+        self._dirty = False
+        self._inflight: Optional[asyncio.Future] = None
+
+    def __call__(self, stage: str, **details: Any):
+        self._latest = (stage, details)
+        if stage == self._written_stage and time.monotonic() - self._written_at < self.interval:
+            self._dirty = True
+            return
+        self._write()
+
+    def _write(self):
+        if self._inflight is not None and not self._inflight.done():
+            self._dirty = True
+            return
+
+        stage, details = self._latest
+        self._dirty = False
+        self._written_stage = stage
+        self._written_at = time.monotonic()
+        self._inflight = asyncio.get_event_loop().run_in_executor(
+            None, self.store.update_progress, self.job_id, stage, details
+        )
+        self._inflight.add_done_callback(self._on_written)
+
+    def _on_written(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Progress update for job {self.job_id} failed: {future.exception()}")
+        # A stage change that arrived during the write should not wait for the next update
+        if self._dirty and self._latest[0] != self._written_stage:
+            self._write()
+
+    async def flush(self):
+        """Wait for the pending write and store the latest progress"""
+        if self._inflight is not None:
+            await asyncio.gather(self._inflight, return_exceptions=True)
+        if self._dirty:
+            self._write()
+            await asyncio.gather(self._inflight, return_exceptions=True)
+
+
+class JobRunner:
+    """Bounded pool of asyncio workers that run queued contract analysis jobs"""
+
+    def __init__(
+        self,
+        store: JobStore,
+        max_workers: int = 1,
+        poll_interval: float = 5.0,
+        lease_seconds: float = 60.0,
+        progress_interval: float = 1.0
+    ):
+        self.store = store
+        self.max_workers = max(1, max_workers)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.progress_interval = progress_interval
+        # Set in start(), i.e. in the serving process (PIDs are reused across container restarts)
+        self.worker_id: Optional[str] = None
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+
+    async def _store_call(self, fn, *args):
+        """Run a (blocking SQLite) job store call in the default executor"""
+        return await asyncio.get_event_loop().run_in_executor(None, fn, *args)
+
+    async def start(self):
+        """Start workers and pick up jobs interrupted by a previous restart"""
+        if self._workers:
+            return
+
+        self.worker_id = uuid.uuid4().hex
+        await self._recover_interrupted()
+
+        self._workers = [asyncio.create_task(self._worker_loop()) for _ in range(self.max_workers)]
+        self._workers.append(asyncio.create_task(self._heartbeat_loop()))
+        print(f"Job runner started with {self.max_workers} workers")
+
+    async def stop(self):
+        """Stop all workers; running jobs are recovered once their lease expires"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _heartbeat_loop(self):
+        """Renew the lease of this runner's jobs well before it expires"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self._store_call(self.store.heartbeat, self.worker_id)
+            except Exception as e:
+                print(f"Job heartbeat failed: {e}")
+
+    async def _recover_interrupted(self):
+        """Requeue jobs of dead workers; drop the uploads of jobs that ran out of attempts"""
+        recovered = await self._store_call(self.store.recover_interrupted, self.lease_seconds)
+        if recovered["requeued"]:
+            print(f"Requeued {len(recovered['requeued'])} interrupted analysis jobs")
+        for job_id in recovered["failed"]:
+            print(f"Analysis job {job_id} failed: interrupted {self.store.max_attempts} times")
+            job = await self._store_call(self.store.get, job_id)
+            try:
+                os.remove(job["upload_path"])
+            except (OSError, TypeError):
+                pass
+
+    def submit(self, job_id: str):
+        """Hand a freshly created job to this worker's queue"""
+        self._queue.put_nowait(job_id)
+
+    async def _worker_loop(self):
+        while True:
+            try:
+                try:
+                    job_id = await asyncio.wait_for(self._queue.get(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    # Idle: pick up jobs queued by other (possibly restarted) workers
+                    await self._recover_interrupted()
+                    job_id = await self._store_call(self.store.next_queued)
+                    if job_id is None:
+                        continue
+
+                if not await self._store_call(self.store.claim, job_id, self.worker_id):
+                    continue
+
+                await self._run_job(job_id)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job runner error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _run_job(self, job_id: str):
+        job = await self._store_call(self.store.get, job_id)
+        upload_path = job["upload_path"]
+        progress = JobProgressWriter(self.store, job_id, self.progress_interval)
+        started_at = time.time()
+
+        try:
+            with open(upload_path, "rb") as f:
+                content = f.read()
+
+            service = get_contract_analysis_service()
+            extraction = await service.extract_text(content, job["filename"], progress)
+            result = await service.analyze_extracted(extraction, started_at, progress)
+            await progress.flush()
+            # The per-page extraction report (OCR DPI per page) goes with the result
+            result_data = {**result.model_dump(mode="json"), "pages": extraction["pages"]}
+            await self._store_call(self.store.complete, job_id, result_data)
+            print(f"Analysis job {job_id} completed")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Analysis job {job_id} failed: {e}")
+            await progress.flush()
+            await self._store_call(self.store.fail, job_id, str(e))
+
+        # Keep the upload only while the job may still be retried
+        try:
+            os.remove(upload_path)
+        except OSError:
+            pass
+
+
+# Create global instances
+job_store = JobStore(settings.JOB_DB_PATH, settings.JOB_MAX_ATTEMPTS)
+job_runner = JobRunner(
+    job_store,
+    settings.JOB_MAX_WORKERS,
+    settings.JOB_POLL_INTERVAL,
+    settings.JOB_LEASE_SECONDS,
+    settings.JOB_PROGRESS_INTERVAL
+)
+
+def get_job_store() -> JobStore:
+    """Get the job store instance"""
+    return job_store
+
+def get_job_runner() -> JobRunner:
+    """Get the job runner instance"""
+    return job_runner
@@ -1,15 +1,20 @@
 # services/ocr_services.py
 import asyncio
 import io
-from typing import Optional, List, Dict, Any
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Callable
 from fastapi import UploadFile
 from pdf2image import convert_from_path
 import os
 from datetime import datetime
 
+from config.settings import settings
+
 try:
     import pytesseract
-    from pdf2image import convert_from_bytes
+    from pdf2image import pdfinfo_from_path
     from PIL import Image
     OCR_AVAILABLE = True
     print("OCR libraries loaded successfully")
@@ -17,7 +22,246 @@ except ImportError as e:
     print(f"OCR libraries not available: {e}")
     OCR_AVAILABLE = False
 
-import os
+try:
+    import fitz  # PyMuPDF, used for in-process page rendering
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+try:
+    import tesserocr  # Tesseract C API bindings, keeps the engine loaded between pages
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# Process pool shared by all OCRService instances (created lazily)
+_ocr_executor: Optional[ProcessPoolExecutor] = None
+
+# Per worker process state: selected engine and warm Tesseract APIs per language
+_worker_engine = "pytesseract"
+_tess_apis: Dict[str, Any] = {}
+
+
+def resolve_ocr_engine(engine: str) -> str:
+    """Resolve the OCR_ENGINE setting to the engine that will actually run"""
+    if engine in ("auto", "tesserocr") and TESSEROCR_AVAILABLE:
+        return "tesserocr"
+    if engine == "tesserocr":
+        print("tesserocr not installed, falling back to pytesseract")
+    return "pytesseract"
+
+
+def _get_tess_api(language: str):
+    """Get (or create once) the warm Tesseract engine for a language"""
+    api = _tess_apis.get(language)
+    if api is None:
+        kwargs = {"lang": language}
+        if settings.TESSDATA_PREFIX:
+            kwargs["path"] = settings.TESSDATA_PREFIX
+        api = tesserocr.PyTessBaseAPI(**kwargs)
+        _tess_apis[language] = api
+    return api
+
+
+def _init_ocr_worker(tesseract_cmd: str, engine: str = "pytesseract"):
+    """Initializer for OCR worker processes"""
+    global _worker_engine
+    # Paralelisme sudah diatur oleh pool, jadi batasi OpenMP Tesseract ke 1 thread
+    # per proses supaya tidak terjadi oversubscription di VPS kecil
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    _worker_engine = engine
+    
+    if _worker_engine == "tesserocr":
+        try:
+            # Load the default traineddata once, up front
+            _get_tess_api("eng+ind")
+        except Exception as e:
+            print(f"tesserocr engine failed to start ({e}), falling back to pytesseract")
+            _worker_engine = "pytesseract"
+
+
+def _ocr_page_tesserocr(image, language: str, with_confidence: bool) -> Dict[str, Any]:
+    """OCR a page with the warm tesserocr engine of this worker"""
+    api = _get_tess_api(language)
+    
+    try:
+        if image.mode == "L":
+            # Raw 8-bit grayscale buffer straight from the rasterizer
+            api.SetImageBytes(image.tobytes(), image.width, image.height, 1, image.width)
+        else:
+            api.SetImage(image)
+        
+        text = api.GetUTF8Text()
+        confidence = None
+        if with_confidence:
+            confidences = api.AllWordConfidences()
+            confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        
+        return {"text": text, "confidence": confidence}
+    finally:
+        api.Clear()
+
+
+def _text_from_tesseract_data(data: Dict[str, List[Any]]) -> str:
+    """Rebuild page text from Tesseract's word-level image_to_data output"""
+    lines: List[str] = []
+    current_line = None
+    words: List[str] = []
+    
+    for i, word in enumerate(data["text"]):
+        line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        if line_key != current_line:
+            if words:
+                lines.append(" ".join(words))
+            # Blank line between paragraphs, like image_to_string
+            if current_line is not None and line_key[:2] != current_line[:2] and lines and lines[-1]:
+                lines.append("")
+            current_line = line_key
+            words = []
+        if word and word.strip():
+            words.append(word)
+    
+    if words:
+        lines.append(" ".join(words))
+    
+    return "\n".join(lines)
+
+
+def _ocr_page_worker(image, language: str, with_confidence: bool = False) -> Dict[str, Any]:
+    """
+    OCR a single page image (runs inside a worker process)
+    
+    With with_confidence=True the mean word confidence (0-100) is reported
+    alongside the text.
+    """
+    global _worker_engine
+    
+    if _worker_engine == "tesserocr":
+        try:
+            return _ocr_page_tesserocr(image, language, with_confidence)
+        except Exception as e:
+            print(f"tesserocr failed ({e}), falling back to pytesseract")
+            _worker_engine = "pytesseract"
+    
+    if not with_confidence:
+        return {"text": pytesseract.image_to_string(image, lang=language), "confidence": None}
+    
+    data = pytesseract.image_to_data(image, lang=language, output_type=pytesseract.Output.DICT)
+    confidences = [
+        float(conf) for conf, word in zip(data["conf"], data["text"])
+        if word and word.strip() and float(conf) >= 0
+    ]
+    
+    return {
+        "text": _text_from_tesseract_data(data),
+        # A page with no recognised words counts as low confidence
+        "confidence": sum(confidences) / len(confidences) if confidences else 0.0
+    }
+
+
+def get_ocr_executor() -> ProcessPoolExecutor:
+    """Get the shared OCR process pool, capped by settings.OCR_MAX_WORKERS"""
+    global _ocr_executor
+    if _ocr_executor is None:
+        max_workers = settings.OCR_MAX_WORKERS or os.cpu_count() or 1
+        engine = resolve_ocr_engine(settings.OCR_ENGINE)
+        _ocr_executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_ocr_worker,
+            initargs=(settings.TESSERACT_CMD, engine)
+        )
+        print(f"OCR process pool started with {max_workers} {engine} workers")
+    return _ocr_executor
+
+
+def _iter_pages_pdf2image(
+    pdf_path: str,
+    dpi: int,
+    pages: Optional[List[int]]
+) -> Iterator[Tuple[int, Any]]:
+    """Render pages through poppler's pdftoppm (one subprocess per page)"""
+    if pages is None:
+        page_count = int(pdfinfo_from_path(pdf_path)["Pages"])
+        pages = range(1, page_count + 1)
+    
+    for page_number in pages:
+        images = convert_from_path(
+            pdf_path, dpi=dpi, fmt='JPEG',
+            first_page=page_number, last_page=page_number
+        )
+        if images:
+            yield page_number, images[0]
+
+
+def _iter_pages_pymupdf(
+    pdf_path: str,
+    dpi: int,
+    pages: Optional[List[int]]
+) -> Iterator[Tuple[int, Any]]:
+    """Render pages in-process with PyMuPDF as raw 8-bit grayscale buffers"""
+    doc = fitz.open(pdf_path)
+    
+    try:
+        if pages is None:
+            pages = range(1, len(doc) + 1)
+        
+        zoom = dpi / 72  # PDF user space is 72 points per inch
+        matrix = fitz.Matrix(zoom, zoom)
+        
+        for page_number in pages:
+            pix = doc[page_number - 1].get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)
+            # Wrap the pixmap samples directly, no JPEG encode/decode round-trip
+            image = Image.frombuffer("L", (pix.width, pix.height), pix.samples, "raw", "L", pix.stride, 1)
+            del pix
+            yield page_number, image
+    finally:
+        doc.close()
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    """Get the number of pages in a PDF file"""
+    if PYMUPDF_AVAILABLE:
+        with fitz.open(pdf_path) as doc:
+            return len(doc)
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+
+def iter_pdf_pages(
+    pdf_path: str,
+    dpi: int = 300,
+    pages: Optional[List[int]] = None,
+    rasterizer: Optional[str] = None
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Render a PDF one page at a time.
+    
+    Only the current page is decoded into memory, so peak memory stays flat
+    regardless of the page count.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        dpi: Rendering resolution
+        pages: 1-based page numbers to render (default: all pages)
+        rasterizer: "pymupdf" or "pdf2image" (default: settings.OCR_RASTERIZER)
+        
+    Yields:
+        Tuples of (page_number, PIL image)
+    """
+    rasterizer = rasterizer or settings.OCR_RASTERIZER
+    
+    if rasterizer == "pymupdf" and PYMUPDF_AVAILABLE:
+        return _iter_pages_pymupdf(pdf_path, dpi, pages)
+    return _iter_pages_pdf2image(pdf_path, dpi, pages)
+
+
+def shutdown_ocr_executor():
+    """Shut down the shared OCR process pool"""
+    global _ocr_executor
+    if _ocr_executor is not None:
+        _ocr_executor.shutdown(wait=False, cancel_futures=True)
+        _ocr_executor = None
+
 
 class OCRService:
     """OCR service for extracting text from images and scanned documents"""
@@ -25,8 +269,8 @@ class OCRService:
     def __init__(self):
         self.ocr_available = OCR_AVAILABLE
         if self.ocr_available:
-            # Path ke executable Tesseract (Windows), sesuaikan dengan installasi Anda
-            pytesseract.pytesseract.tesseract_cmd = "tesseract"
+            # Path ke executable Tesseract (TESSERACT_CMD, mis. di Windows)
+            pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
             self._test_ocr()
     
     def _test_ocr(self):
@@ -59,13 +303,15 @@ class OCRService:
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
-            # Extract text using OCR
-            text = await asyncio.get_event_loop().run_in_executor(
-                None, 
-                lambda: pytesseract.image_to_string(image, lang=language)
+            # Extract text using OCR in the worker pool (warm engine when available)
+            result = await asyncio.get_event_loop().run_in_executor(
+                get_ocr_executor(),
+                _ocr_page_worker,
+                image,
+                language
             )
             
-            return self._clean_text(text)
+            return self._clean_text(result["text"])
             
         except Exception as e:
             return f"OCR extraction failed: {str(e)}"
@@ -80,37 +326,206 @@ class OCRService:
         if not self.ocr_available:
             return "OCR not available - required libraries not installed"
         
+        # Read PDF content
+        content = await file.read()
+        return await self.extract_text_from_pdf_bytes(content, dpi, language)
+
+    async def extract_text_from_pdf_bytes(
+        self,
+        content: bytes,
+        dpi: int = 300,
+        language: str = 'eng+ind'
+    ) -> str:
+        """Extract text from PDF content using OCR (convert to images first)"""
+        if not self.ocr_available:
+            return "OCR not available - required libraries not installed"
+        
         try:
-            # Read PDF content
-            content = await file.read()
-            
-            # Convert PDF pages to images
-            pages = await asyncio.get_event_loop().run_in_executor(
-                None, 
-                lambda: convert_from_bytes(content, dpi=dpi, fmt='JPEG')
-            )
+            page_results = await self.ocr_pdf_bytes(content, dpi, language)
             
             text_output = []
             
-            for i, page in enumerate(pages):
-                try:
-                    # Extract text from each page
-                    page_text = await asyncio.get_event_loop().run_in_executor(
-                        None,
-                        lambda: pytesseract.image_to_string(page, lang=language)
-                    )
-                    
-                    if page_text.strip():  # Only add non-empty pages
-                        text_output.append(f"--- Page {i+1} ---\n{page_text}")
-                        
-                except Exception as page_error:
-                    text_output.append(f"--- Page {i+1} (Error) ---\nOCR failed: {str(page_error)}")
+            for page in page_results:
+                if page["error"]:
+                    text_output.append(f"--- Page {page['page']} (Error) ---\nOCR failed: {page['error']}")
+                elif page["text"].strip():  # Only add non-empty pages
+                    text_output.append(f"--- Page {page['page']} ---\n{page['text']}")
             
             return "\n\n".join(text_output) if text_output else "No text extracted from PDF"
             
         except Exception as e:
             return f"PDF OCR extraction failed: {str(e)}"
 
+    async def ocr_pdf_bytes(
+        self,
+        content: bytes,
+        dpi: int = 300,
+        language: str = 'eng+ind',
+        pages: Optional[List[int]] = None,
+        adaptive: Optional[bool] = None,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        OCR PDF pages through a streaming render -> OCR pipeline.
+        
+        Pages are rendered one at a time and handed to the OCR process pool;
+        at most settings.OCR_PAGE_WINDOW pages are in flight, so memory use
+        does not grow with the page count.
+        
+        In adaptive mode every page is first OCR'd at settings.OCR_LOW_DPI and
+        only pages whose mean word confidence is below
+        settings.OCR_MIN_CONFIDENCE are rendered again at `dpi`.
+        
+        Args:
+            content: PDF file content
+            dpi: Rendering resolution (the escalation resolution in adaptive mode)
+            language: Tesseract language(s)
+            pages: 1-based page numbers to OCR (default: all pages)
+            adaptive: Use adaptive DPI (default: settings.OCR_ADAPTIVE_DPI)
+            progress_callback: Called as (pages_done, pages_total, dpi) after
+                every OCR'd page of each pass
+            
+        Returns:
+            List of {"page", "text", "error", "dpi", "confidence"} dictionaries
+            in page order
+        """
+        if adaptive is None:
+            adaptive = settings.OCR_ADAPTIVE_DPI
+        low_dpi = min(settings.OCR_LOW_DPI, dpi)
+        
+        # pdf2image works on files, so write the upload once instead of per page
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp.write(content)
+            pdf_path = tmp.name
+        
+        try:
+            if pages is None:
+                pages = list(range(1, count_pdf_pages(pdf_path) + 1))
+            
+            if not adaptive or low_dpi >= dpi:
+                return await self._ocr_pages_pass(
+                    pdf_path, dpi, language, pages, with_confidence=False,
+                    progress_callback=progress_callback
+                )
+            
+            results = await self._ocr_pages_pass(
+                pdf_path, low_dpi, language, pages, with_confidence=True,
+                progress_callback=progress_callback
+            )
+            
+            retry_pages = [
+                result["page"] for result in results
+                if result["error"] or result["confidence"] < settings.OCR_MIN_CONFIDENCE
+            ]
+            if retry_pages:
+                print(f"Low OCR confidence at {low_dpi} DPI, re-rendering pages {retry_pages} at {dpi} DPI")
+                retried = await self._ocr_pages_pass(
+                    pdf_path, dpi, language, retry_pages, with_confidence=True,
+                    progress_callback=progress_callback
+                )
+                retried_by_page = {result["page"]: result for result in retried}
+                
+                for i, result in enumerate(results):
+                    retry = retried_by_page.get(result["page"])
+                    if retry is None or retry["error"]:
+                        continue
+                    # Keep the high-DPI pass unless it is clearly worse
+                    if result["error"] or retry["confidence"] >= result["confidence"]:
+                        results[i] = retry
+            
+            return results
+        finally:
+            os.remove(pdf_path)
+
+    async def _ocr_pages_pass(
+        self,
+        pdf_path: str,
+        dpi: int,
+        language: str,
+        pages: List[int],
+        with_confidence: bool,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """Run one streaming render -> OCR pass over the given pages"""
+        loop = asyncio.get_event_loop()
+        executor = get_ocr_executor()
+        window = max(1, settings.OCR_PAGE_WINDOW)
+        
+        results: List[Dict[str, Any]] = []
+        in_flight: List[Tuple[int, asyncio.Future]] = []
+        
+        async def collect_oldest():
+            page_number, future = in_flight.pop(0)
+            try:
+                page_result = await future
+                results.append({
+                    "page": page_number,
+                    "text": page_result["text"],
+                    "error": None,
+                    "dpi": dpi,
+                    "confidence": page_result["confidence"]
+                })
+            except Exception as page_error:
+                results.append({
+                    "page": page_number,
+                    "text": "",
+                    "error": str(page_error),
+                    "dpi": dpi,
+                    "confidence": None
+                })
+            if progress_callback is not None:
+                progress_callback(len(results), len(pages), dpi)
+        
+        page_iter = iter_pdf_pages(pdf_path, dpi, pages)
+        # Pages render in a thread; the lock keeps close() from racing a render in progress
+        page_iter_lock = threading.Lock()
+        
+        def render_next():
+            with page_iter_lock:
+                return next(page_iter, None)
+        
+        def close_pages():
+            with page_iter_lock:
+                page_iter.close()
+        
+        try:
+            while True:
+                # Render the next page off the event loop
+                rendered = await loop.run_in_executor(None, render_next)
+                if rendered is None:
+                    break
+                
+                page_number, image = rendered
+                in_flight.append((
+                    page_number,
+                    loop.run_in_executor(executor, _ocr_page_worker, image, language, with_confidence)
+                ))
+                del rendered, image
+                
+                if len(in_flight) >= window:
+                    await collect_oldest()
+            
+            while in_flight:
+                await collect_oldest()
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+            # Close the PyMuPDF document / pdf2image files also on cancellation or
+            # errors, and wait for it: the caller removes the PDF file next
+            try:
+                closing = loop.run_in_executor(None, close_pages)
+            except RuntimeError:
+                close_pages()
+            else:
+                try:
+                    await asyncio.shield(closing)
+                except asyncio.CancelledError:
+                    # Cancelled again while closing: the close still has to finish first
+                    await closing
+                    raise
+        
+        return results
+
     def _clean_text(self, text: str) -> str:
         """Clean and normalize extracted text"""
         if not text:
@@ -217,22 +632,16 @@ def ocr_pdf(pdf_path: str, dpi: int = 300) -> str:
         return "OCR not available - required libraries not installed"
     
     try:
-        pages = convert_from_path(pdf_path, dpi=dpi)
         text_output = []
         
-        for i, page in enumerate(pages):
-            # Create temporary path for page
-            page_path = f"temp_page_{i+1}.png"
-            page.save(page_path, "PNG")
-
+        for page_number, page in iter_pdf_pages(pdf_path, dpi):
             try:
-                page_text = pytesseract.image_to_string(Image.open(page_path))
-                text_output.append(f"--- Page {i+1} ---\n{page_text}")
+                page_text = pytesseract.image_to_string(page)
+                text_output.append(f"--- Page {page_number} ---\n{page_text}")
             except Exception as e:
-                text_output.append(f"--- Page {i+1} (Error) ---\nOCR failed: {str(e)}")
+                text_output.append(f"--- Page {page_number} (Error) ---\nOCR failed: {str(e)}")
             finally:
-                if os.path.exists(page_path):
-                    os.remove(page_path)  # Remove temporary file
+                page.close()  # Free the page before rendering the next one
 
         return "\n".join(text_output)
         
@@ -0,0 +1,218 @@
+"""
+In-process dynamic micro-batching for risk model inference
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+# forward(sequences) -> class probabilities per tokenized sequence
+ForwardFn = Callable[[List[Dict[str, List[int]]]], List[Optional[List[float]]]]
+
+
+class _PendingSequence:
+    __slots__ = ("features", "future", "deadline", "enqueued_at")
+
+    def __init__(self, features: Dict[str, List[int]], future: asyncio.Future, deadline: Optional[float]):
+        self.features = features
+        self.future = future
+        self.deadline = deadline
+        self.enqueued_at = time.perf_counter()
+
+
+class RiskMicroBatcher:
+    """
+    Gather tokenized sequences from concurrent requests into shared forward passes
+
+    The first queued sequence opens a batch; sequences arriving within
+    wait_ms join it until max_batch_size is reached. One padded forward pass
+    runs per batch in the default executor and every caller gets its own
+    probabilities back through a future.
+    """
+
+    def __init__(self, forward_fn: ForwardFn, max_batch_size: int = 32, wait_ms: float = 5.0):
+        self.forward_fn = forward_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.wait_seconds = max(0.0, wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stats = {
+            "requests": 0,
+            "sequences": 0,
+            "batches": 0,
+            "expired_sequences": 0,
+            "failed_batches": 0,
+            "max_queue_depth": 0,
+            "total_queue_wait_ms": 0.0,
+            "total_inference_ms": 0.0,
+        }
+        self._batch_sizes: Counter = Counter()
+
+    def _ensure_worker(self):
+        """Start (or restart) the batching loop on the running event loop"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            # Sequences queued before a crash stay queued for the new loop
+            self._worker = asyncio.create_task(self._worker_loop())
+
+    async def submit(
+        self,
+        sequences: List[Dict[str, List[int]]],
+        deadline: Optional[float] = None,
+        min_sequences: Optional[int] = None
+    ) -> List[Optional[List[float]]]:
+        """
+        Classify tokenized sequences together with other pending requests
+
+        Args:
+            sequences: Unpadded tokenizer features, one dict per sequence
+            deadline: Optional time.perf_counter() deadline; sequences still
+                queued after it are skipped (result None)
+            min_sequences: Number of leading sequences exempt from the deadline
+
+        Returns:
+            Class probabilities per sequence, in input order
+        """
+        if not sequences:
+            return []
+
+        self._ensure_worker()
+        loop = asyncio.get_event_loop()
+        exempt = len(sequences) if min_sequences is None else min_sequences
+
+        futures = []
+        for index, features in enumerate(sequences):
+            future = loop.create_future()
+            self._queue.put_nowait(
+                _PendingSequence(features, future, deadline if index >= exempt else None)
+            )
+            futures.append(future)
+
+        self._stats["requests"] += 1
+        self._stats["sequences"] += len(sequences)
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue.qsize())
+
+        return list(await asyncio.gather(*futures))
+
+    async def _collect_batch(self) -> List[_PendingSequence]:
+        """Wait for the first sequence, then up to wait_ms for more"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_event_loop()
+        close_at = loop.time() + self.wait_seconds
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = close_at - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _worker_loop(self):
+        batch: List[_PendingSequence] = []
+        try:
+            while True:
+                batch = await self._collect_batch()
+                await self._run_batch(batch)
+        except asyncio.CancelledError:
+            self._fail_pending(batch)
+            raise
+        except Exception as e:
+            # Unexpected crash: nobody would resolve the queued futures otherwise
+            logger.error(f"Micro-batch worker crashed: {e}")
+            self._fail_pending(batch, e, drain_queue=True)
+
+    async def _run_batch(self, batch: List[_PendingSequence]):
+        """Run one forward pass over the live sequences of batch and resolve their futures"""
+        loop = asyncio.get_event_loop()
+        now = time.perf_counter()
+
+        live = []
+        for pending in batch:
+            if pending.future.done():
+                # Caller went away (e.g. request cancelled)
+                continue
+            if pending.deadline is not None and now > pending.deadline:
+                self._stats["expired_sequences"] += 1
+                pending.future.set_result(None)
+                continue
+            live.append(pending)
+            self._stats["total_queue_wait_ms"] += (now - pending.enqueued_at) * 1000
+
+        if not live:
+            return
+
+        start = time.perf_counter()
+        try:
+            probabilities = await loop.run_in_executor(
+                None, self.forward_fn, [pending.features for pending in live]
+            )
+        except Exception as e:
+            logger.error(f"Micro-batch inference failed: {e}")
+            self._stats["failed_batches"] += 1
+            self._fail_pending(live, e)
+            return
+
+        self._stats["batches"] += 1
+        self._stats["total_inference_ms"] += (time.perf_counter() - start) * 1000
+        self._batch_sizes[len(live)] += 1
+
+        for pending, probs in zip(live, probabilities):
+            if not pending.future.done():
+                pending.future.set_result(probs)
+
+    def _fail_pending(
+        self,
+        batch: List[_PendingSequence],
+        error: Optional[Exception] = None,
+        drain_queue: bool = False
+    ):
+        """Fail (or cancel, without error) the futures of batch and optionally of everything queued"""
+        pending_sequences = list(batch)
+        while drain_queue and self._queue is not None and not self._queue.empty():
+            pending_sequences.append(self._queue.get_nowait())
+
+        for pending in pending_sequences:
+            if pending.future.done():
+                continue
+            if error is None:
+                pending.future.cancel()
+            else:
+                pending.future.set_exception(error)
+
+    async def stop(self):
+        """Stop the batching loop; pending callers get a cancellation"""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+        self._fail_pending([], drain_queue=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and batch size metrics for tuning wait_ms / max_batch_size"""
+        batches = self._stats["batches"]
+        batched_sequences = sum(size * count for size, count in self._batch_sizes.items())
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "wait_ms": self.wait_seconds * 1000,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            **self._stats,
+            "avg_batch_size": batched_sequences / batches if batches else 0.0,
+            "avg_queue_wait_ms": self._stats["total_queue_wait_ms"] / batched_sequences if batched_sequences else 0.0,
+            "avg_inference_ms": self._stats["total_inference_ms"] / batches if batches else 0.0,
+            "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+        }
@@ -0,0 +1,214 @@
+"""
+ONNX Runtime backend for the fine-tuned IndoBERT risk model
+"""
+
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Windows development setups
+    fcntl = None
+    import msvcrt
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FP32_MODEL_NAME = "model.onnx"
+INT8_MODEL_NAME = "model.int8.onnx"
+LOCK_FILE_NAME = ".export.lock"
+
+
+def _lock(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return
+    # msvcrt locks a byte range from the current position; LK_LOCK gives up
+    # after 10 one-second attempts, shorter than an export
+    lock_file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return
+    lock_file.seek(0)
+    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _export_lock(output_dir: str):
+    """Exclusive lock so concurrently starting workers export the model only once"""
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, LOCK_FILE_NAME), "w") as lock_file:
+        _lock(lock_file)
+        try:
+            yield
+        finally:
+            _unlock(lock_file)
+
+
+def _temp_path(output_dir: str, name: str) -> str:
+    """Unique file next to the final one, so os.replace() moves it in atomically"""
+    fd, path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=output_dir)
+    os.close(fd)
+    return path
+
+
+def export_onnx_model(model_path: str, output_dir: str, quantize: bool = True) -> str:
+    """
+    Export a Hugging Face sequence classification checkpoint to ONNX
+
+    Args:
+        model_path: Checkpoint directory
+        output_dir: Directory for the exported model files
+        quantize: Also write a dynamically int8-quantized copy
+
+    Returns:
+        Path of the model to serve (int8 when quantize=True)
+
+    Files are written under temporary names and renamed into place, so
+    readers never see a partially written model. Callers that may run
+    concurrently use get_or_export_onnx_model(), which holds a lock.
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, FP32_MODEL_NAME)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+
+    sample = tokenizer(["Kontrak contoh untuk ekspor model."], return_tensors="pt")
+    input_names = [name for name in tokenizer.model_input_names if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    tmp_path = _temp_path(output_dir, FP32_MODEL_NAME)
+    try:
+        with torch.inference_mode():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+                do_constant_folding=True
+            )
+        os.replace(tmp_path, fp32_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    logger.info(f"Exported ONNX risk model to {fp32_path}")
+
+    if not quantize:
+        return fp32_path
+
+    int8_path = os.path.join(output_dir, INT8_MODEL_NAME)
+    tmp_path = _temp_path(output_dir, INT8_MODEL_NAME)
+    try:
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    logger.info(f"Wrote int8 quantized ONNX risk model to {int8_path}")
+    return int8_path
+
+
+def get_or_export_onnx_model(model_path: str, output_dir: str, quantize: bool = True) -> str:
+    """Return the exported ONNX model, exporting it first if missing or stale"""
+    target = os.path.join(output_dir, INT8_MODEL_NAME if quantize else FP32_MODEL_NAME)
+    checkpoint_mtime = max(
+        os.path.getmtime(os.path.join(model_path, name)) for name in os.listdir(model_path)
+    )
+
+    def is_fresh() -> bool:
+        return os.path.exists(target) and os.path.getmtime(target) >= checkpoint_mtime
+
+    if is_fresh():
+        return target
+
+    with _export_lock(output_dir):
+        # Another worker may have exported while this one waited for the lock
+        if is_fresh():
+            return target
+        return export_onnx_model(model_path, output_dir, quantize)
+
+
+class OnnxRiskClassifier:
+    """Thin ONNX Runtime session wrapper returning logits for tokenized batches"""
+
+    def __init__(self, onnx_path: str, num_threads: int = 0):
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            session_options.intra_op_num_threads = num_threads
+
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(
+            onnx_path, session_options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names: List[str] = [model_input.name for model_input in self.session.get_inputs()]
+
+    def predict_logits(self, batch: Dict[str, Any]) -> np.ndarray:
+        """
+        Run the model on a padded batch
+
+        Args:
+            batch: Tokenizer output with numpy arrays (return_tensors="np")
+
+        Returns:
+            Logits array of shape (batch, num_labels)
+        """
+        feeds = {name: np.asarray(batch[name], dtype=np.int64) for name in self.input_names}
+        return self.session.run(["logits"], feeds)[0]
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Numerically stable softmax over the last axis"""
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def sigmoid(logits: np.ndarray) -> np.ndarray:
+    """Element-wise logistic function"""
+    return 1.0 / (1.0 + np.exp(-logits))
+
+
+def load_onnx_classifier(
+    model_path: str,
+    output_dir: str,
+    quantize: bool = True,
+    num_threads: int = 0
+) -> Optional[OnnxRiskClassifier]:
+    """Export (if needed) and load the ONNX classifier; None if unavailable"""
+    if not ONNX_AVAILABLE:
+        logger.warning("onnxruntime not installed, ONNX risk backend unavailable")
+        return None
+
+    onnx_path = get_or_export_onnx_model(model_path, output_dir, quantize)
+    return OnnxRiskClassifier(onnx_path, num_threads)
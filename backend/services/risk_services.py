@@ -1,26 +1,158 @@
 import os
+import json
+import mmap
+import struct
+import threading
 import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from transformers import pipeline
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
 import logging
 from typing import Dict, Any, List, Optional
 import asyncio
 import re
+import time
+
+from config.settings import settings
+from services.risk_batch_services import RiskMicroBatcher
+from services.risk_onnx_services import load_onnx_classifier, sigmoid, softmax
+from utils.keyword_matcher import (
+    get_keyword_matcher, segment_bounds, RISK_FACTOR_KEYWORDS, RISK_FACTOR_GROUPS
+)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Risk factor descriptions (keywords live in utils.keyword_matcher)
+RISK_FACTOR_INFO = {
+    "payment_delay": {"description": "Risiko keterlambatan pembayaran", "severity": "Medium"},
+    "force_majeure": {"description": "Risiko force majeure", "severity": "High"},
+    "penalty_clause": {"description": "Klausul denda dan sanksi", "severity": "Medium"},
+    "termination_risk": {"description": "Risiko pembatalan kontrak", "severity": "High"},
+    "warranty_risk": {"description": "Risiko terkait garansi", "severity": "Low"},
+    "legal_compliance": {"description": "Risiko kepatuhan hukum", "severity": "Medium"}
+}
+
+# Character offsets reported per risk factor
+MAX_FACTOR_POSITIONS = 50
+
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def load_safetensors_mmap(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Load a safetensors file as tensors backed by a private memory map
+    
+    The tensors point straight into the mapped file instead of being copied
+    onto the heap, so every worker process reading the same checkpoint shares
+    the page cache pages (copy-on-write, nothing writes to inference weights).
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        weights = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    
+    data_start = 8 + header_size
+    state_dict = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        
+        dtype = _SAFETENSORS_DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        if begin == end:
+            state_dict[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        
+        count = (end - begin) // torch.tensor([], dtype=dtype).element_size()
+        state_dict[name] = torch.frombuffer(
+            weights, dtype=dtype, count=count, offset=data_start + begin
+        ).reshape(info["shape"])
+    
+    return state_dict
+
 class RiskAnalysisService:
     """Risk Analysis Service using fine-tuned Indonesian BERT model"""
     
     def __init__(self):
         self.model_path = "models/indo_finetuned/checkpoint-21"
         self.model = None
+        self.config = None
         self.tokenizer = None
-        self.classifier = None
+        self.onnx_classifier = None
+        # Sigmoid per label instead of softmax (multi-label or single-logit checkpoints)
+        self.multi_label = False
+        self.backend = "pytorch"
         self.risk_available = False
-        self._initialize_model()
+        # The model is loaded on first use (or by preload / warm-up), not at import
+        self.model_loaded = False
+        self._load_lock = threading.Lock()
+        self.batcher = RiskMicroBatcher(
+            self._forward_sequences,
+            max_batch_size=settings.RISK_MAX_BATCH_SIZE,
+            wait_ms=settings.RISK_BATCH_WAIT_MS
+        )
+    
+    def ensure_loaded(self) -> bool:
+        """Load the model once, thread-safe; returns whether it is available"""
+        if not self.model_loaded:
+            with self._load_lock:
+                if not self.model_loaded:
+                    load_start = time.perf_counter()
+                    self._initialize_model()
+                    self.model_loaded = True
+                    logger.info(f"Risk model load took {time.perf_counter() - load_start:.1f}s")
+        return self.risk_available
+    
+    async def ensure_loaded_async(self) -> bool:
+        """Load the model off the event loop so other requests keep being served"""
+        if self.model_loaded:
+            return self.risk_available
+        return await asyncio.get_event_loop().run_in_executor(None, self.ensure_loaded)
+    
+    async def warm_up(self):
+        """Load the model and run one inference so the first request is not slow"""
+        if not await self.ensure_loaded_async():
+            return
+        
+        try:
+            await asyncio.get_event_loop().run_in_executor(
+                None, self._predict_proba, ["Kontrak ini berlaku selama satu tahun."]
+            )
+            logger.info("Risk model warm-up completed")
+        except Exception as e:
+            logger.error(f"Risk model warm-up failed: {e}")
+    
+    def _load_torch_model(self):
+        """Load PyTorch weights, memory-mapping safetensors when enabled"""
+        weights_path = os.path.join(self.model_path, "model.safetensors")
+        
+        if settings.RISK_MMAP_WEIGHTS and os.path.exists(weights_path):
+            model = AutoModelForSequenceClassification.from_config(self.config)
+            state_dict = load_safetensors_mmap(weights_path)
+            try:
+                result = model.load_state_dict(state_dict, strict=False, assign=True)
+                logger.info("Risk model weights memory-mapped from safetensors")
+            except TypeError:
+                # torch < 2.1 has no assign=: weights are copied instead of shared
+                result = model.load_state_dict(state_dict, strict=False)
+                logger.warning("torch < 2.1: risk model weights copied, not memory-mapped")
+            if result.missing_keys:
+                logger.warning(f"Weights missing from checkpoint: {result.missing_keys}")
+            model.eval()
+            return model
+        
+        return AutoModelForSequenceClassification.from_pretrained(self.model_path)
     
     def _initialize_model(self):
         """Initialize the fine-tuned model and tokenizer"""
@@ -30,24 +162,41 @@ class RiskAnalysisService:
                 logger.error(f"Model path not found: {self.model_path}")
                 return
             
-            # Load tokenizer and model
+            # Load tokenizer and model config
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_path)
+            self.config = AutoConfig.from_pretrained(self.model_path)
+            
+            if settings.RISK_INFERENCE_BACKEND == "onnx":
+                # Quantized ONNX Runtime session instead of PyTorch weights
+                try:
+                    self.onnx_classifier = load_onnx_classifier(
+                        self.model_path,
+                        settings.RISK_ONNX_DIR,
+                        quantize=settings.RISK_ONNX_QUANTIZE,
+                        num_threads=settings.RISK_NUM_THREADS
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to load ONNX risk model, falling back to PyTorch: {e}")
+            
+            if self.onnx_classifier is not None:
+                self.backend = "onnx"
+                logger.info(f"Using ONNX Runtime backend: {self.onnx_classifier.onnx_path}")
+            else:
+                self.model = self._load_torch_model()
+                if torch.cuda.is_available():
+                    self.model.to("cuda")  # Use GPU if available
             
-            # Create classification pipeline
-            self.classifier = pipeline(
-                "text-classification",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if torch.cuda.is_available() else -1  # Use GPU if available
+            # Same output function the text-classification pipeline picks from the config
+            self.multi_label = (
+                self.config.problem_type == "multi_label_classification" or self.config.num_labels == 1
             )
             
             self.risk_available = True
             logger.info("Risk analysis model loaded successfully")
             
             # Print model info
-            logger.info(f"Model architecture: {self.model.config.architectures[0]}")
-            logger.info(f"Risk levels: {self.model.config.id2label}")
+            logger.info(f"Model architecture: {self.config.architectures[0]}")
+            logger.info(f"Risk levels: {self.config.id2label}")
             
         except Exception as e:
             logger.error(f"Failed to load risk analysis model: {e}")
@@ -62,23 +211,16 @@ class RiskAnalysisService:
         text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces with single space
         text = text.strip()
         
-        # Focus on risk-relevant sections
-        risk_keywords = [
-            'kewajiban', 'tanggung jawab', 'sanksi', 'denda', 'penalty',
-            'force majeure', 'pembatalan', 'terminasi', 'pelanggaran',
-            'ganti rugi', 'kompensasi', 'asuransi', 'jaminan', 'garansi',
-            'risiko', 'bahaya', 'kerugian', 'default', 'wanprestasi'
+        # Extract sentences containing risk keywords (one pass over the text)
+        text_lower = text.lower()
+        _, starts, ends = segment_bounds(text_lower, '.')
+        sentence_keywords = get_keyword_matcher().find_in_segments(
+            text_lower, starts, ends, groups=["risk_sentence"]
+        )
+        risk_relevant_sentences = [
+            sentence.strip() for sentence, keywords in zip(text.split('.'), sentence_keywords) if keywords
         ]
         
-        # Extract sentences containing risk keywords
-        sentences = text.split('.')
-        risk_relevant_sentences = []
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if any(keyword in sentence.lower() for keyword in risk_keywords):
-                risk_relevant_sentences.append(sentence)
-        
         # If no risk-relevant sentences found, use first part of contract
         if not risk_relevant_sentences:
             return text[:512]  # Limit to 512 characters for model input
@@ -101,7 +243,7 @@ class RiskAnalysisService:
         Returns:
             Risk analysis result with level and confidence
         """
-        if not self.risk_available:
+        if not await self.ensure_loaded_async():
             return {
                 "error": "Risk analysis model not available",
                 "risk_level": "Unknown",
@@ -121,31 +263,41 @@ class RiskAnalysisService:
                     "risk_factors": []
                 }
             
-            # Run risk classification in executor to avoid blocking
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.classifier(processed_text)
-            )
-            
-            # Extract results
-            risk_level = result[0]['label']
-            confidence = result[0]['score']
-            
             # Analyze specific risk factors
             risk_factors = self._identify_risk_factors(contract_text)
             
-            # Generate risk assessment
-            risk_assessment = self._generate_risk_assessment(risk_level, confidence, risk_factors)
+            if settings.RISK_WINDOWED_CLASSIFICATION and self.tokenizer.is_fast:
+                # Classify the full document with sliding windows
+                if settings.RISK_MICRO_BATCHING:
+                    windowed = await self._classify_windows_batched(contract_text)
+                else:
+                    windowed = await asyncio.get_event_loop().run_in_executor(
+                        None,
+                        self._classify_windows,
+                        contract_text
+                    )
+                result = self._build_risk_result(
+                    windowed["probabilities"], risk_factors, windowed["covered_text_length"]
+                )
+                result["window_count"] = windowed["window_count"]
+                result["windows_classified"] = windowed["windows_classified"]
+                result["section_heatmap"] = windowed["section_heatmap"]
+                return result
             
-            return {
-                "success": True,
-                "risk_level": risk_level,
-                "confidence": round(confidence, 3),
-                "risk_factors": risk_factors,
-                "risk_assessment": risk_assessment,
-                "processed_text_length": len(processed_text),
-                "model_used": "indo_finetuned_bert"
-            }
+            if settings.RISK_MICRO_BATCHING:
+                # Share the forward pass with concurrent requests
+                encoding = self.tokenizer(processed_text, truncation=True, max_length=512)
+                probabilities = await self.batcher.submit([dict(encoding)])
+                return self._build_risk_result(probabilities[0], risk_factors, len(processed_text))
+            
+            # Run risk classification in executor to avoid blocking
+            probabilities = await asyncio.get_event_loop().run_in_executor(
+                None,
+                self._predict_proba,
+                [processed_text]
+            )
+            
+            return self._build_risk_result(probabilities[0], risk_factors, len(processed_text))
             
         except Exception as e:
             logger.error(f"Risk analysis failed: {e}")
@@ -156,54 +308,391 @@ class RiskAnalysisService:
                 "risk_factors": []
             }
     
+    async def _classify_windows_batched(self, text: str) -> Dict[str, Any]:
+        """
+        Windowed classification through the micro-batcher
+        
+        Windows of concurrent requests share forward passes. The first window
+        is always classified; the others are dropped once the window time
+        budget has passed, like in _classify_windows.
+        """
+        windows = await asyncio.get_event_loop().run_in_executor(None, self._tokenize_windows, text)
+        encodings = windows["encodings"]
+        input_names = [name for name in self.tokenizer.model_input_names if name in encodings]
+        sequences = [{name: encodings[name][i] for name in input_names} for i in windows["order"]]
+        
+        deadline = time.perf_counter() + settings.RISK_WINDOW_TIME_BUDGET_MS / 1000
+        ordered_probabilities = await self.batcher.submit(sequences, deadline=deadline, min_sequences=1)
+        
+        probabilities: List[Optional[List[float]]] = [None] * windows["window_count"]
+        for window, probs in zip(windows["order"], ordered_probabilities):
+            probabilities[window] = probs
+        return self._aggregate_windows(windows, probabilities)
+    
+    async def analyze_contracts_risk_batch(self, contract_texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze many contracts with batched model inference
+        
+        All contracts are tokenized together and classified in padded
+        mini-batches of settings.RISK_BATCH_SIZE, while keyword risk factor
+        extraction runs alongside in another thread. With windowed
+        classification the windows of all contracts share one forward pass,
+        so each contract gets the same result as from analyze_contract_risk.
+        
+        Args:
+            contract_texts: Full contract texts
+            
+        Returns:
+            One risk analysis result per input text, in input order
+        """
+        if not await self.ensure_loaded_async():
+            return [{
+                "error": "Risk analysis model not available",
+                "risk_level": "Unknown",
+                "confidence": 0.0,
+                "risk_factors": []
+            } for _ in contract_texts]
+        
+        try:
+            processed_texts = [self._preprocess_contract_text(text) for text in contract_texts]
+            valid_indices = [i for i, text in enumerate(processed_texts) if text]
+            windowed = settings.RISK_WINDOWED_CLASSIFICATION and self.tokenizer.is_fast
+            
+            loop = asyncio.get_event_loop()
+            if windowed:
+                # Same sliding-window scores as analyze_contract_risk
+                classification = loop.run_in_executor(
+                    None,
+                    self._classify_windows_many,
+                    [contract_texts[i] for i in valid_indices]
+                )
+            else:
+                classification = loop.run_in_executor(
+                    None,
+                    self._predict_proba,
+                    [processed_texts[i] for i in valid_indices]
+                )
+            factor_extraction = loop.run_in_executor(
+                None,
+                lambda: [self._identify_risk_factors(contract_texts[i]) for i in valid_indices]
+            )
+            classified, risk_factors = await asyncio.gather(classification, factor_extraction)
+            
+            results: List[Dict[str, Any]] = [{
+                "error": "No text provided for risk analysis",
+                "risk_level": "Unknown",
+                "confidence": 0.0,
+                "risk_factors": []
+            } for _ in contract_texts]
+            
+            for j, i in enumerate(valid_indices):
+                if windowed:
+                    result = self._build_risk_result(
+                        classified[j]["probabilities"], risk_factors[j], classified[j]["covered_text_length"]
+                    )
+                    result["window_count"] = classified[j]["window_count"]
+                    result["windows_classified"] = classified[j]["windows_classified"]
+                    result["section_heatmap"] = classified[j]["section_heatmap"]
+                    results[i] = result
+                else:
+                    results[i] = self._build_risk_result(classified[j], risk_factors[j], len(processed_texts[i]))
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Batch risk analysis failed: {e}")
+            return [{
+                "error": f"Risk analysis failed: {str(e)}",
+                "risk_level": "Unknown",
+                "confidence": 0.0,
+                "risk_factors": []
+            } for _ in contract_texts]
+    
+    def _predict_proba(self, texts: List[str]) -> List[List[float]]:
+        """
+        Classify texts with dynamic padding
+        
+        Texts are tokenized once without padding, sorted by length and padded
+        per mini-batch only to the longest sequence in that batch.
+        
+        Returns:
+            Class probabilities per text (indexed like config.id2label)
+        """
+        if not texts:
+            return []
+        
+        encodings = self.tokenizer(texts, truncation=True, max_length=512)
+        order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+        return self._forward_batches(encodings, order)
+    
+    def _forward_sequences(self, sequences: List[Dict[str, List[int]]]) -> List[Optional[List[float]]]:
+        """Classify already tokenized sequences (micro-batcher entry point)"""
+        input_names = [name for name in self.tokenizer.model_input_names if name in sequences[0]]
+        encodings = {name: [sequence[name] for sequence in sequences] for name in input_names}
+        order = sorted(range(len(sequences)), key=lambda i: len(sequences[i]["input_ids"]))
+        return self._forward_batches(encodings, order)
+    
+    def _forward_batches(
+        self,
+        encodings: Dict[str, List[List[int]]],
+        order: List[int],
+        deadline: Optional[float] = None,
+        min_sequences: int = 1
+    ) -> List[Optional[List[float]]]:
+        """
+        Run the model over tokenized sequences in padded mini-batches
+        
+        Args:
+            encodings: Unpadded tokenizer output (one list per sequence)
+            order: Sequence indices in the order they should be processed
+            deadline: Optional time.perf_counter() deadline; remaining
+                mini-batches are skipped once it has passed
+            min_sequences: Sequences (from the start of order) processed
+                even after the deadline
+            
+        Returns:
+            Class probabilities per sequence (None for skipped sequences)
+        """
+        input_names = [name for name in self.tokenizer.model_input_names if name in encodings]
+        batch_size = max(1, settings.RISK_BATCH_SIZE)
+        probabilities: List[Optional[List[float]]] = [None] * len(encodings["input_ids"])
+        
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                if deadline is not None and start >= max(1, min_sequences) and time.perf_counter() > deadline:
+                    logger.warning(f"Risk inference time budget exceeded after {start} sequences")
+                    break
+                
+                batch_indices = order[start:start + batch_size]
+                features = {name: [encodings[name][i] for i in batch_indices] for name in input_names}
+                
+                if self.onnx_classifier is not None:
+                    batch = self.tokenizer.pad(features, return_tensors="np")
+                    logits = self.onnx_classifier.predict_logits(batch)
+                    scores = sigmoid(logits) if self.multi_label else softmax(logits)
+                    batch_probabilities = scores.tolist()
+                else:
+                    batch = self.tokenizer.pad(features, return_tensors="pt")
+                    batch = {name: tensor.to(self.model.device) for name, tensor in batch.items()}
+                    logits = self.model(**batch).logits
+                    scores = torch.sigmoid(logits) if self.multi_label else torch.softmax(logits, dim=-1)
+                    batch_probabilities = scores.tolist()
+                
+                for i, probs in zip(batch_indices, batch_probabilities):
+                    probabilities[i] = probs
+        
+        return probabilities
+    
+    def _classify_windows(self, text: str) -> Dict[str, Any]:
+        """
+        Classify the whole contract with overlapping 512-token windows
+        
+        The text is tokenized once into windows overlapping by
+        settings.RISK_WINDOW_STRIDE tokens. At most settings.RISK_MAX_WINDOWS
+        evenly spaced windows are classified within
+        settings.RISK_WINDOW_TIME_BUDGET_MS; window scores are combined into
+        a token-weighted document score plus a per-section heatmap.
+        
+        Returns:
+            Dictionary with document probabilities, covered text length and heatmap
+        """
+        windows = self._tokenize_windows(text)
+        deadline = time.perf_counter() + settings.RISK_WINDOW_TIME_BUDGET_MS / 1000
+        probabilities = self._forward_batches(windows["encodings"], windows["order"], deadline)
+        return self._aggregate_windows(windows, probabilities)
+    
+    def _classify_windows_many(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Windowed classification of several contracts in one forward pass
+        
+        The selected windows of all texts are processed together, rank by
+        rank (every text's first window, then every text's second, ...), so
+        that when the time budget (settings.RISK_WINDOW_TIME_BUDGET_MS per
+        text) runs out, each text still has its first window classified.
+        
+        Returns:
+            One _classify_windows() result per text
+        """
+        if not texts:
+            return []
+        
+        documents = [self._tokenize_windows(text) for text in texts]
+        input_names = [name for name in self.tokenizer.model_input_names if name in documents[0]["encodings"]]
+        encodings: Dict[str, List[List[int]]] = {name: [] for name in input_names}
+        flat_index: Dict[tuple, int] = {}
+        for doc, windows in enumerate(documents):
+            for window in windows["selected"]:
+                flat_index[(doc, window)] = len(flat_index)
+                for name in input_names:
+                    encodings[name].append(windows["encodings"][name][window])
+        
+        depth = max(len(windows["order"]) for windows in documents)
+        order = [
+            flat_index[(doc, windows["order"][rank])]
+            for rank in range(depth)
+            for doc, windows in enumerate(documents)
+            if rank < len(windows["order"])
+        ]
+        
+        deadline = time.perf_counter() + settings.RISK_WINDOW_TIME_BUDGET_MS * len(texts) / 1000
+        flat_probabilities = self._forward_batches(encodings, order, deadline, min_sequences=len(texts))
+        
+        results = []
+        for doc, windows in enumerate(documents):
+            probabilities: List[Optional[List[float]]] = [None] * windows["window_count"]
+            for window in windows["selected"]:
+                probabilities[window] = flat_probabilities[flat_index[(doc, window)]]
+            results.append(self._aggregate_windows(windows, probabilities))
+        return results
+    
+    def _tokenize_windows(self, text: str) -> Dict[str, Any]:
+        """
+        Split the contract into overlapping windows and pick the ones to classify
+        
+        Returns:
+            Dictionary with normalized text, encodings, offsets, window_count,
+            the selected window indices and their processing order
+        """
+        text = re.sub(r'\s+', ' ', text).strip()
+        encodings = self.tokenizer(
+            text,
+            truncation=True,
+            max_length=512,
+            stride=settings.RISK_WINDOW_STRIDE,
+            return_overflowing_tokens=True,
+            return_offsets_mapping=True
+        )
+        offsets = encodings.pop("offset_mapping")
+        encodings.pop("overflow_to_sample_mapping", None)
+        window_count = len(encodings["input_ids"])
+        
+        # Cap the number of windows, keeping evenly spaced ones (first and last included)
+        max_windows = max(1, settings.RISK_MAX_WINDOWS)
+        if window_count > max_windows:
+            step = (window_count - 1) / (max_windows - 1) if max_windows > 1 else 0
+            selected = sorted({round(k * step) for k in range(max_windows)})
+        else:
+            selected = list(range(window_count))
+        
+        # Interleave so every mini-batch spans the whole document; if the time
+        # budget runs out, the processed windows are still spread evenly
+        batch_size = max(1, settings.RISK_BATCH_SIZE)
+        stride = -(-len(selected) // batch_size)
+        order = [selected[i] for offset in range(stride) for i in range(offset, len(selected), stride)]
+        
+        return {
+            "text": text,
+            "encodings": encodings,
+            "offsets": offsets,
+            "window_count": window_count,
+            "selected": selected,
+            "order": order
+        }
+    
+    def _aggregate_windows(
+        self,
+        windows: Dict[str, Any],
+        probabilities: List[Optional[List[float]]]
+    ) -> Dict[str, Any]:
+        """Combine per-window probabilities into the document score and heatmap"""
+        text = windows["text"]
+        offsets = windows["offsets"]
+        window_count = windows["window_count"]
+        selected = windows["selected"]
+        
+        label_count = len(self.config.id2label)
+        document_probabilities = [0.0] * label_count
+        total_weight = 0
+        heatmap = []
+        
+        for window in selected:
+            probs = probabilities[window]
+            if probs is None:
+                continue
+            
+            spans = [(start, end) for start, end in offsets[window] if end > start]
+            char_start = spans[0][0] if spans else 0
+            char_end = spans[-1][1] if spans else 0
+            weight = len(spans)
+            
+            for label_index, p in enumerate(probs):
+                document_probabilities[label_index] += p * weight
+            total_weight += weight
+            
+            best_index = max(range(label_count), key=lambda i: probs[i])
+            heatmap.append({
+                "window": window,
+                "char_start": char_start,
+                "char_end": char_end,
+                "risk_level": self.config.id2label[best_index],
+                "confidence": round(probs[best_index], 3),
+                "probabilities": {
+                    self.config.id2label[i]: round(p, 3) for i, p in enumerate(probs)
+                },
+                "excerpt": text[char_start:char_start + 160]
+            })
+        
+        if total_weight:
+            document_probabilities = [p / total_weight for p in document_probabilities]
+        
+        # Characters covered by classified windows (overlaps counted once)
+        covered_chars = 0
+        covered_until = 0
+        for section in sorted(heatmap, key=lambda h: h["char_start"]):
+            start = max(section["char_start"], covered_until)
+            if section["char_end"] > start:
+                covered_chars += section["char_end"] - start
+                covered_until = section["char_end"]
+        
+        return {
+            "probabilities": document_probabilities,
+            "covered_text_length": covered_chars,
+            "window_count": window_count,
+            "windows_classified": len(heatmap),
+            "section_heatmap": heatmap
+        }
+    
+    def _build_risk_result(
+        self,
+        probabilities: List[float],
+        risk_factors: List[Dict[str, Any]],
+        processed_text_length: int
+    ) -> Dict[str, Any]:
+        """Turn class probabilities and risk factors into an analysis result"""
+        best_index = max(range(len(probabilities)), key=lambda i: probabilities[i])
+        risk_level = self.config.id2label[best_index]
+        confidence = probabilities[best_index]
+        
+        # Generate risk assessment
+        risk_assessment = self._generate_risk_assessment(risk_level, confidence, risk_factors)
+        
+        return {
+            "success": True,
+            "risk_level": risk_level,
+            "confidence": round(confidence, 3),
+            "risk_factors": risk_factors,
+            "risk_assessment": risk_assessment,
+            "processed_text_length": processed_text_length,
+            "model_used": "indo_finetuned_bert" if self.backend == "pytorch" else "indo_finetuned_bert_onnx"
+        }
+    
     def _identify_risk_factors(self, contract_text: str) -> List[Dict[str, Any]]:
         """Identify specific risk factors in contract text"""
         risk_factors = []
-        text_lower = contract_text.lower()
-        
-        # Define risk factor patterns
-        risk_patterns = {
-            "payment_delay": {
-                "keywords": ["terlambat bayar", "keterlambatan pembayaran", "denda keterlambatan"],
-                "description": "Risiko keterlambatan pembayaran",
-                "severity": "Medium"
-            },
-            "force_majeure": {
-                "keywords": ["force majeure", "keadaan kahar", "bencana alam", "pandemi"],
-                "description": "Risiko force majeure",
-                "severity": "High"
-            },
-            "penalty_clause": {
-                "keywords": ["denda", "sanksi", "penalty", "ganti rugi"],
-                "description": "Klausul denda dan sanksi",
-                "severity": "Medium"
-            },
-            "termination_risk": {
-                "keywords": ["pembatalan", "terminasi", "pemutusan kontrak"],
-                "description": "Risiko pembatalan kontrak",
-                "severity": "High"
-            },
-            "warranty_risk": {
-                "keywords": ["garansi", "jaminan", "warranty"],
-                "description": "Risiko terkait garansi",
-                "severity": "Low"
-            },
-            "legal_compliance": {
-                "keywords": ["peraturan", "undang-undang", "hukum", "regulasi"],
-                "description": "Risiko kepatuhan hukum",
-                "severity": "Medium"
-            }
-        }
+        matches = get_keyword_matcher().find(contract_text.lower(), groups=RISK_FACTOR_GROUPS)
         
-        for risk_type, risk_info in risk_patterns.items():
-            found_keywords = [kw for kw in risk_info["keywords"] if kw in text_lower]
+        for risk_type, risk_info in RISK_FACTOR_INFO.items():
+            found_keywords = [kw for kw in RISK_FACTOR_KEYWORDS[risk_type] if kw in matches]
             if found_keywords:
+                positions = sorted(pos for kw in found_keywords for pos in matches[kw])
                 risk_factors.append({
                     "type": risk_type,
                     "description": risk_info["description"],
                     "severity": risk_info["severity"],
                     "found_keywords": found_keywords,
-                    "keyword_count": len(found_keywords)
+                    "keyword_count": len(found_keywords),
+                    "occurrences": {kw: len(matches[kw]) for kw in found_keywords},
+                    "positions": positions[:MAX_FACTOR_POSITIONS]
                 })
         
         return risk_factors
@@ -262,14 +751,24 @@ class RiskAnalysisService:
             return "Kurang yakin - hasil analisis memerlukan review manual"
     
     def get_model_info(self) -> Dict[str, Any]:
-        """Get information about the risk analysis model"""
-        if not self.risk_available:
+        """Get information about the risk analysis model (loads it if needed)"""
+        if not self.ensure_loaded():
             return {"error": "Model not available"}
         
         return {
             "model_path": self.model_path,
             "model_type": "BERT for Sequence Classification",
-            "risk_levels": self.model.config.id2label if self.model else {},
+            "risk_levels": self.config.id2label if self.config else {},
             "model_available": self.risk_available,
-            "device": "GPU" if torch.cuda.is_available() else "CPU"
-        }
\ No newline at end of file
+            "backend": self.backend,
+            "onnx_model_path": self.onnx_classifier.onnx_path if self.onnx_classifier else None,
+            "device": "GPU" if torch.cuda.is_available() and self.backend == "pytorch" else "CPU"
+        }
+
+
+# Create a global instance (cheap: the model itself is loaded lazily)
+risk_service = RiskAnalysisService()
+
+def get_risk_service() -> RiskAnalysisService:
+    """Get the risk analysis service instance"""
+    return risk_service
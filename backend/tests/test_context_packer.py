@@ -0,0 +1,118 @@
+"""
+Tests for utils.context_packer: token-budgeted packing and pasal-aligned chunking
+"""
+
+import pytest
+
+from benchmarks.bench_keyword_matcher import synthesize_dump
+from utils.context_packer import (
+    ContextPacker, GAP_MARKER, TRUNCATION_NOTE, TokenCounter, token_budget, packing_summary
+)
+from utils.section_scorer import ContractSectionScorer
+
+
+@pytest.fixture(scope="module")
+def counter():
+    return TokenCounter()
+
+
+@pytest.fixture(scope="module")
+def packer(counter):
+    return ContextPacker(counter, ContractSectionScorer())
+
+
+def contract_with_pasal(pasal_count=8, lines_per_pasal=6):
+    lines = ["PERJANJIAN KERJASAMA PENGADAAN BARANG", "PT Maju Jaya selanjutnya disebut PIHAK PERTAMA"]
+    for n in range(1, pasal_count + 1):
+        lines.append(f"Pasal {n}")
+        lines.extend(f"Ketentuan {n}.{i} mengenai pelaksanaan pekerjaan oleh para pihak." for i in range(lines_per_pasal))
+    return "\n".join(lines)
+
+
+def test_heuristic_counts_words_and_symbols(counter):
+    assert counter.backend == "heuristic"
+    assert counter.count("") == 0
+    assert counter.count("Rp 5.000") == 4  # "Rp", "5", ".", "000"
+    assert counter.count("perjanjian") == 3  # 10 characters / 3.5
+    assert counter.count_batch(["a b", "c"]) == [2, 1]
+
+
+def test_short_text_is_sent_unchanged(packer):
+    text = "Pasal 1\nNilai kontrak Rp 500 juta"
+    packed = packer.pack(text, 1000)
+
+    assert packed["text"] == text
+    assert not packed["truncated"]
+    assert packed["tokens"] == packed["document_tokens"]
+
+
+def test_long_text_fits_the_budget(packer, counter):
+    text = synthesize_dump(64 * 1024)
+    packed = packer.pack(text, 500)
+
+    assert packed["truncated"]
+    assert packed["tokens"] <= 500
+    assert packed["tokens"] == counter.count(packed["text"])
+    assert packed["text"].startswith(TRUNCATION_NOTE)
+    assert packed["document_tokens"] > 500
+    assert packing_summary(packed).endswith("truncated)")
+
+
+def test_packing_keeps_high_scoring_lines_in_document_order(packer):
+    filler = ["lorem ipsum dolor sit amet consectetur"] * 200
+    text = "\n".join(["PIHAK PERTAMA: PT Maju Jaya"] + filler + ["Nilai kontrak Rp 500 juta"] + filler)
+
+    packed = packer.pack(text, 60)
+    packed_lines = packed["text"].split("\n")
+
+    assert "PIHAK PERTAMA: PT Maju Jaya" in packed_lines
+    assert "Nilai kontrak Rp 500 juta" in packed_lines
+    assert packed_lines.index("PIHAK PERTAMA: PT Maju Jaya") < packed_lines.index("Nilai kontrak Rp 500 juta")
+    assert GAP_MARKER in packed_lines
+
+
+def test_token_budget_reserves_template_and_completion(counter):
+    template = "Analisis kontrak berikut: {text}"
+    budget = token_budget(counter, 8192, 6000, 1000, template)
+
+    assert budget == min(6000, 8192 - counter.count(template) - 1000 - int(8192 * 0.05))
+    assert token_budget(counter, 8192, 100, 1000, template) == 100
+    assert token_budget(counter, 1000, 6000, 2000) == 0
+
+
+def test_chunks_cover_the_text_in_order(packer):
+    text = contract_with_pasal()
+    chunks = packer.chunk(text, 120)
+
+    assert len(chunks) > 1
+    assert "\n".join(chunk["text"] for chunk in chunks) == text
+    assert [chunk["first_line"] for chunk in chunks] == sorted(chunk["first_line"] for chunk in chunks)
+    assert all(chunk["tokens"] <= 120 for chunk in chunks)
+
+
+def test_chunks_start_at_pasal_headings(packer):
+    chunks = packer.chunk(contract_with_pasal(), 400)
+
+    assert len(chunks) > 1
+    assert chunks[0]["first_line"] == 0
+    for chunk in chunks[1:]:
+        assert chunk["text"].startswith("Pasal ")
+
+
+def test_pasal_larger_than_budget_is_split_between_lines(packer):
+    text = contract_with_pasal(pasal_count=1, lines_per_pasal=40)
+    chunks = packer.chunk(text, 60)
+
+    assert len(chunks) > 1
+    assert "\n".join(chunk["text"] for chunk in chunks) == text
+    assert all(chunk["tokens"] <= 60 for chunk in chunks)
+
+
+def test_max_chunks_keeps_first_and_best_scoring_chunks(packer):
+    lines = contract_with_pasal(pasal_count=6).split("\n")
+    lines.insert(lines.index("Pasal 5") + 1, "Nilai kontrak Rp 500 juta berakhir tanggal 3 januari 2025")
+    chunks = packer.chunk("\n".join(lines), 70, max_chunks=2)
+
+    assert len(chunks) == 2
+    assert chunks[0]["first_line"] == 0
+    assert "Nilai kontrak Rp 500 juta" in chunks[1]["text"]
@@ -0,0 +1,116 @@
+"""
+Tests for services.cache_services.ExtractionCache
+"""
+
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from services import cache_services
+from services.cache_services import ExtractionCache, has_page_errors, is_cacheable_text
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    """Count directory scans of the disk tier"""
+    calls = []
+    real_scandir = os.scandir
+
+    def scandir(path):
+        calls.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(cache_services.os, "scandir", scandir)
+    return calls
+
+
+def entry_size(text):
+    return len(text) + 80  # JSON envelope of a short entry
+
+
+def test_entries_survive_a_new_instance(tmp_path):
+    ExtractionCache(str(tmp_path)).put("abc", "Pasal 1", "OCR", ocr_file_path="/tmp/x.txt", pages=[])
+
+    entry = ExtractionCache(str(tmp_path)).get("abc")
+    assert (entry["text"], entry["method"], entry["ocr_file_path"], entry["pages"]) == ("Pasal 1", "OCR", "/tmp/x.txt", [])
+
+
+def test_hits_and_misses_are_counted(tmp_path):
+    cache = ExtractionCache(str(tmp_path), max_memory_items=1)
+    cache.put("a", "teks a", "PDF")
+    cache.put("b", "teks b", "PDF")
+
+    assert cache.get("b")["text"] == "teks b"  # memory
+    assert cache.get("a")["text"] == "teks a"  # disk, "a" left memory
+    assert cache.get("missing") is None
+    assert cache.get_stats()["hits"] == 2
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_unreadable_entry_is_discarded(tmp_path):
+    cache = ExtractionCache(str(tmp_path))
+    with open(os.path.join(str(tmp_path), "bad.json"), "w") as f:
+        f.write("{not json")
+
+    assert cache.get("bad") is None
+    assert not os.path.exists(os.path.join(str(tmp_path), "bad.json"))
+
+
+def test_directory_is_scanned_only_when_over_budget(tmp_path, scans):
+    cache = ExtractionCache(str(tmp_path), max_disk_bytes=10_000)
+    for i in range(5):
+        cache.put(f"k{i}", "x" * 100, "PDF")
+
+    # The first write measures the directory, later ones are tracked
+    assert len(scans) == 1
+
+    cache.put("big", "x" * 10_000, "PDF")
+    assert len(scans) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ExtractionCache(str(tmp_path), max_disk_bytes=3 * entry_size("x" * 400), max_memory_items=0)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, "x" * 400, "PDF")
+        os.utime(os.path.join(str(tmp_path), f"{key}.json"), (1000 + i, 1000 + i))
+
+    # Reading "a" makes it the most recently used entry
+    assert cache.get("a") is not None
+    cache.put("d", "x" * 400, "PDF")
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+
+
+def test_replacing_an_entry_does_not_grow_the_tracked_size(tmp_path, scans):
+    cache = ExtractionCache(str(tmp_path), max_disk_bytes=3 * entry_size("x" * 400))
+    for _ in range(10):
+        cache.put("same", "x" * 400, "PDF")
+
+    assert len(scans) == 1
+
+
+def test_async_variants(tmp_path):
+    async def roundtrip():
+        cache = ExtractionCache(str(tmp_path))
+        await cache.put_async("k", "Pasal 1", "PDF", pages=[{"page_number": 1, "ocr_dpi": 300}])
+        from_memory = await cache.get_async("k")
+        from_disk = await ExtractionCache(str(tmp_path)).get_async("k")
+        missing = await cache.get_async("missing")
+        return from_memory, from_disk, missing
+
+    from_memory, from_disk, missing = asyncio.run(roundtrip())
+    assert from_memory["text"] == from_disk["text"] == "Pasal 1"
+    assert from_disk["pages"] == [{"page_number": 1, "ocr_dpi": 300}]
+    assert missing is None
+
+
+def test_cacheable_text_checks():
+    assert is_cacheable_text("--- Page 1 ---\nPasal 1")
+    assert not is_cacheable_text("   ")
+    assert not is_cacheable_text("OCR extraction failed: tesseract not found")
+    assert has_page_errors("--- Page 1 ---\nPasal 1\n\n--- Page 2 (Error) ---\nOCR failed: crash")
+    assert not has_page_errors("--- Page 1 ---\nPasal 1")
@@ -0,0 +1,102 @@
+"""
+Tests for utils.field_merger.merge_contract_fields
+"""
+
+import pytest
+
+from utils.field_merger import is_informative, merge_contract_fields
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, False),
+    ("", False),
+    ("  Tidak disebutkan. ", False),
+    ("N/A", False),
+    ({"name": "-", "address": ""}, False),
+    (["", None], False),
+    ("PT Maju Jaya", True),
+    (0, True),
+    ({"name": "", "address": "Jakarta"}, True),
+])
+def test_is_informative(value, expected):
+    assert is_informative(value) is expected
+
+
+def test_informative_values_win_over_placeholders():
+    merged, conflicts = merge_contract_fields([
+        {"contract_name": "Perjanjian Sewa", "contract_value": "tidak disebutkan"},
+        {"contract_name": "", "contract_value": "Rp 500.000.000"},
+    ])
+
+    assert merged == {"contract_name": "Perjanjian Sewa", "contract_value": "Rp 500.000.000"}
+    assert conflicts == {}
+
+
+def test_first_chunk_wins_for_title_and_type():
+    merged, conflicts = merge_contract_fields([
+        {"contract_name": "Perjanjian Sewa", "contract_type": "Sewa"},
+        {"contract_name": "Lampiran I", "contract_type": "Sewa"},
+    ])
+
+    assert merged["contract_name"] == "Perjanjian Sewa"
+    assert conflicts == {"contract_name": ["Perjanjian Sewa", "Lampiran I"]}
+
+
+def test_dates_vote_for_well_formed_values():
+    merged, conflicts = merge_contract_fields([
+        {"contract_end_date": "akhir tahun"},
+        {"contract_end_date": "31 Desember 2025"},
+        {"contract_end_date": "akhir tahun"},
+    ])
+
+    assert merged["contract_end_date"] == "31 Desember 2025"
+    assert set(conflicts["contract_end_date"]) == {"akhir tahun", "31 Desember 2025"}
+
+
+def test_most_frequent_value_wins_ties_go_to_earliest():
+    merged, _ = merge_contract_fields([
+        {"contract_duration": "12 bulan"},
+        {"contract_duration": "1 tahun"},
+        {"contract_duration": "1 Tahun"},
+        {"contract_duration": "6 bulan"},
+    ])
+    assert merged["contract_duration"] == "1 tahun"
+
+    merged, _ = merge_contract_fields([{"contract_duration": "12 bulan"}, {"contract_duration": "1 tahun"}])
+    assert merged["contract_duration"] == "12 bulan"
+
+
+def test_parties_skip_generic_names_and_fill_subfields():
+    merged, conflicts = merge_contract_fields([
+        {"first_party": {"name": "PIHAK PERTAMA", "address": "Jakarta"}},
+        {"first_party": {"name": "PT Maju Jaya", "address": ""}},
+        {"first_party": {"name": "pt maju jaya", "address": "Jl. Raya No. 5, Jakarta"}},
+    ])
+
+    assert merged["first_party"] == {"name": "PT Maju Jaya", "address": "Jl. Raya No. 5, Jakarta"}
+    assert "first_party" not in conflicts
+
+
+def test_party_conflicts_are_reported():
+    _, conflicts = merge_contract_fields([
+        {"second_party": {"name": "CV Sinar Abadi"}},
+        {"second_party": {"name": "CV Sinar Jaya"}},
+    ])
+
+    assert [party["name"] for party in conflicts["second_party"]] == ["CV Sinar Abadi", "CV Sinar Jaya"]
+
+
+def test_key_terms_are_concatenated_without_duplicates():
+    merged, conflicts = merge_contract_fields([
+        {"key_terms": ["Denda 1%", "garansi 12 bulan"]},
+        {"key_terms": ["denda 1%", "", "pemutusan sepihak"]},
+    ])
+
+    assert merged["key_terms"] == ["Denda 1%", "garansi 12 bulan", "pemutusan sepihak"]
+    assert conflicts == {}
+
+
+def test_fields_missing_everywhere_keep_a_placeholder():
+    merged, _ = merge_contract_fields([{"contract_value": "-"}, {"contract_value": None, "extra": "x"}])
+
+    assert merged == {"contract_value": "-", "extra": "x"}
@@ -0,0 +1,168 @@
+"""
+Tests for services.groq_rate_services (token buckets and the Groq rate controller)
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from services import groq_rate_services
+from services.groq_rate_services import GroqRateController, TokenBucket, retry_after_seconds
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(headers or {})
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_bucket_starts_full_and_refills_over_a_minute():
+    bucket = TokenBucket(600)
+    now = bucket.updated
+
+    assert bucket.wait_time(600, now) == 0
+    assert bucket.consume(600) == 600
+    assert bucket.wait_time(10, now) == pytest.approx(1.0)
+    assert bucket.wait_time(10, now + 1.0) == pytest.approx(0.0)
+
+
+def test_bucket_charges_at_most_its_limit():
+    bucket = TokenBucket(3000)
+
+    assert bucket.charge(7500) == 3000
+    assert bucket.consume(7500) == 3000
+    assert bucket.level == 0
+    # An oversized request waits for a full bucket, not forever
+    assert bucket.wait_time(7500, bucket.updated) == pytest.approx(60.0)
+
+
+def test_bucket_refund_is_capped_at_the_limit():
+    bucket = TokenBucket(100)
+    bucket.consume(30)
+    bucket.refund(50)
+
+    assert bucket.level == 100
+
+
+def test_unlimited_bucket_never_waits_or_charges():
+    bucket = TokenBucket(0)
+
+    assert bucket.wait_time(10 ** 6, bucket.updated) == 0
+    assert bucket.consume(10 ** 6) == 0
+    bucket.refund(10)
+    assert bucket.level == 0
+
+
+def test_record_usage_refunds_only_what_was_charged():
+    controller = GroqRateController(tokens_per_minute=3000)
+    run(controller._admit(7500))
+    controller.record_usage(7500, 4500)
+
+    # 4500 tokens used against a 3000 charge: nothing comes back
+    assert controller.tokens.level == pytest.approx(0, abs=1)
+
+
+def test_record_usage_refunds_over_estimate():
+    controller = GroqRateController(tokens_per_minute=6000)
+    run(controller._admit(2000))
+    controller.record_usage(2000, 1200)
+
+    assert controller.tokens.level == pytest.approx(6000 - 1200, abs=1)
+
+
+def test_record_usage_without_usage_keeps_the_charge():
+    controller = GroqRateController(tokens_per_minute=6000)
+    run(controller._admit(2000))
+    controller.record_usage(2000, None)
+
+    assert controller.tokens.level == pytest.approx(4000, abs=1)
+
+
+def test_admission_consumes_one_request_per_attempt():
+    controller = GroqRateController(requests_per_minute=30, tokens_per_minute=0)
+
+    async def request():
+        return "ok"
+
+    assert run(controller.call(request, 100)) == "ok"
+    assert controller.requests.level == pytest.approx(29, abs=0.01)
+    assert controller.get_stats()["requests"] == 1
+
+
+def test_rate_limited_request_is_retried_after_retry_after():
+    controller = GroqRateController(tokens_per_minute=0, max_retries=2, backoff_base=0.001)
+    calls = []
+
+    async def request():
+        calls.append(1)
+        if len(calls) == 1:
+            raise FakeAPIError(429, {"retry-after-ms": "10"})
+        return "ok"
+
+    assert run(controller.call(request, 100)) == "ok"
+    stats = controller.get_stats()
+    assert len(calls) == 2
+    assert stats["rate_limited"] == 1
+    assert stats["retries"] == 1
+    assert stats["failed"] == 0
+
+
+def test_non_retryable_error_is_raised_at_once():
+    controller = GroqRateController(tokens_per_minute=0, max_retries=2)
+    calls = []
+
+    async def request():
+        calls.append(1)
+        raise FakeAPIError(400)
+
+    with pytest.raises(FakeAPIError):
+        run(controller.call(request, 100))
+    assert len(calls) == 1
+    assert controller.get_stats()["failed"] == 1
+
+
+def test_retries_stop_after_max_retries():
+    controller = GroqRateController(tokens_per_minute=0, max_retries=2, backoff_base=0.001)
+    calls = []
+
+    async def request():
+        calls.append(1)
+        raise FakeAPIError(503)
+
+    with pytest.raises(FakeAPIError):
+        run(controller.call(request, 100))
+    assert len(calls) == 3
+    assert controller.get_stats()["server_errors"] == 3
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(FakeAPIError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(FakeAPIError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(FakeAPIError(429)) is None
+
+
+def test_worker_share_splits_limits():
+    assert groq_rate_services._worker_share(6000, 2) == 3000
+    assert groq_rate_services._worker_share(0, 4) == 0
+    assert groq_rate_services._worker_share(3, 8) == 1
+
+
+def test_default_budgets_fit_two_workers():
+    settings = groq_rate_services.settings
+    tokens_per_minute = groq_rate_services._worker_share(settings.GROQ_RATE_LIMIT_TPM, 2)
+
+    assert groq_rate_services.check_token_budget(tokens_per_minute)
+    assert not groq_rate_services.check_token_budget(1000)
+    assert groq_rate_services.check_token_budget(0)
@@ -0,0 +1,61 @@
+"""
+Tests for how GroqService combines rule-based fields with Groq
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("httpx")
+pytest.importorskip("groq")
+
+from services import groq_services
+from services.groq_services import GroqService
+from tests.test_rule_extractor import CONTRACT
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(groq_services.settings, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(groq_services.settings, "RULE_EXTRACTOR_ENABLED", True)
+    monkeypatch.setattr(groq_services.settings, "LLM_CACHE_ENABLED", False)
+    service = GroqService()
+    service.requests = []
+
+    async def chat_completion(messages, max_tokens, temperature, template_version=None, cache_input=None):
+        service.requests.append(messages[-1]["content"])
+        return {
+            "content": json.dumps({"contract_end_date": "31 Desember 2026", "key_terms": ["denda keterlambatan"]}),
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20},
+            "cached": False
+        }
+
+    service._chat_completion = chat_completion
+    return service
+
+
+def test_rules_alone_answer_a_textbook_contract(service):
+    result = asyncio.run(service.analyze_contract_details(CONTRACT))
+
+    assert service.requests == []
+    assert result["groq_analysis"] is False
+    assert result["key_terms"] == ["Pasal 3: JANGKA WAKTU", "Pasal 4: NILAI KONTRAK"]
+    assert result["field_sources"]["key_terms"] == "rules_fallback"
+    assert result["field_sources"]["contract_type"] == "rules_fallback"
+    assert result["field_sources"]["contract_end_date"] == "rules"
+
+
+def test_unresolved_field_asks_groq_for_it_and_the_descriptive_fields(service):
+    text = CONTRACT.replace(" sampai dengan tanggal 28-02-2026", "")
+
+    result = asyncio.run(service.analyze_contract_details(text))
+
+    assert len(service.requests) == 1
+    prompt = service.requests[0]
+    assert '"contract_end_date"' in prompt and '"key_terms"' in prompt and '"contract_type"' in prompt
+    assert '"first_party"' not in prompt
+    assert result["key_terms"] == ["denda keterlambatan"]
+    assert result["field_sources"]["key_terms"] == "groq"
+    assert result["field_sources"]["first_party"] == "rules"
@@ -0,0 +1,78 @@
+"""
+Regression tests for utils.indonesian_dates
+
+The date cases live in benchmarks/data/indonesian_dates.tsv, shared with
+benchmarks/bench_indonesian_dates.py.
+"""
+
+import datetime
+
+import pytest
+
+from benchmarks.bench_indonesian_dates import DEFAULT_CORPUS, load_corpus
+from utils.indonesian_dates import find_dates, normalize_date, parse_number_words
+
+CORPUS = load_corpus(DEFAULT_CORPUS)
+
+
+def test_corpus_is_not_empty():
+    assert len(CORPUS) >= 30
+
+
+@pytest.mark.parametrize("text, expected", CORPUS, ids=[text[:40] for text, _ in CORPUS])
+def test_normalize_date_corpus(text, expected):
+    assert normalize_date(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("nol", 0),
+    ("lima", 5),
+    ("sepuluh", 10),
+    ("sebelas", 11),
+    ("lima belas", 15),
+    ("dua puluh", 20),
+    ("dua puluh lima", 25),
+    ("tiga puluh satu", 31),
+    ("seratus dua puluh", 120),
+    ("dua ratus sebelas", 211),
+    ("seribu sembilan ratus sembilan puluh delapan", 1998),
+    ("dua ribu dua puluh empat", 2024),
+    ("dua-puluh-lima", 25),
+    ("  Dua Puluh Lima ", 25),
+    ("dua belas ribu lima ratus", 12500),
+    ("satu juta dua ratus ribu", 1200000),
+    ("2025", 2025),
+])
+def test_parse_number_words(text, expected):
+    assert parse_number_words(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "dua dua",
+    "lima lima belas",
+    "dua puluh dua puluh",
+    "seratus seratus",
+    "sebelas dua",
+    "puluh",
+    "belas",
+    "nol puluh",
+    "dua ribu dua ribu",
+    "dua ribu tiga juta",
+    "dua puluh februari",
+])
+def test_parse_number_words_rejects_malformed(text):
+    assert parse_number_words(text) is None
+
+
+def test_find_dates_offsets_and_order():
+    text = "Berlaku sejak 1 Maret 2025 sampai dengan tanggal 28-02-2026."
+    found = list(find_dates(text))
+
+    assert [date for _, _, date in found] == [datetime.date(2025, 3, 1), datetime.date(2026, 2, 28)]
+    assert text[found[0][0]:found[0][1]] == "1 Maret 2025"
+    assert text[found[1][0]:found[1][1]].endswith("28-02-2026")
+
+
+def test_repeated_unit_day_is_not_a_date():
+    assert normalize_date("Dua Dua Mei Dua Ribu Dua Puluh Lima") is None
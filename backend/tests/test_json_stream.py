@@ -0,0 +1,66 @@
+"""
+Tests for utils.json_stream.IncrementalJSONParser
+"""
+
+import json
+
+import pytest
+
+from utils.json_stream import IncrementalJSONParser
+
+DOCUMENT = {
+    "contract_name": "Perjanjian \"Kerjasama\" {Pengadaan}",
+    "first_party": {"name": "PT Maju Jaya", "address": "Jl. Raya [No. 5]"},
+    "contract_value": 500000000,
+    "key_terms": ["denda 1%", "garansi \\ 12 bulan"],
+    "signed": True,
+    "notes": None,
+    "contract_end_date": "28 Februari 2026",
+}
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    completed = []
+    for start in range(0, len(text), size):
+        completed.append(parser.feed(text[start:start + size]))
+    return parser, completed
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, 10000])
+def test_fields_match_json_loads_for_any_chunking(size):
+    text = "```json\n" + json.dumps(DOCUMENT, indent=2) + "\n```"
+    parser, completed = feed_in_chunks(text, size)
+
+    assert [field for chunk in completed for field in chunk] == list(DOCUMENT.items())
+    assert parser.fields == list(DOCUMENT.items())
+    assert parser.done
+    assert parser.result() == DOCUMENT
+
+
+def test_fields_are_reported_as_soon_as_complete():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"contract_name": "Perjanjian') == []
+    assert parser.feed(' Sewa", "contract_value": 12') == [("contract_name", "Perjanjian Sewa")]
+    # A number is only complete at the following comma or closing brace
+    assert parser.feed('5') == []
+    assert parser.feed('}') == [("contract_value", 125)]
+    assert parser.done
+
+
+def test_text_after_the_object_is_ignored():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": [1, {"b": 2}]} trailing {"c": 3}')
+
+    assert parser.fields == [("a", [1, {"b": 2}])]
+    assert parser.result() == {"a": [1, {"b": 2}]}
+
+
+def test_incomplete_object_has_no_result():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1, "b": {"c"')
+
+    assert parser.fields == [("a", 1)]
+    assert not parser.done
+    assert parser.result() is None
@@ -0,0 +1,54 @@
+"""
+Tests for utils.keyword_matcher: the regex fallback and pyahocorasick must
+report the same keywords as per-keyword substring scans
+"""
+
+import pytest
+
+from benchmarks.bench_keyword_matcher import build_matcher, matched, naive, synthesize_dump
+from utils.keyword_matcher import AHOCORASICK_AVAILABLE, KeywordMatcher, segment_bounds
+
+BACKENDS = [False] + ([True] if AHOCORASICK_AVAILABLE else [])
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda automaton: "pyahocorasick" if automaton else "regex")
+def use_automaton(request):
+    return request.param
+
+
+def test_matches_substring_scans_on_synthesized_dump(use_automaton):
+    text = synthesize_dump(64 * 1024)
+    assert matched(build_matcher(use_automaton), text) == naive(text)
+
+
+def test_reports_overlapping_and_prefix_keywords(use_automaton):
+    matcher = KeywordMatcher({"a": ["pihak", "pihak pertama", "pertama"], "b": ["ma"]}, use_automaton)
+
+    found = matcher.find("pihak pertama dan pihak kedua")
+
+    assert found == {"pihak": [0, 18], "pihak pertama": [0], "pertama": [6], "ma": [11]}
+
+
+def test_groups_filter_keywords(use_automaton):
+    matcher = KeywordMatcher({"risk": ["denda", "sanksi"], "section": ["nilai", "denda"]}, use_automaton)
+    text = "nilai kontrak, denda dan sanksi"
+
+    assert set(matcher.find(text, groups=["risk"])) == {"denda", "sanksi"}
+    assert set(matcher.find(text, groups=["section"])) == {"nilai", "denda"}
+    assert matcher.find(text, groups=["unknown"]) == {}
+
+
+def test_find_in_segments_ignores_keywords_across_boundaries(use_automaton):
+    matcher = KeywordMatcher({"section": ["pihak pertama", "nilai"]}, use_automaton)
+    text = "pihak\npertama nilai\n  nilai  "
+    _, starts, ends = segment_bounds(text, "\n")
+
+    assert matcher.find_in_segments(text, starts, ends) == [set(), {"nilai"}, {"nilai"}]
+
+
+def test_segment_bounds_match_stripped_split():
+    text = "  satu. dua .\ttiga\t.."
+    segments, starts, ends = segment_bounds(text, ".")
+
+    assert segments == text.split(".")
+    assert [text[start:end] for start, end in zip(starts, ends)] == [s.strip() for s in segments]
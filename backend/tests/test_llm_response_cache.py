@@ -0,0 +1,89 @@
+"""
+Tests for services.cache_services.LLMResponseCache
+"""
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from services import cache_services
+from services.cache_services import LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(db_path=str(tmp_path / "llm.db"), ttl_seconds=100, max_bytes=1000)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache_services.time, "time", lambda: now[0])
+    return now
+
+
+def make_key(text, model="llama", template="v1", max_tokens=512, temperature=0.1):
+    return LLMResponseCache.make_key(model, template, text, max_tokens, temperature)
+
+
+def test_key_ignores_whitespace_differences():
+    assert make_key("PERJANJIAN  KERJA\nSAMA\n\n Pasal 1 ") == make_key("PERJANJIAN KERJA SAMA Pasal 1")
+
+
+def test_key_changes_with_every_request_parameter():
+    base = make_key("Pasal 1")
+
+    assert make_key("Pasal 2") != base
+    assert make_key("pasal 1") != base
+    assert make_key("Pasal 1", model="other") != base
+    assert make_key("Pasal 1", template="v2") != base
+    assert make_key("Pasal 1", max_tokens=256) != base
+    assert make_key("Pasal 1", temperature=0.2) != base
+
+
+def test_put_then_get_returns_content_and_usage(cache):
+    usage = {"prompt_tokens": 900, "completion_tokens": 100}
+    cache.put("k", "llama", "v1", '{"a": 1}', usage, 850.0)
+
+    assert cache.get("k") == {"content": '{"a": 1}', "usage": usage, "latency_ms": 850.0}
+    assert cache.get("missing") is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["saved_prompt_tokens"] == 900
+    assert stats["saved_latency_ms"] == 850.0
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.put("k", "llama", "v1", "{}")
+
+    clock[0] += 99
+    assert cache.get("k") is not None
+    clock[0] += 2
+    assert cache.get("k") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_over_budget(cache, clock):
+    for key in ("a", "b", "c"):
+        cache.put(key, "llama", "v1", "x" * 400)
+        clock[0] += 1
+    # "c" pushed the store to 1200 bytes: the oldest entry goes
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    clock[0] += 1
+
+    # "b" was read after "c" was written, so "c" is now least recently used
+    cache.put("d", "llama", "v1", "x" * 400)
+    assert cache.get("c") is None
+    assert cache.get("b") is not None
+    assert cache.get("d") is not None
+    assert cache.get_stats()["size_bytes"] == 800
+
+
+def test_expired_entries_are_dropped_on_write(cache, clock):
+    cache.put("old", "llama", "v1", "{}")
+    clock[0] += 101
+    cache.put("new", "llama", "v1", "{}")
+
+    assert cache.get_stats()["entries"] == 1
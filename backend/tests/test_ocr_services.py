@@ -0,0 +1,78 @@
+"""
+Tests for the streaming OCR pass of services.ocr_services.OCRService
+"""
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("fastapi")
+pytest.importorskip("pdf2image")
+
+from services import ocr_services
+from services.ocr_services import OCRService
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Fake page renderer and OCR worker recording when the document is closed"""
+    events = []
+
+    def iter_pages(pdf_path, dpi, pages):
+        try:
+            for page in pages:
+                time.sleep(0.01)
+                yield page, f"image {page}"
+        finally:
+            time.sleep(0.1)  # Closing a large document takes a while
+            events.append("closed")
+
+    def ocr_page(image, language, with_confidence=False):
+        if image == "image 2":
+            raise RuntimeError("tesseract crashed")
+        time.sleep(0.02)
+        return {"text": f"text of {image}", "confidence": 90.0}
+
+    real_remove = ocr_services.os.remove
+
+    def remove(path):
+        events.append("removed")
+        real_remove(path)
+
+    monkeypatch.setattr(ocr_services, "iter_pdf_pages", iter_pages)
+    monkeypatch.setattr(ocr_services, "_ocr_page_worker", ocr_page)
+    monkeypatch.setattr(ocr_services, "get_ocr_executor", lambda: None)
+    monkeypatch.setattr(ocr_services.os, "remove", remove)
+    return events
+
+
+def test_pages_are_returned_in_order_with_errors(pipeline):
+    progress = []
+    results = asyncio.run(OCRService().ocr_pdf_bytes(
+        b"%PDF", 200, pages=[1, 2, 3], adaptive=False,
+        progress_callback=lambda done, total, dpi: progress.append((done, total, dpi))
+    ))
+
+    assert [(r["page"], r["text"], r["dpi"]) for r in results] == [
+        (1, "text of image 1", 200), (2, "", 200), (3, "text of image 3", 200)
+    ]
+    assert results[1]["error"] == "tesseract crashed"
+    assert progress == [(1, 3, 200), (2, 3, 200), (3, 3, 200)]
+    assert pipeline == ["closed", "removed"]
+
+
+def test_cancelled_pass_closes_the_document_before_removing_the_file(pipeline):
+    async def cancel_midway():
+        task = asyncio.ensure_future(
+            OCRService().ocr_pdf_bytes(b"%PDF", 200, pages=list(range(1, 50)), adaptive=False)
+        )
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+
+    assert pipeline == ["closed", "removed"]
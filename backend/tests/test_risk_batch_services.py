@@ -0,0 +1,173 @@
+"""
+Tests for services.risk_batch_services.RiskMicroBatcher
+"""
+
+import asyncio
+import threading
+import time
+
+from services.risk_batch_services import RiskMicroBatcher
+
+
+def features(value):
+    return {"input_ids": [value]}
+
+
+class RecordingForward:
+    """Fake forward pass returning [id, id] per sequence and recording each batch"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, sequences):
+        self.batches.append([sequence["input_ids"][0] for sequence in sequences])
+        if self.error is not None:
+            raise self.error
+        return [[float(sequence["input_ids"][0])] * 2 for sequence in sequences]
+
+
+def test_concurrent_submits_share_one_batch_in_order():
+    forward = RecordingForward()
+    batcher = RiskMicroBatcher(forward, max_batch_size=32, wait_ms=50)
+
+    async def submit_all():
+        results = await asyncio.gather(
+            batcher.submit([features(1), features(2)]),
+            batcher.submit([features(3)]),
+            batcher.submit([features(4), features(5), features(6)]),
+        )
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(submit_all())
+
+    assert forward.batches == [[1, 2, 3, 4, 5, 6]]
+    assert results == [
+        [[1.0, 1.0], [2.0, 2.0]],
+        [[3.0, 3.0]],
+        [[4.0, 4.0], [5.0, 5.0], [6.0, 6.0]],
+    ]
+    stats = batcher.get_stats()
+    assert (stats["requests"], stats["batches"], stats["batch_size_histogram"]) == (3, 1, {6: 1})
+
+
+def test_full_batch_is_split_at_max_batch_size():
+    forward = RecordingForward()
+    batcher = RiskMicroBatcher(forward, max_batch_size=4, wait_ms=50)
+
+    async def submit_all():
+        results = await asyncio.gather(
+            batcher.submit([features(i) for i in range(3)]),
+            batcher.submit([features(i) for i in range(3, 6)]),
+        )
+        await batcher.stop()
+        return results
+
+    first, second = asyncio.run(submit_all())
+
+    assert forward.batches == [[0, 1, 2, 3], [4, 5]]
+    assert [probs[0] for probs in first + second] == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_max_wait_flushes_a_partial_batch():
+    forward = RecordingForward()
+    batcher = RiskMicroBatcher(forward, max_batch_size=32, wait_ms=20)
+
+    async def submit_one():
+        start = time.perf_counter()
+        result = await asyncio.wait_for(batcher.submit([features(7)]), timeout=5)
+        elapsed = time.perf_counter() - start
+        await batcher.stop()
+        return result, elapsed
+
+    result, elapsed = asyncio.run(submit_one())
+
+    assert result == [[7.0, 7.0]]
+    assert forward.batches == [[7]]
+    assert 0.015 <= elapsed < 1.0
+
+
+def test_late_submit_starts_a_new_batch():
+    forward = RecordingForward()
+    batcher = RiskMicroBatcher(forward, max_batch_size=32, wait_ms=10)
+
+    async def submit_apart():
+        first = asyncio.ensure_future(batcher.submit([features(1)]))
+        await asyncio.sleep(0.1)
+        second = await batcher.submit([features(2)])
+        results = [await first, second]
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(submit_apart())
+
+    assert forward.batches == [[1], [2]]
+    assert results == [[[1.0, 1.0]], [[2.0, 2.0]]]
+
+
+def test_failed_forward_pass_reaches_every_request_in_the_batch():
+    forward = RecordingForward(error=RuntimeError("CUDA out of memory"))
+    batcher = RiskMicroBatcher(forward, max_batch_size=32, wait_ms=50)
+
+    async def submit_all():
+        results = await asyncio.gather(
+            batcher.submit([features(1), features(2)]),
+            batcher.submit([features(3)]),
+            return_exceptions=True,
+        )
+        # The worker survives a failed batch
+        forward.error = None
+        after = await batcher.submit([features(4)])
+        await batcher.stop()
+        return results, after
+
+    results, after = asyncio.run(submit_all())
+
+    assert forward.batches == [[1, 2, 3], [4]]
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert all(str(result) == "CUDA out of memory" for result in results)
+    assert after == [[4.0, 4.0]]
+    assert batcher.get_stats()["failed_batches"] == 1
+
+
+def test_sequences_past_the_deadline_are_skipped():
+    forward = RecordingForward()
+    batcher = RiskMicroBatcher(forward, max_batch_size=32, wait_ms=5)
+
+    async def submit_expired():
+        deadline = time.perf_counter() - 1
+        result = await batcher.submit([features(1), features(2), features(3)], deadline=deadline, min_sequences=1)
+        await batcher.stop()
+        return result
+
+    result = asyncio.run(submit_expired())
+
+    # The leading sequence is exempt from the deadline
+    assert result == [[1.0, 1.0], None, None]
+    assert forward.batches == [[1]]
+    assert batcher.get_stats()["expired_sequences"] == 2
+
+
+def test_stop_cancels_running_and_queued_requests():
+    release = threading.Event()
+    forward = RecordingForward()
+
+    def blocking_forward(sequences):
+        release.wait(5)
+        return forward(sequences)
+
+    batcher = RiskMicroBatcher(blocking_forward, max_batch_size=1, wait_ms=0)
+
+    async def stop_midway():
+        running = asyncio.ensure_future(batcher.submit([features(1)]))
+        queued = asyncio.ensure_future(batcher.submit([features(2)]))
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        release.set()
+        return await asyncio.gather(running, queued, return_exceptions=True)
+
+    results = asyncio.run(stop_midway())
+
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert forward.batches == [[1]]
@@ -0,0 +1,120 @@
+"""
+Tests for services.risk_services.RiskAnalysisService with a tiny random BERT
+"""
+
+import asyncio
+import itertools
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from services import risk_services
+from services.risk_services import RiskAnalysisService
+
+WORDS = [
+    "kontrak", "pihak", "pertama", "kedua", "pembayaran", "denda", "keterlambatan",
+    "pemutusan", "force", "majeure", "garansi", "pasal", "jangka", "waktu", "nilai",
+    "hukum", "sengketa", "bulan", "tahun", "hari", "dan", "yang", "dengan", "atas",
+]
+
+SHORT_TEXT = "Pasal 1. Pihak pertama wajib membayar denda atas keterlambatan pembayaran."
+
+
+def long_text(seed: int, words: int = 1500) -> str:
+    return " ".join(WORDS[(i * 7 + seed) % len(WORDS)] for i in range(words)) + "."
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("tiny_risk_model")
+    vocab = path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "."] + WORDS) + "\n")
+    tokenizer = transformers.BertTokenizerFast(vocab_file=str(vocab))
+    config = transformers.BertConfig(
+        vocab_size=tokenizer.vocab_size,
+        hidden_size=32,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=512,
+        num_labels=3,
+        id2label={0: "Low", 1: "Medium", 2: "High"},
+        label2id={"Low": 0, "Medium": 1, "High": 2},
+    )
+    torch.manual_seed(0)
+    model = transformers.BertForSequenceClassification(config)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return str(path)
+
+
+@pytest.fixture
+def service(model_dir, monkeypatch):
+    monkeypatch.setattr(risk_services.settings, "RISK_INFERENCE_BACKEND", "pytorch")
+    monkeypatch.setattr(risk_services.settings, "RISK_WINDOWED_CLASSIFICATION", True)
+    monkeypatch.setattr(risk_services.settings, "RISK_WINDOW_TIME_BUDGET_MS", 60_000)
+    monkeypatch.setattr(risk_services.settings, "RISK_MAX_WINDOWS", 16)
+    monkeypatch.setattr(risk_services.settings, "RISK_BATCH_SIZE", 4)
+    service = RiskAnalysisService()
+    service.model_path = model_dir
+    assert service.ensure_loaded()
+    return service
+
+
+def summary(result):
+    return (
+        result["risk_level"],
+        result["confidence"],
+        result["processed_text_length"],
+        result["window_count"],
+        result["windows_classified"],
+    )
+
+
+@pytest.mark.parametrize("micro_batching", [False, True])
+def test_batch_matches_single_analysis(service, monkeypatch, micro_batching):
+    monkeypatch.setattr(risk_services.settings, "RISK_MICRO_BATCHING", micro_batching)
+    texts = [long_text(0), SHORT_TEXT, long_text(5, words=3000)]
+
+    async def analyze():
+        singles = [await service.analyze_contract_risk(text) for text in texts]
+        batch = await service.analyze_contracts_risk_batch(texts)
+        await service.batcher.stop()
+        return singles, batch
+
+    singles, batch = asyncio.run(analyze())
+
+    assert [summary(result) for result in batch] == [summary(result) for result in singles]
+    for single, batched in zip(singles, batch):
+        assert [h["window"] for h in batched["section_heatmap"]] == [h["window"] for h in single["section_heatmap"]]
+        for h_single, h_batched in zip(single["section_heatmap"], batched["section_heatmap"]):
+            for label, p in h_single["probabilities"].items():
+                assert h_batched["probabilities"][label] == pytest.approx(p, abs=2e-3)
+    # Long contracts are classified beyond the first 512 tokens
+    assert batch[0]["window_count"] > 1
+
+
+def test_batch_keeps_empty_texts_in_place(service):
+    results = asyncio.run(service.analyze_contracts_risk_batch(["", SHORT_TEXT, "   "]))
+
+    assert results[0]["error"] == "No text provided for risk analysis"
+    assert results[1]["success"]
+    assert results[2]["error"] == "No text provided for risk analysis"
+
+
+def test_batch_classifies_every_first_window_after_deadline(service, monkeypatch):
+    monkeypatch.setattr(risk_services.settings, "RISK_WINDOW_TIME_BUDGET_MS", 0)
+    clock = itertools.count()
+    monkeypatch.setattr(time, "perf_counter", lambda: float(next(clock)))
+    texts = [long_text(seed) for seed in range(6)]
+
+    results = service._classify_windows_many(texts)
+
+    # 6 first windows are exempt from the budget; RISK_BATCH_SIZE is 4, so
+    # two mini-batches run and nothing after them
+    assert [result["windows_classified"] for result in results] == [2, 2, 1, 1, 1, 1]
+    assert all(result["section_heatmap"][0]["window"] == 0 for result in results)
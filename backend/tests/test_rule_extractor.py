@@ -0,0 +1,120 @@
+"""
+Tests for utils.rule_extractor.extract_contract_fields
+"""
+
+from utils.rule_extractor import CONTRACT_FIELDS, RULE_REQUIRED_FIELDS, extract_contract_fields
+
+CONTRACT = """PERJANJIAN KERJASAMA
+TENTANG PENGADAAN BARANG DAN JASA
+Nomor: 012/PKS/II/2025
+
+Pada hari ini, Kamis tanggal 20 Februari 2025, kami yang bertanda tangan di bawah ini:
+
+1. PT Maju Jaya Sentosa Tbk, berkedudukan di Jl. Sudirman No. 10, Jakarta Selatan, dalam hal ini diwakili oleh Budi Santoso selaku Direktur, yang selanjutnya disebut PIHAK PERTAMA.
+2. CV. Sinar Abadi, beralamat di Jl. Merdeka No. 5, Bandung, dalam hal ini diwakili oleh Ani, selanjutnya disebut sebagai "PIHAK KEDUA".
+
+Pasal 3
+JANGKA WAKTU
+Perjanjian ini berlaku selama 12 (dua belas) bulan terhitung sejak tanggal 1 Maret 2025 sampai dengan tanggal 28-02-2026.
+
+Pasal 4
+NILAI KONTRAK
+Nilai kontrak pekerjaan ini adalah sebesar Rp. 500.000.000,- (lima ratus juta rupiah) termasuk PPN. Denda Rp 1.000.000 per hari.
+"""
+
+
+def values(fields):
+    return {field: found["value"] for field, found in fields.items()}
+
+
+def test_textbook_contract():
+    fields = extract_contract_fields(CONTRACT)
+
+    assert values(fields) == {
+        "contract_name": "PERJANJIAN KERJASAMA TENTANG PENGADAAN BARANG DAN JASA",
+        "contract_type": "Kerjasama",
+        "first_party": {
+            "name": "PT Maju Jaya Sentosa Tbk", "type": "perusahaan", "address": "Jl. Sudirman No. 10, Jakarta Selatan"
+        },
+        "second_party": {"name": "CV. Sinar Abadi", "type": "perusahaan", "address": "Jl. Merdeka No. 5, Bandung"},
+        "contract_start_date": "1 Maret 2025",
+        "contract_end_date": "28 Februari 2026",
+        "contract_value": "Rp 500.000.000,-",
+        "contract_duration": "12 bulan",
+        "key_terms": ["Pasal 3: JANGKA WAKTU", "Pasal 4: NILAI KONTRAK"],
+    }
+    assert fields["first_party"]["confidence"] == 0.9
+    assert fields["contract_end_date"]["confidence"] == 0.85
+
+
+def test_only_known_fields_with_confidences():
+    fields = extract_contract_fields(CONTRACT)
+
+    assert set(fields) <= set(CONTRACT_FIELDS)
+    assert all(0 < found["confidence"] <= 1 for found in fields.values())
+
+
+def test_empty_and_unstructured_text():
+    assert extract_contract_fields("") == {}
+    assert extract_contract_fields("catatan rapat mingguan tim pengadaan") == {}
+
+
+def test_party_header_and_person_forms():
+    text = (
+        "PIHAK PERTAMA : PT Cipta Karya Mandiri\n"
+        "Nama : Siti Rahma, beralamat di Jl. Melati No. 3, Depok; selanjutnya disebut PIHAK KEDUA.\n"
+    )
+    fields = extract_contract_fields(text)
+
+    assert fields["first_party"] == {"value": {"name": "PT Cipta Karya Mandiri", "type": "perusahaan"}, "confidence": 0.85}
+    assert fields["second_party"]["value"]["name"] == "Siti Rahma"
+    assert fields["second_party"]["value"]["type"] == "individu"
+    assert fields["second_party"]["confidence"] == 0.75
+
+
+def test_same_party_name_lowers_confidence():
+    text = (
+        "PT Sama Sama, selanjutnya disebut PIHAK PERTAMA.\n"
+        "PT Sama Sama, selanjutnya disebut PIHAK KEDUA.\n"
+    )
+    fields = extract_contract_fields(text)
+
+    assert fields["first_party"]["confidence"] == fields["second_party"]["confidence"] == 0.4
+
+
+def test_spelled_out_dates_need_a_cue():
+    text = (
+        "Perjanjian ini mulai berlaku pada tanggal Dua Puluh bulan Februari tahun Dua Ribu Dua Puluh Lima "
+        "dan berakhir pada Tiga Puluh Satu Desember Dua Ribu Dua Puluh Enam.\n"
+        "Ditandatangani di Jakarta, 5 Januari 2025."
+    )
+    fields = extract_contract_fields(text)
+
+    assert fields["contract_start_date"]["value"] == "20 Februari 2025"
+    assert fields["contract_end_date"]["value"] == "31 Desember 2026"
+
+
+def test_textbook_contract_resolves_every_field_needed_to_skip_the_llm():
+    fields = extract_contract_fields(CONTRACT)
+
+    assert all(fields[field]["confidence"] >= 0.8 for field in RULE_REQUIRED_FIELDS)
+    assert set(CONTRACT_FIELDS) - set(RULE_REQUIRED_FIELDS) == {"contract_type", "key_terms"}
+
+
+def test_key_terms_from_article_headings():
+    text = (
+        "PERJANJIAN SEWA MENYEWA\n"
+        "PASAL 1 - RUANG LINGKUP\nPihak pertama menyewakan gedung.\n"
+        "Pasal II: Harga Sewa.\nHarga sewa Rp 10.000.000.\n"
+        "Pasal 3\n\nPEMBAYARAN\nDibayar setiap bulan.\n"
+        "Pasal 4\n(1) Uraian yang bukan judul.\n"
+        "sebagaimana dimaksud dalam Pasal 1 di atas.\n"
+    )
+
+    key_terms = extract_contract_fields(text)["key_terms"]
+    assert key_terms["value"] == ["Pasal 1: RUANG LINGKUP", "Pasal II: Harga Sewa", "Pasal 3: PEMBAYARAN"]
+    assert key_terms["confidence"] < 0.8
+
+
+def test_single_heading_is_not_a_summary():
+    assert "key_terms" not in extract_contract_fields("Pasal 1\nRUANG LINGKUP\nIsi pasal.")
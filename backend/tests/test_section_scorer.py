@@ -0,0 +1,114 @@
+"""
+Tests for utils.section_scorer: scores must equal the per-line scoring loop
+that _extract_relevant_contract_sections used before ContractSectionScorer
+"""
+
+import random
+import re
+
+import pytest
+
+from benchmarks.bench_keyword_matcher import synthesize_dump
+from utils.keyword_matcher import get_keyword_matcher, segment_bounds, SECTION_KEYWORDS, ADDRESS_INDICATORS
+from utils.section_scorer import (
+    ContractSectionScorer, DATE_PATTERNS, MONEY_PATTERNS, load_section_weights
+)
+
+SUPER_HIGH_KEYWORDS = ['pihak pertama', 'pihak kedua', 'nama', 'nilai', 'tanggal', 'berakhir']
+HIGH_KEYWORDS = ['alamat', 'direktur', 'harga', 'berlaku', 'rupiah', 'rp']
+
+
+def reference_score_lines(text):
+    """The old per-line loop: one re.search per money / date pattern and line"""
+    text_lower = text.lower()
+    _, line_starts, line_ends = segment_bounds(text_lower, '\n')
+    line_keywords = get_keyword_matcher().find_in_segments(
+        text_lower, line_starts, line_ends, groups=["section", "address"]
+    )
+
+    scored_lines = []
+    for i, line in enumerate(text.split('\n')):
+        line_stripped = line.strip()
+        if not line_stripped or len(line_stripped) < 5:
+            continue
+
+        line_lower = line_stripped.lower()
+        score = 0
+        for keyword in line_keywords[i] & set(SECTION_KEYWORDS):
+            if keyword in SUPER_HIGH_KEYWORDS:
+                score += 25
+            elif keyword in HIGH_KEYWORDS:
+                score += 15
+            else:
+                score += 8
+
+        for pattern in MONEY_PATTERNS + DATE_PATTERNS:
+            if re.search(pattern, line_lower):
+                score += 20
+
+        capitalized_words = [w for w in line_stripped.split() if len(w) > 2 and w[0].isupper()]
+        if len(capitalized_words) >= 2:
+            score += 10
+        if line_keywords[i] & set(ADDRESS_INDICATORS):
+            score += 12
+
+        if i < 50:
+            score += 5
+        elif i < 100:
+            score += 2
+        if len(line) > 300:
+            score -= 5
+
+        scored_lines.append((score, i, line))
+    return scored_lines
+
+
+FRAGMENTS = [
+    "rp", "Rp.", "rp 5", "rupiah", "5", "12", "2024", "-", "/", "juta", "milyar", "$", "januari", "Mei",
+    "12-05-2024", "2024/01/15", "10 rupiah", "5juta", "3 januari 24", "PT", "Maju", "Jaya", "nilai",
+    "tanggal", "alamat", "jalan", "Pihak Pertama", "berakhir", "\n", " ", "abc"
+]
+
+
+def fuzz_texts(count, seed=3):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(FRAGMENTS) + rng.choice(["", " "]) for _ in range(rng.randint(3, 30)))
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return ContractSectionScorer(load_section_weights())
+
+
+def test_same_scores_as_reference_on_synthesized_dump(scorer):
+    text = synthesize_dump(128 * 1024)
+    assert scorer.score_lines(text) == reference_score_lines(text)
+
+
+def test_same_scores_as_reference_on_fuzzed_lines(scorer):
+    for text in fuzz_texts(3000):
+        assert scorer.score_lines(text) == reference_score_lines(text), text
+
+
+@pytest.mark.parametrize("line, money, date", [
+    ("Nilai kontrak Rp. 500 juta (lima ratus juta rupiah)", 2, 0),
+    ("sebesar 10 rupiah atau $ 5", 2, 0),
+    ("berlaku 12-05-2024 sampai 2025/05/12", 0, 2),
+    ("tanggal 3 januari 2024", 0, 1),
+    ("rp\n5 juta", 0, 0),
+])
+def test_line_features_count_distinct_patterns(scorer, line, money, date):
+    features = scorer.line_features(line)[0]
+    assert (features["money_patterns"], features["date_patterns"]) == (money, date)
+
+
+def test_weights_file_overrides_and_merges_keywords(tmp_path):
+    path = tmp_path / "weights.json"
+    path.write_text('{"money_pattern": 1, "keywords": {"nilai": 2}}', encoding="utf-8")
+
+    weights = load_section_weights(str(path))
+
+    assert weights["money_pattern"] == 1
+    assert weights["keywords"]["nilai"] == 2
+    assert weights["keywords"]["pihak pertama"] == 25
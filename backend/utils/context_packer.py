@@ -0,0 +1,267 @@
+"""
+Token-budgeted context packing for LLM prompts
+
+Counts tokens with the target model's tokenizer (Hugging Face `tokenizers`,
+when configured and installed) or a conservative heuristic, and fills a token
+budget with the highest-scoring contract lines, or splits a long contract
+into pasal-aligned chunks that each fit the budget.
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Tuple
+
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
+from utils.section_scorer import ContractSectionScorer
+
+# Words and single non-space symbols
+_PIECE_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+# Indonesian words are long and split into more BPE pieces than English;
+# ~3.5 characters per token keeps the estimate on the safe side
+HEURISTIC_CHARS_PER_TOKEN = 3.5
+
+# "Pasal 3", "PASAL IV", "Bab 2" at the start of a line
+PASAL_HEADING_PATTERN = re.compile(r'^\s*(?:pasal|bab)\s+(?:\d+|[ivxlc]+)\b', re.IGNORECASE)
+
+TRUNCATION_NOTE = "[Dokumen dipotong untuk fokus pada informasi kontrak penting]"
+GAP_MARKER = "[...]"
+
+
+class TokenCounter:
+    """Count tokens with a Hugging Face tokenizer, or estimate them"""
+
+    def __init__(self, tokenizer_name: str = ""):
+        """
+        Args:
+            tokenizer_name: tokenizer.json path or Hugging Face hub name of the
+                target model's tokenizer; empty to use the heuristic
+        """
+        self.tokenizer = None
+        self.backend = "heuristic"
+
+        if tokenizer_name and TOKENIZERS_AVAILABLE:
+            try:
+                if tokenizer_name.endswith(".json"):
+                    self.tokenizer = Tokenizer.from_file(tokenizer_name)
+                else:
+                    self.tokenizer = Tokenizer.from_pretrained(tokenizer_name)
+                self.backend = "tokenizer"
+                print(f"Token counting with tokenizer: {tokenizer_name}")
+            except Exception as e:
+                print(f"Failed to load tokenizer {tokenizer_name}: {e}, using token estimate")
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text"""
+        return self.count_batch([text])[0]
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        """Number of tokens in each text"""
+        if self.tokenizer is not None:
+            encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+            return [len(encoding.ids) for encoding in encodings]
+
+        return [
+            sum(
+                math.ceil(len(piece) / HEURISTIC_CHARS_PER_TOKEN) for piece in _PIECE_PATTERN.findall(text)
+            )
+            for text in texts
+        ]
+
+
+class ContextPacker:
+    """Fit contract text into a token budget, keeping the most relevant lines"""
+
+    def __init__(self, counter: TokenCounter, scorer: ContractSectionScorer):
+        self.counter = counter
+        self.scorer = scorer
+
+    def _assemble(self, selected: List[int], lines: List[str], note: bool) -> str:
+        """Join selected line indices in document order with gap markers"""
+        result_lines = []
+        last_idx = -1
+        for line_idx in sorted(selected):
+            # Add gap indicator if we skipped many lines
+            if line_idx > last_idx + 5:
+                result_lines.append(GAP_MARKER)
+            result_lines.append(lines[line_idx])
+            last_idx = line_idx
+
+        result_text = '\n'.join(result_lines)
+        if note:
+            result_text = f"{TRUNCATION_NOTE}\n\n{result_text}"
+        return result_text
+
+    def pack(self, text: str, budget_tokens: int) -> Dict[str, Any]:
+        """
+        Pack text into at most budget_tokens tokens
+
+        Args:
+            text: Full contract text
+            budget_tokens: Token budget for the text part of the prompt
+
+        Returns:
+            Dictionary with packed text, its token count, the document token
+            count, budget, whether lines were dropped and the counter backend
+        """
+        lines = text.split('\n')
+        line_tokens = self.counter.count_batch(lines)
+        # Each newline is counted as one extra token
+        document_tokens = sum(line_tokens) + len(lines) - 1
+
+        if document_tokens <= budget_tokens:
+            return self._result(text, document_tokens, document_tokens, budget_tokens, False)
+
+        # Highest-scoring lines first, while they fit
+        scored_lines = sorted(self.scorer.score_lines(text), key=lambda x: x[0], reverse=True)
+        selected: List[int] = []
+        selected_scores: Dict[int, int] = {}
+        used = self.counter.count(TRUNCATION_NOTE) + 2
+
+        for score, line_idx, _ in scored_lines:
+            if score <= 0:
+                break
+            cost = line_tokens[line_idx] + 1
+            if used + cost <= budget_tokens:
+                selected.append(line_idx)
+                selected_scores[line_idx] = score
+                used += cost
+
+        packed = self._assemble(selected, lines, note=True)
+        packed_tokens = self.counter.count(packed)
+
+        # Gap markers were not budgeted per line; drop the weakest lines if needed
+        while selected and packed_tokens > budget_tokens:
+            selected.remove(min(selected, key=lambda idx: selected_scores[idx]))
+            packed = self._assemble(selected, lines, note=True)
+            packed_tokens = self.counter.count(packed)
+
+        return self._result(packed, packed_tokens, document_tokens, budget_tokens, True)
+
+    def chunk(self, text: str, budget_tokens: int, max_chunks: int = 0) -> List[Dict[str, Any]]:
+        """
+        Split text into chunks of at most budget_tokens tokens along pasal headings
+        
+        Consecutive pasal are grouped while they fit; a pasal larger than the
+        budget is split between lines. With max_chunks, the first chunk
+        (title and parties) and the highest-scoring other chunks are kept.
+        
+        Args:
+            text: Full contract text
+            budget_tokens: Token budget per chunk
+            max_chunks: Maximum number of chunks (0: no limit)
+        
+        Returns:
+            Chunks in document order, as dicts with text, tokens and first_line
+        """
+        lines = text.split('\n')
+        line_tokens = self.counter.count_batch(lines)
+        budget_tokens = max(1, budget_tokens)
+        
+        # Pasal sections as [start, end) line ranges
+        section_starts = [0] + [
+            i for i, line in enumerate(lines) if i > 0 and PASAL_HEADING_PATTERN.match(line)
+        ]
+        sections = list(zip(section_starts, section_starts[1:] + [len(lines)]))
+        
+        ranges: List[Tuple[int, int, int]] = []  # (start, end, tokens)
+        current_start, current_tokens = 0, 0
+        for start, end in sections:
+            section_tokens = sum(line_tokens[start:end]) + (end - start)
+            if current_tokens and current_tokens + section_tokens <= budget_tokens:
+                current_tokens += section_tokens
+                continue
+            if current_tokens:
+                ranges.append((current_start, start, current_tokens))
+            if section_tokens <= budget_tokens:
+                current_start, current_tokens = start, section_tokens
+                continue
+            
+            # Pasal larger than the budget: split it between lines
+            current_start, current_tokens = start, 0
+            for i in range(start, end):
+                cost = line_tokens[i] + 1
+                if current_tokens and current_tokens + cost > budget_tokens:
+                    ranges.append((current_start, i, current_tokens))
+                    current_start, current_tokens = i, 0
+                current_tokens += cost
+        if current_tokens:
+            ranges.append((current_start, len(lines), current_tokens))
+        
+        if max_chunks and len(ranges) > max_chunks:
+            line_scores = {line_idx: score for score, line_idx, _ in self.scorer.score_lines(text) if score > 0}
+            ranked = sorted(
+                range(1, len(ranges)),
+                key=lambda idx: sum(line_scores.get(i, 0) for i in range(ranges[idx][0], ranges[idx][1])),
+                reverse=True
+            )
+            keep = sorted([0] + ranked[:max_chunks - 1])
+            ranges = [ranges[idx] for idx in keep]
+        
+        return [
+            {"text": '\n'.join(lines[start:end]), "tokens": tokens, "first_line": start}
+            for start, end, tokens in ranges
+        ]
+    
+    def _result(
+        self,
+        text: str,
+        tokens: int,
+        document_tokens: int,
+        budget_tokens: int,
+        truncated: bool
+    ) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "tokens": tokens,
+            "document_tokens": document_tokens,
+            "budget_tokens": budget_tokens,
+            "truncated": truncated,
+            "token_counter": self.counter.backend
+        }
+
+
+def token_budget(
+    counter: TokenCounter,
+    context_window: int,
+    input_budget: int,
+    max_tokens: int,
+    *template_parts: str,
+    safety_margin: float = 0.05
+) -> int:
+    """
+    Tokens available for document text in one request
+
+    The prompt template (everything but the document) and the completion
+    (max_tokens) are reserved from the model context window, and the result
+    is capped at the configured input budget.
+
+    Args:
+        counter: Token counter for the target model
+        context_window: Model context length in tokens
+        input_budget: Configured maximum document tokens per request
+        max_tokens: Completion tokens requested
+        template_parts: System prompt and user prompt without the document
+        safety_margin: Fraction of the window kept free for estimate error
+            and chat formatting tokens
+
+    Returns:
+        Document token budget (at least 0)
+    """
+    template_tokens = sum(counter.count_batch(list(template_parts))) if template_parts else 0
+    available = context_window - template_tokens - max_tokens - int(context_window * safety_margin)
+    return max(0, min(input_budget, available))
+
+
+def packing_summary(packed: Dict[str, Any]) -> str:
+    """One log line describing a packing result"""
+    note = ", truncated" if packed["truncated"] else ""
+    return (
+        f"Context: {packed['tokens']} of {packed['document_tokens']} document tokens sent "
+        f"(budget {packed['budget_tokens']}, {packed['token_counter']}{note})"
+    )
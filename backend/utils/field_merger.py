@@ -0,0 +1,147 @@
+"""
+Field-by-field merge of contract details extracted from separate chunks
+
+Each chunk of a long contract only sees part of the document, so most of its
+fields are empty or placeholders. Merging keeps the informative value of
+each field and records fields where chunks disagreed.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+PARTY_FIELDS = ("first_party", "second_party")
+# Title and type are stated at the top of the contract: the first chunk that has them wins
+FIRST_CHUNK_FIELDS = ("contract_name", "contract_type")
+DATE_FIELDS = ("contract_start_date", "contract_end_date")
+LIST_FIELDS = ("key_terms",)
+MAX_LIST_ITEMS = 15
+
+# Values models use when a chunk does not contain the field
+PLACEHOLDER_VALUES = {
+    "", "-", "n/a", "na", "none", "null", "tidak ada", "tidak disebutkan", "tidak diketahui",
+    "tidak tersedia", "tidak tercantum", "belum ditentukan", "unknown"
+}
+GENERIC_PARTY_NAMES = {"pihak pertama", "pihak kedua", "pihak kesatu", "pihak ketiga"}
+
+DATE_PATTERN = re.compile(
+    r'\d{1,2}\s+(?:januari|februari|maret|april|mei|juni|juli|agustus|september|oktober|november|desember)\s+\d{4}'
+    r'|\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|\d{4}[-/]\d{1,2}[-/]\d{1,2}',
+    re.IGNORECASE
+)
+
+
+def is_informative(value: Any) -> bool:
+    """Whether a field value carries information (not empty or a placeholder)"""
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return value.strip().lower().rstrip(".") not in PLACEHOLDER_VALUES
+    if isinstance(value, dict):
+        return any(is_informative(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(is_informative(item) for item in value)
+    return True
+
+
+def _party_name(value: Any) -> str:
+    name = value.get("name") if isinstance(value, dict) else value
+    return str(name or "").strip()
+
+
+def _merge_party(candidates: List[Any]) -> Any:
+    """First specific party name wins; missing subfields are filled from chunks naming the same party"""
+    named = [
+        value for value in candidates
+        if is_informative(_party_name(value)) and _party_name(value).lower() not in GENERIC_PARTY_NAMES
+    ]
+    if not named:
+        return candidates[0]
+
+    chosen = named[0]
+    if not isinstance(chosen, dict):
+        return chosen
+
+    merged = dict(chosen)
+    name = _party_name(chosen).lower()
+    for value in named[1:]:
+        if isinstance(value, dict) and _party_name(value).lower() == name:
+            for key, item in value.items():
+                if not is_informative(merged.get(key)) and is_informative(item):
+                    merged[key] = item
+    return merged
+
+
+def _vote(candidates: List[Any], well_formed=None) -> Any:
+    """Most frequent value (well-formed ones first); ties go to the earliest chunk"""
+    if well_formed is not None:
+        preferred = [value for value in candidates if well_formed(value)]
+        candidates = preferred or candidates
+
+    counts = Counter(str(value).strip().lower() for value in candidates)
+    best = max(counts.values())
+    for value in candidates:
+        if counts[str(value).strip().lower()] == best:
+            return value
+
+
+def _merge_list(candidates: List[Any]) -> List[Any]:
+    merged, seen = [], set()
+    for value in candidates:
+        for item in value if isinstance(value, list) else [value]:
+            key = str(item).strip().lower()
+            if is_informative(item) and key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged[:MAX_LIST_ITEMS]
+
+
+def merge_contract_fields(results: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, List[Any]]]:
+    """
+    Merge per-chunk extraction results into one
+
+    Args:
+        results: Parsed JSON per chunk, in document order
+
+    Returns:
+        (merged fields, conflicts) where conflicts maps each field the chunks
+        disagreed on to its distinct informative values
+    """
+    fields: List[str] = []
+    for result in results:
+        fields.extend(field for field in result if field not in fields)
+
+    merged: Dict[str, Any] = {}
+    conflicts: Dict[str, List[Any]] = {}
+
+    for field in fields:
+        candidates = [result[field] for result in results if is_informative(result.get(field))]
+        if not candidates:
+            merged[field] = next((result[field] for result in results if field in result), None)
+            continue
+
+        if field in LIST_FIELDS:
+            merged[field] = _merge_list(candidates)
+            continue
+
+        if field in PARTY_FIELDS:
+            merged[field] = _merge_party(candidates)
+            candidates = [
+                value for value in candidates if _party_name(value).lower() not in GENERIC_PARTY_NAMES
+            ]
+            distinct = {_party_name(value).lower() for value in candidates}
+        else:
+            if field in FIRST_CHUNK_FIELDS:
+                merged[field] = candidates[0]
+            elif field in DATE_FIELDS:
+                merged[field] = _vote(candidates, lambda value: bool(DATE_PATTERN.search(str(value))))
+            elif field == "contract_value":
+                merged[field] = _vote(candidates, lambda value: any(char.isdigit() for char in str(value)))
+            else:
+                merged[field] = _vote(candidates)
+            distinct = {str(value).strip().lower() for value in candidates}
+
+        if len(distinct) > 1:
+            conflicts[field] = list({str(value).strip().lower(): value for value in candidates}.values())
+
+    return merged, conflicts
@@ -0,0 +1,192 @@
+"""
+Parsing of Indonesian dates, including spelled-out numbers
+
+Contracts often write dates in words ("Dua Puluh Bulan Februari Tahun Dua
+Ribu Dua Puluh Lima", "tanggal 20 (dua puluh) bulan Februari tahun 2025").
+The patterns and word tables are built once at import; parse_number_words()
+handles any number up to the millions, so every day, month and year is
+covered.
+"""
+
+import datetime
+import re
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
+
+MONTHS = [
+    "Januari", "Februari", "Maret", "April", "Mei", "Juni",
+    "Juli", "Agustus", "September", "Oktober", "November", "Desember"
+]
+
+# Month spellings (lowercase) -> month number, including old spellings and abbreviations
+MONTH_NUMBERS = {name.lower(): index + 1 for index, name in enumerate(MONTHS)}
+MONTH_NUMBERS.update({
+    "pebruari": 2, "nopember": 11,
+    "jan": 1, "feb": 2, "peb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7,
+    "agu": 8, "ags": 8, "agt": 8, "agus": 8, "sep": 9, "sept": 9, "okt": 10, "nov": 11, "nop": 11, "des": 12
+})
+
+DIGIT_WORDS = {
+    "nol": 0, "satu": 1, "dua": 2, "tiga": 3, "empat": 4,
+    "lima": 5, "enam": 6, "tujuh": 7, "delapan": 8, "sembilan": 9
+}
+# "se-" forms: one ten / eleven / one hundred / one thousand
+SE_WORDS = {"sepuluh": 10, "sebelas": 11, "seratus": 100}
+MULTIPLIER_WORDS = {"belas", "puluh", "puluhan", "ratus"}
+SCALE_WORDS = {"seribu": 1000, "ribu": 1000, "juta": 1_000_000}
+
+_NUMBER_WORD = "(?:" + "|".join(
+    sorted(list(DIGIT_WORDS) + list(SE_WORDS) + list(MULTIPLIER_WORDS) + list(SCALE_WORDS), key=len, reverse=True)
+) + ")"
+_NUMBER_PHRASE = rf"{_NUMBER_WORD}(?:[\s-]+{_NUMBER_WORD})*"
+_NUMBER = rf"(?:\d{{1,4}}|{_NUMBER_PHRASE})"
+# Spelled-out repetition after a number: "20 (dua puluh)"
+_PARENTHETICAL = r"(?:\s*\([^)\n]{0,60}\))?"
+_MONTH = "(?:" + "|".join(sorted(MONTH_NUMBERS, key=len, reverse=True)) + r")\.?"
+
+_WORD_SPLIT = re.compile(r"[\s-]+")
+
+# "[tanggal] <day> [bulan] <month> [tahun] <year>", numbers in digits or words;
+# matched against lowercased text
+SPELLED_DATE_PATTERN = re.compile(
+    rf"\b(?:tanggal\s+)?(?P<day>{_NUMBER}){_PARENTHETICAL}[\s,]+(?:bulan\s+)?(?P<month>{_MONTH}){_PARENTHETICAL}"
+    rf"[\s,]+(?:tahun\s+)?(?P<year>{_NUMBER})\b{_PARENTHETICAL}"
+)
+NUMERIC_DATE_PATTERN = re.compile(r"\b(\d{1,4})[-/](\d{1,2})[-/](\d{1,4})\b")
+
+
+def parse_number_words(text: str) -> Optional[int]:
+    """
+    Value of a spelled-out Indonesian number
+
+    "dua puluh lima" -> 25, "sebelas" -> 11, "dua ribu dua puluh empat" -> 2024.
+    Digits are accepted as well. Returns None if text is not a number.
+    """
+    return _parse_number_words(text.strip().lower())
+
+
+# Contracts repeat the same few day/year phrases
+@lru_cache(maxsize=2048)
+def _parse_number_words(text: str) -> Optional[int]:
+    if text.isdigit():
+        return int(text)
+
+    words = [word for word in _WORD_SPLIT.split(text) if word]
+    if not words:
+        return None
+
+    total = 0
+    group = 0         # value below the current thousand
+    place = 3         # next part of the group must be below this place (2: hundreds, 1: tens, 0: units)
+    last_scale = 0    # ribu / juta must come in decreasing order
+    digit = None      # digit word waiting for a following belas / puluh / ratus
+    for word in words:
+        if digit is not None and word not in MULTIPLIER_WORDS:
+            # The pending digit is the units place ("dua dua" fails here)
+            if place == 0:
+                return None
+            group += digit
+            place = 0
+            digit = None
+
+        if word in DIGIT_WORDS:
+            digit = DIGIT_WORDS[word]
+            continue
+
+        if word in MULTIPLIER_WORDS:
+            if not digit:
+                return None
+            if word == "ratus":
+                value, word_place = digit * 100, 2
+            elif word == "belas":
+                value, word_place = digit + 10, 1
+            else:
+                value, word_place = digit * 10, 1
+            digit = None
+        elif word in SE_WORDS:
+            value = SE_WORDS[word]
+            word_place = 2 if value == 100 else 1
+        elif word in SCALE_WORDS:
+            scale = SCALE_WORDS[word]
+            if (last_scale and scale >= last_scale) or (word == "seribu" and group):
+                return None
+            total += (group or 1) * scale
+            group = 0
+            place = 3
+            last_scale = scale
+            continue
+        else:
+            return None
+
+        if word_place >= place:
+            return None
+        group += value
+        # Teens fill the tens and the units place
+        place = 0 if word in ("belas", "sebelas") else word_place
+
+    if digit is not None:
+        if place == 0:
+            return None
+        group += digit
+    return total + group
+
+
+def _to_date(day: int, month: int, year: int) -> Optional[datetime.date]:
+    if year < 100:
+        year += 2000
+    if not 1900 <= year <= 2200:
+        return None
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
+
+
+def find_dates(text: str) -> Iterator[Tuple[int, int, datetime.date]]:
+    """
+    Yield (start, end, date) for every date in text
+
+    Covers spelled-out and month-name dates ("dua puluh bulan februari tahun
+    dua ribu dua puluh lima", "20 Februari 2025") and numeric DD-MM-YYYY /
+    YYYY-MM-DD dates, in text order. Offsets refer to text.lower().
+    """
+    text = text.lower()
+    found = []
+    for match in SPELLED_DATE_PATTERN.finditer(text):
+        day = _parse_number_words(match.group("day").strip())
+        year = _parse_number_words(match.group("year").strip())
+        month = MONTH_NUMBERS.get(match.group("month").rstrip("."))
+        date = _to_date(day, month, year) if day is not None and year is not None and month else None
+        if date is not None:
+            found.append((match.start(), match.end(), date))
+
+    for match in NUMERIC_DATE_PATTERN.finditer(text):
+        if any(start <= match.start() < end for start, end, _ in found):
+            continue
+        first, month, last = match.groups()
+        day, year = (last, first) if len(first) == 4 else (first, last)
+        if len(year) not in (2, 4):
+            continue
+        date = _to_date(int(day), int(month), int(year))
+        if date is not None:
+            found.append((match.start(), match.end(), date))
+
+    if len(found) > 1:
+        found.sort(key=lambda item: item[0])
+    yield from found
+
+
+def parse_date(text: str) -> Optional[datetime.date]:
+    """First date in text, or None"""
+    return next((date for _, _, date in find_dates(text)), None)
+
+
+def format_date(date: datetime.date) -> str:
+    """'DD Bulan YYYY' as used in contract details, e.g. '20 Februari 2025'"""
+    return f"{date.day} {MONTHS[date.month - 1]} {date.year}"
+
+
+def normalize_date(text: str) -> Optional[str]:
+    """First date in text formatted as 'DD Bulan YYYY', or None"""
+    date = parse_date(text)
+    return format_date(date) if date is not None else None
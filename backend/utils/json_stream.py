@@ -0,0 +1,120 @@
+"""
+Incremental parsing of a streamed JSON object
+
+Feeds LLM output chunk by chunk and reports every top-level field of the
+JSON object as soon as its value is complete, so callers can forward fields
+before the whole completion has arrived. Text before the opening brace
+(e.g. a ```json fence) is ignored.
+"""
+
+import json
+from typing import Any, List, Optional, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """Report completed top-level fields of a JSON object fed in chunks"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: List[Tuple[str, Any]] = []
+        self.done = False
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # Top-level key being read / whose value is being read
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Add streamed text
+
+        Returns:
+            (field, value) pairs completed by this chunk, in document order
+        """
+        self.buffer += chunk
+        completed: List[Tuple[str, Any]] = []
+        buffer = self.buffer
+
+        while self._pos < len(buffer) and not self.done:
+            char = buffer[self._pos]
+            pos = self._pos
+            self._pos += 1
+
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._key_start is not None:
+                            self._key = json.loads(buffer[self._key_start:pos + 1])
+                            self._key_start = None
+                        elif self._value_start is not None:
+                            self._complete(pos + 1, completed)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._key is None and self._value_start is None:
+                        self._key_start = pos
+                    elif self._value_start is None:
+                        self._value_start = pos
+            elif char in "{[":
+                if self._depth == 1 and self._value_start is None and self._key is not None:
+                    self._value_start = pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    self._complete(pos + 1, completed)
+                elif self._depth == 0:
+                    # End of the object; finishes a pending number/literal value
+                    if self._value_start is not None:
+                        self._complete(pos, completed)
+                    self.done = True
+            elif self._depth == 1:
+                if char == ",":
+                    if self._value_start is not None:
+                        self._complete(pos, completed)
+                elif char not in _WHITESPACE and char != ":" and self._key is not None and self._value_start is None:
+                    # Number, true/false/null
+                    self._value_start = pos
+
+        return completed
+
+    def _complete(self, end: int, completed: List[Tuple[str, Any]]):
+        raw = self.buffer[self._value_start:end].strip()
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        field = (self._key, value)
+        self.fields.append(field)
+        completed.append(field)
+        self._key = None
+        self._value_start = None
+
+    def result(self) -> Optional[Any]:
+        """The complete parsed object, or None if it is not complete or not valid JSON"""
+        if not self.done:
+            return None
+        start = self.buffer.find("{")
+        try:
+            return json.loads(self.buffer[start:self._pos])
+        except json.JSONDecodeError:
+            return None
@@ -0,0 +1,245 @@
+"""
+Multi-pattern keyword matching for contract text
+
+All contract keyword vocabularies (risk sentences, risk factors, section
+scoring) live in one matcher that finds every occurrence of every keyword in
+a single pass, with the same substring semantics as `kw in text`.
+
+Uses a pyahocorasick automaton. Without it a trie-shaped regex gives the
+same results, but slower than plain substring scans
+(see benchmarks/bench_keyword_matcher.py).
+"""
+
+import re
+from bisect import bisect_right
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Regex alternation shaped like a prefix trie
+
+    Branching on one character at a time keeps the per-position cost low,
+    and greedy optional tails make the longest keyword at a position win.
+    """
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Find all (overlapping) occurrences of a fixed keyword set in one pass"""
+
+    def __init__(self, vocabularies: Dict[str, Iterable[str]], use_automaton: Optional[bool] = None):
+        """
+        Args:
+            vocabularies: Group name -> keywords (lowercase); a keyword may
+                belong to several groups
+            use_automaton: Force pyahocorasick on/off (default: when installed)
+        """
+        self.groups: Dict[str, Set[str]] = {}
+        for group, keywords in vocabularies.items():
+            for keyword in keywords:
+                if keyword:
+                    self.groups.setdefault(keyword, set()).add(group)
+
+        self.use_automaton = AHOCORASICK_AVAILABLE if use_automaton is None else use_automaton
+        # Compiled searchers per vocabulary selection, built on first use
+        self._searchers: Dict[Optional[FrozenSet[str]], Any] = {}
+
+    def _searcher(self, groups: Optional[Iterable[str]]):
+        key = frozenset(groups) if groups is not None else None
+        searcher = self._searchers.get(key)
+        if searcher is not None:
+            return searcher
+
+        keywords = [kw for kw, kw_groups in self.groups.items() if key is None or kw_groups & key]
+        if not keywords:
+            searcher = None
+        elif self.use_automaton:
+            searcher = ahocorasick.Automaton()
+            for keyword in keywords:
+                searcher.add_word(keyword, keyword)
+            searcher.make_automaton()
+        else:
+            # Each position reports its longest keyword; any shorter keyword
+            # matching at the same position is a prefix of it
+            prefixes = {
+                keyword: [other for other in keywords if other != keyword and keyword.startswith(other)]
+                for keyword in keywords
+            }
+            searcher = (re.compile("(?=(" + _trie_pattern(keywords) + "))"), prefixes)
+
+        self._searchers[key] = searcher
+        return searcher
+
+    def iter_matches(self, text: str, groups: Optional[Iterable[str]] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Yield (start offset, keyword) for every occurrence in text
+
+        Args:
+            text: Text to search, matched as given (callers pass it lowercased)
+            groups: Only report keywords from these vocabularies
+        """
+        searcher = self._searcher(groups)
+        if searcher is None:
+            return
+
+        if self.use_automaton:
+            for end, keyword in searcher.iter(text):
+                yield end - len(keyword) + 1, keyword
+        else:
+            pattern, prefixes = searcher
+            for match in pattern.finditer(text):
+                start = match.start()
+                keyword = match.group(1)
+                yield start, keyword
+                for prefix in prefixes[keyword]:
+                    yield start, prefix
+
+    def find(self, text: str, groups: Optional[Iterable[str]] = None) -> Dict[str, List[int]]:
+        """
+        Occurrences per keyword
+
+        Args:
+            text: Lowercased text
+            groups: Only report keywords from these vocabularies
+
+        Returns:
+            Keyword -> sorted start offsets
+        """
+        found: Dict[str, List[int]] = {}
+        for start, keyword in self.iter_matches(text, groups):
+            found.setdefault(keyword, []).append(start)
+
+        for positions in found.values():
+            positions.sort()
+        return found
+
+    def find_in_segments(
+        self,
+        text: str,
+        segment_starts: List[int],
+        segment_ends: List[int],
+        groups: Optional[Iterable[str]] = None
+    ) -> List[Set[str]]:
+        """
+        Keywords found inside each segment (lines, sentences) of text
+
+        Args:
+            text: Lowercased text
+            segment_starts: Ascending start offset of each segment
+            segment_ends: End offset (exclusive) of each segment; a keyword
+                counts only if it lies entirely inside its segment
+            groups: Only report keywords from these vocabularies
+
+        Returns:
+            One keyword set per segment
+        """
+        segments: List[Set[str]] = [set() for _ in segment_starts]
+
+        for start, keyword in self.iter_matches(text, groups):
+            index = bisect_right(segment_starts, start) - 1
+            if index >= 0 and start + len(keyword) <= segment_ends[index]:
+                segments[index].add(keyword)
+
+        return segments
+
+
+# Contract vocabularies shared by risk analysis and Groq section scoring
+RISK_SENTENCE_KEYWORDS = [
+    'kewajiban', 'tanggung jawab', 'sanksi', 'denda', 'penalty',
+    'force majeure', 'pembatalan', 'terminasi', 'pelanggaran',
+    'ganti rugi', 'kompensasi', 'asuransi', 'jaminan', 'garansi',
+    'risiko', 'bahaya', 'kerugian', 'default', 'wanprestasi'
+]
+
+RISK_FACTOR_KEYWORDS = {
+    "payment_delay": ["terlambat bayar", "keterlambatan pembayaran", "denda keterlambatan"],
+    "force_majeure": ["force majeure", "keadaan kahar", "bencana alam", "pandemi"],
+    "penalty_clause": ["denda", "sanksi", "penalty", "ganti rugi"],
+    "termination_risk": ["pembatalan", "terminasi", "pemutusan kontrak"],
+    "warranty_risk": ["garansi", "jaminan", "warranty"],
+    "legal_compliance": ["peraturan", "undang-undang", "hukum", "regulasi"]
+}
+
+SECTION_KEYWORDS = [
+    # Core contract terms
+    'kontrak', 'perjanjian', 'agreement', 'surat',
+
+    # Parties (high priority)
+    'pihak pertama', 'pihak kedua', 'pihak ketiga', 'pihak kesatu',
+    'yang selanjutnya disebut', 'yang dalam', 'berkedudukan',
+    'alamat', 'direktur', 'manager', 'wakil', 'bertindak',
+
+    # Company identifiers
+    'pt ', 'cv ', 'ud ', 'firma', 'persero', 'tbk', 'ltd',
+
+    # Personal info
+    'nama', 'nik', 'nomor induk', 'identitas', 'ktp',
+
+    # Financial terms (very high priority)
+    'nilai', 'harga', 'biaya', 'rupiah', 'rp', 'usd', '$',
+    'pembayaran', 'tagihan', 'invoice', 'pelunasan',
+
+    # Time terms (very high priority)
+    'tanggal', 'waktu', 'periode', 'jangka', 'masa',
+    'berlaku', 'berakhir', 'expired', 'mulai', 'sampai',
+
+    # Legal structure
+    'pasal', 'ayat', 'point', 'butir', 'bab',
+    'kewajiban', 'hak', 'tanggung jawab'
+]
+
+ADDRESS_INDICATORS = [
+    'jalan', 'jl.', 'no.', 'nomor', 'kota', 'jakarta', 'surabaya', 'bandung', 'medan', 'semarang'
+]
+
+contract_keyword_matcher = KeywordMatcher({
+    "risk_sentence": RISK_SENTENCE_KEYWORDS,
+    **{f"risk_factor:{risk_type}": keywords for risk_type, keywords in RISK_FACTOR_KEYWORDS.items()},
+    "section": SECTION_KEYWORDS,
+    "address": ADDRESS_INDICATORS
+})
+
+RISK_FACTOR_GROUPS = [f"risk_factor:{risk_type}" for risk_type in RISK_FACTOR_KEYWORDS]
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    """Get the shared contract keyword matcher"""
+    return contract_keyword_matcher
+
+
+def segment_bounds(text: str, separator: str) -> Tuple[List[str], List[int], List[int]]:
+    """
+    Split text like text.split(separator) and return each stripped segment
+    with its start/end offsets in text
+    """
+    segments = text.split(separator)
+    starts, ends = [], []
+    offset = 0
+    for segment in segments:
+        stripped = segment.strip()
+        lead = len(segment) - len(segment.lstrip())
+        starts.append(offset + lead)
+        ends.append(offset + lead + len(stripped))
+        offset += len(segment) + len(separator)
+    return segments, starts, ends
@@ -64,6 +64,67 @@ class PDFParser:
         except Exception as e:
             return f"PDF text extraction failed: {str(e)}"
     
+    def analyze_page_layout(
+        self,
+        content: bytes,
+        min_chars: int = 50,
+        image_coverage_threshold: float = 0.5,
+        min_chars_on_image_page: int = 300
+    ) -> List[Dict[str, Any]]:
+        """
+        Inspect every page's text layer and image coverage
+        
+        A page needs OCR when its text layer is (almost) empty, or when it is
+        mostly covered by images and carries only a little text (e.g. a
+        scanned signature page or annex with a typed header).
+        
+        Args:
+            content: PDF file content
+            min_chars: Pages with fewer text-layer characters are OCR'd
+            image_coverage_threshold: Fraction of the page covered by images
+                above which the page counts as scanned
+            min_chars_on_image_page: Scanned pages with fewer characters are OCR'd
+            
+        Returns:
+            List of per-page dictionaries in page order
+        """
+        doc = fitz.open(stream=content, filetype="pdf")
+        
+        try:
+            pages_data = []
+            
+            for page_num in range(len(doc)):
+                page = doc[page_num]
+                text = page.get_text()
+                char_count = len(text.strip())
+                
+                # Approximate image coverage by the clipped image bounding boxes
+                page_rect = page.rect
+                page_area = page_rect.width * page_rect.height or 1.0
+                image_area = 0.0
+                for image_info in page.get_image_info():
+                    bbox = fitz.Rect(image_info["bbox"]) & page_rect
+                    if not bbox.is_empty:
+                        image_area += bbox.width * bbox.height
+                image_coverage = min(image_area / page_area, 1.0)
+                
+                needs_ocr = char_count < min_chars or (
+                    image_coverage >= image_coverage_threshold
+                    and char_count < min_chars_on_image_page
+                )
+                
+                pages_data.append({
+                    'page_number': page_num + 1,
+                    'text': text,
+                    'char_count': char_count,
+                    'image_coverage': round(image_coverage, 3),
+                    'needs_ocr': needs_ocr
+                })
+            
+            return pages_data
+        finally:
+            doc.close()
+    
     async def extract_text_with_formatting(self, file: UploadFile) -> Dict[str, Any]:
         """
         Extract text with formatting information
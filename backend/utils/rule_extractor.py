@@ -0,0 +1,268 @@
+"""
+Deterministic pre-extraction of contract details
+
+Finds the fields that well-structured Indonesian contracts state in a fixed
+form (title, "PT ... selanjutnya disebut PIHAK PERTAMA", dates next to
+"berlaku"/"berakhir", Rupiah amounts next to "nilai", "jangka waktu N
+bulan") with regexes, and gives every value a confidence so only the
+unresolved fields need to be asked from the LLM.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.indonesian_dates import find_dates, format_date
+
+# Fields of the contract details prompt, in prompt order
+CONTRACT_FIELDS = [
+    "contract_name", "first_party", "second_party", "contract_end_date", "contract_start_date",
+    "contract_duration", "contract_value", "contract_type", "key_terms"
+]
+# Fields that must be resolved by rules to skip the LLM call. contract_type
+# and key_terms are descriptive: no contract states them in a fixed form, so
+# the rules derive them from the title and the article headings, and the LLM
+# only supplies them when it is called for the other fields anyway.
+DESCRIPTIVE_FIELDS = ("contract_type", "key_terms")
+RULE_REQUIRED_FIELDS = [field for field in CONTRACT_FIELDS if field not in DESCRIPTIVE_FIELDS]
+
+START_DATE_CUES = ["terhitung sejak", "terhitung mulai", "dimulai", "mulai", "sejak", "berlaku"]
+END_DATE_CUES = ["berakhir", "sampai dengan", "sampai", "s.d", "s/d", "hingga", "selambat-lambatnya"]
+
+# Rupiah amounts: "Rp. 500.000.000,-", "Rp 1,5 juta", "IDR 250.000"
+AMOUNT_PATTERN = re.compile(
+    r'(?:rp\.?|idr)\s*\d{1,3}(?:[.,]\d{3})*(?:,\d{1,2})?(?:\s*(?:juta|milyar|miliar))?(?:,-)?',
+    re.IGNORECASE
+)
+VALUE_CUES = ["nilai kontrak", "nilai perjanjian", "nilai pekerjaan", "harga kontrak", "harga borongan", "total harga", "nilai"]
+
+DURATION_PATTERN = re.compile(
+    r'(?:jangka waktu|masa berlaku|berlaku selama)[^.\n]{0,100}?(\d+)\s*(?:\([a-z ]+\)\s*)?(tahun|bulan|minggu|hari)\b',
+    re.IGNORECASE
+)
+
+TITLE_WORDS = ("perjanjian", "kontrak", "agreement", "memorandum", "nota kesepahaman")
+
+# "Pasal 3 - JANGKA WAKTU" / "Pasal 3" with the title on the next line
+ARTICLE_HEADING_PATTERN = re.compile(r'^\s*pasal\s+(\d+|[ivxlc]+)\b\s*[-–:.]?\s*(.*)$', re.IGNORECASE)
+MAX_ARTICLE_TITLE_LENGTH = 60
+
+# Company / institution names as written in contracts ("PT Maju Jaya Tbk", "CV. Sinar Abadi")
+ORGANIZATION_PATTERN = re.compile(
+    r"\b(?:PT|CV|UD|PD|Koperasi|Yayasan|Perum|Perseroan Terbatas)\.?[ \t]+"
+    r"[A-Z0-9][\w&'.-]*(?:[ \t]+(?:[A-Z0-9][\w&'.-]*|&|dan))*"
+)
+PERSON_PATTERN = re.compile(r'\bnama\s*:\s*([A-Z][^\n,:]{2,60})', re.IGNORECASE)
+ADDRESS_PATTERN = re.compile(
+    r'(?:berkedudukan di|beralamat di|alamat\s*:)\s*([^\n;]{5,150}?)\s*(?:,\s*(?:dalam hal ini|yang|selanjutnya|untuk)|[;\n]|$)',
+    re.IGNORECASE
+)
+PARTY_LABELS = {"first_party": "pihak pertama", "second_party": "pihak kedua"}
+# "... selanjutnya disebut sebagai PIHAK PERTAMA" / "PIHAK PERTAMA : PT ABC" (lowercased text)
+PARTY_CUE_PATTERNS = {
+    field: re.compile(r'(?:(?:untuk |yang )?selanjutnya\s+)?disebut(?:\s+sebagai)?\s*["“]?' + label)
+    for field, label in PARTY_LABELS.items()
+}
+PARTY_HEADER_PATTERNS = {field: re.compile(label + r'\s*:\s*') for field, label in PARTY_LABELS.items()}
+
+# How far around a cue the value may be (characters)
+PARTY_WINDOW = 400
+CUE_WINDOW = 120
+
+
+def _nearest_cue(text_lower: str, position: int, cues: List[str], window: int) -> Optional[int]:
+    """Distance from the closest cue ending before position (within window), or None"""
+    before = text_lower[max(0, position - window):position]
+    distances = [len(before) - (before.rfind(cue) + len(cue)) for cue in cues if cue in before]
+    return min(distances) if distances else None
+
+
+def _field(value: Any, confidence: float) -> Dict[str, Any]:
+    return {"value": value, "confidence": round(confidence, 2)}
+
+
+def _extract_title(lines: List[str]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Contract name and type from the title at the top of the document"""
+    non_empty = [line.strip() for line in lines[:40] if line.strip()]
+    for index, line in enumerate(non_empty[:25]):
+        lower = line.lower()
+        if len(line) > 120 or not any(word in lower for word in TITLE_WORDS):
+            continue
+        if lower.startswith(("pasal", "pada hari", "bahwa", "yang bertanda")):
+            continue
+
+        title = line
+        # "PERJANJIAN KERJASAMA" / "TENTANG PENGADAAN BARANG" titles span two lines
+        if index + 1 < len(non_empty) and non_empty[index + 1].lower().startswith("tentang"):
+            title = f"{title} {non_empty[index + 1]}"
+
+        letters = [char for char in title if char.isalpha()]
+        upper_ratio = sum(char.isupper() for char in letters) / len(letters) if letters else 0
+        name = _field(title, 0.9 if upper_ratio > 0.8 else 0.7)
+
+        contract_type = re.sub(
+            r'\b(?:surat|perjanjian|kontrak|agreement|nomor.*)\b', ' ', title, flags=re.IGNORECASE
+        )
+        contract_type = re.split(r'\btentang\b', contract_type, flags=re.IGNORECASE)[0]
+        contract_type = " ".join(contract_type.split()).title()
+        return name, _field(contract_type, 0.6) if contract_type else None
+    return None, None
+
+
+def _extract_key_terms(lines: List[str]) -> Optional[Dict[str, Any]]:
+    """Article titles ("Pasal 3: JANGKA WAKTU") as a structural summary of the terms"""
+    titles = []
+    for index, line in enumerate(lines):
+        match = ARTICLE_HEADING_PATTERN.match(line)
+        if not match:
+            continue
+        title = match.group(2).strip()
+        if not title:
+            following = [candidate.strip() for candidate in lines[index + 1:index + 3] if candidate.strip()]
+            title = following[0] if following else ""
+        title = title.rstrip(".:")
+        if (
+            not title or len(title) > MAX_ARTICLE_TITLE_LENGTH
+            or ARTICLE_HEADING_PATTERN.match(title) or not title[0].isalpha()
+        ):
+            continue
+        term = f"Pasal {match.group(1)}: {title}"
+        if term not in titles:
+            titles.append(term)
+
+    if len(titles) < 2:
+        return None
+    # Headings name the topics, not the agreed facts: below the usual threshold
+    return _field(titles, 0.5)
+
+
+def _extract_party(text: str, text_lower: str, field: str) -> Optional[Dict[str, Any]]:
+    """Name (and address) of first_party / second_party"""
+    # "PT ABC, berkedudukan di ..., selanjutnya disebut PIHAK PERTAMA"
+    for match in PARTY_CUE_PATTERNS[field].finditer(text_lower):
+        window_start = max(0, match.start() - PARTY_WINDOW)
+        # Stop at the previous party's "disebut ..." clause
+        previous_cue = text_lower.rfind("disebut", window_start, match.start())
+        if previous_cue != -1:
+            window_start = previous_cue + len("disebut")
+        # ... and after a "PIHAK PERTAMA : PT ABC" header line
+        for label in PARTY_LABELS.values():
+            previous_label = text_lower.rfind(label, window_start, match.start())
+            line_end = text_lower.find("\n", previous_label, match.start()) if previous_label != -1 else -1
+            if line_end != -1:
+                window_start = line_end + 1
+        window = text[window_start:match.start()]
+        # The closest name before the cue belongs to this party
+        organizations = list(ORGANIZATION_PATTERN.finditer(window))
+        people = list(PERSON_PATTERN.finditer(window))
+        addresses = list(ADDRESS_PATTERN.finditer(window))
+
+        if organizations:
+            name = organizations[-1].group(0).rstrip(".,")
+            party = {"name": name, "type": "perusahaan"}
+            confidence = 0.9
+        elif people:
+            party = {"name": people[-1].group(1).strip(), "type": "individu"}
+            confidence = 0.75
+        else:
+            continue
+
+        if addresses:
+            party["address"] = addresses[-1].group(1).strip()
+        return _field(party, confidence)
+
+    # "PIHAK PERTAMA : PT ABC"
+    match = PARTY_HEADER_PATTERNS[field].search(text_lower)
+    if match:
+        organization = ORGANIZATION_PATTERN.match(text, match.end())
+        if organization:
+            return _field({"name": organization.group(0).rstrip(".,"), "type": "perusahaan"}, 0.85)
+    return None
+
+
+def _extract_dates(text_lower: str) -> Dict[str, Dict[str, Any]]:
+    """Start and end date from dates preceded by start / end cues"""
+    candidates: Dict[str, List[Tuple[str, int]]] = {"contract_start_date": [], "contract_end_date": []}
+
+    for start, _, parsed in find_dates(text_lower):
+        date = format_date(parsed)
+        start_distance = _nearest_cue(text_lower, start, START_DATE_CUES, CUE_WINDOW)
+        end_distance = _nearest_cue(text_lower, start, END_DATE_CUES, CUE_WINDOW)
+        if end_distance is not None and (start_distance is None or end_distance <= start_distance):
+            candidates["contract_end_date"].append((date, end_distance))
+        elif start_distance is not None:
+            candidates["contract_start_date"].append((date, start_distance))
+
+    fields = {}
+    for field, found in candidates.items():
+        if not found:
+            continue
+        date, distance = min(found, key=lambda item: item[1])
+        confidence = 0.85 if distance <= 40 else 0.65
+        if len({value for value, _ in found}) > 1:
+            confidence -= 0.2
+        fields[field] = _field(date, confidence)
+    return fields
+
+
+def _format_amount(amount: str) -> str:
+    number = re.sub(r'^(?:rp\.?|idr)\s*', '', amount.strip(), flags=re.IGNORECASE)
+    return f"Rp {number}"
+
+
+def _extract_value(text_lower: str, text: str) -> Optional[Dict[str, Any]]:
+    """Contract value: the Rupiah amount closest after a value cue"""
+    best = None
+    for match in AMOUNT_PATTERN.finditer(text):
+        distance = _nearest_cue(text_lower, match.start(), VALUE_CUES, CUE_WINDOW)
+        if distance is not None and (best is None or distance < best[1]):
+            best = (match.group(0), distance)
+
+    if best is None:
+        return None
+    return _field(_format_amount(best[0]), 0.85 if best[1] <= 60 else 0.6)
+
+
+def extract_contract_fields(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Rule-based contract details
+
+    Args:
+        text: Contract text
+
+    Returns:
+        Field -> {"value", "confidence"} for the fields found; confidence is
+        0.9 for textbook phrasing down to ~0.5 for ambiguous matches
+    """
+    text_lower = text.lower()
+    fields: Dict[str, Dict[str, Any]] = {}
+
+    name, contract_type = _extract_title(text.split("\n"))
+    if name:
+        fields["contract_name"] = name
+    if contract_type:
+        fields["contract_type"] = contract_type
+
+    for field in PARTY_LABELS:
+        party = _extract_party(text, text_lower, field)
+        if party:
+            fields[field] = party
+
+    first, second = fields.get("first_party"), fields.get("second_party")
+    if first and second and first["value"]["name"].lower() == second["value"]["name"].lower():
+        first["confidence"] = second["confidence"] = 0.4
+
+    fields.update(_extract_dates(text_lower))
+
+    value = _extract_value(text_lower, text)
+    if value:
+        fields["contract_value"] = value
+
+    duration = DURATION_PATTERN.search(text)
+    if duration:
+        fields["contract_duration"] = _field(f"{duration.group(1)} {duration.group(2).lower()}", 0.85)
+
+    key_terms = _extract_key_terms(text.split("\n"))
+    if key_terms:
+        fields["key_terms"] = key_terms
+
+    return fields
@@ -0,0 +1,194 @@
+"""
+Line scoring for picking the contract sections sent to the LLM
+
+Features for every line come from whole-document passes (keyword matcher,
+one combined money/date regex, one capitalized-word regex) instead of
+per-line loops. Weights can be tuned from a JSON file.
+"""
+
+import copy
+import json
+import os
+import re
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.keyword_matcher import (
+    KeywordMatcher, get_keyword_matcher, segment_bounds, SECTION_KEYWORDS, ADDRESS_INDICATORS
+)
+
+DEFAULT_WEIGHTS: Dict[str, Any] = {
+    # Per distinct critical keyword in the line; keywords not listed get keyword_default
+    "keyword_default": 8,
+    "keywords": {
+        # Super high priority for key contract info
+        "pihak pertama": 25, "pihak kedua": 25, "nama": 25,
+        "nilai": 25, "tanggal": 25, "berakhir": 25,
+        # High priority
+        "alamat": 15, "direktur": 15, "harga": 15,
+        "berlaku": 15, "rupiah": 15, "rp": 15
+    },
+    # Per distinct money / date pattern found in the line
+    "money_pattern": 20,
+    "date_pattern": 20,
+    # Lines with proper names (at least capitalized_min_words capitalized words)
+    "capitalized_words": 10,
+    "capitalized_min_words": 2,
+    "address": 12,
+    # [line index limit, bonus]: headers and parties are usually at the top
+    "early_line_bonus": [[50, 5], [100, 2]],
+    # Very long lines are often noise or OCR artifacts
+    "long_line_chars": 300,
+    "long_line_penalty": 5,
+    "min_line_chars": 5
+}
+
+MONEY_PATTERNS = [
+    r'rp\.?\s*\d+', r'rupiah\s*\d+', r'\$\s*\d+',
+    r'\d+\s*rupiah', r'\d+\s*juta', r'\d+\s*milyar'
+]
+
+DATE_PATTERNS = [
+    r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}',  # DD-MM-YYYY
+    r'\d{1,2}\s+(?:januari|februari|maret|april|mei|juni|juli|agustus|september|oktober|november|desember)\s+\d{2,4}',
+    r'\d{4}[-/]\d{1,2}[-/]\d{1,2}'  # YYYY-MM-DD
+]
+
+# All money and date patterns in one lookahead alternation, so overlapping
+# matches starting at different positions are all reported in a single pass.
+# The leading character class lets most positions fail on one check. An
+# alternation reports only the first pattern matching at a position, so the
+# later patterns are tried there separately (FEATURE_REGEXES).
+_FEATURE_GROUPS = [f"money{i}" for i in range(len(MONEY_PATTERNS))] + \
+    [f"date{i}" for i in range(len(DATE_PATTERNS))]
+FEATURE_PATTERN = re.compile(
+    r"(?=[r$\d])(?=(?:" + "|".join(
+        f"(?P<{name}>{pattern})" for name, pattern in zip(_FEATURE_GROUPS, MONEY_PATTERNS + DATE_PATTERNS)
+    ) + "))"
+)
+FEATURE_REGEXES = [
+    (name, re.compile(pattern)) for name, pattern in zip(_FEATURE_GROUPS, MONEY_PATTERNS + DATE_PATTERNS)
+]
+_FEATURE_INDEX = {name: i for i, name in enumerate(_FEATURE_GROUPS)}
+
+# Whitespace separated word of 3+ characters starting with an uppercase (Latin-1) letter
+CAPITALIZED_WORD_PATTERN = re.compile(r'(?<!\S)[A-ZÀ-ÖØ-Þ]\S{2,}')
+
+SECTION_KEYWORD_SET = set(SECTION_KEYWORDS)
+ADDRESS_INDICATOR_SET = set(ADDRESS_INDICATORS)
+
+
+def load_section_weights(path: str = "") -> Dict[str, Any]:
+    """
+    Default weights, overridden by the JSON file at path (if given)
+
+    The file only needs the keys it changes; "keywords" entries are merged
+    into the default keyword weights.
+    """
+    weights = copy.deepcopy(DEFAULT_WEIGHTS)
+    if not path:
+        return weights
+
+    if not os.path.exists(path):
+        print(f"Section scorer weights file not found: {path}, using defaults")
+        return weights
+
+    with open(path, encoding="utf-8") as f:
+        overrides = json.load(f)
+
+    weights["keywords"].update(overrides.pop("keywords", {}))
+    weights.update(overrides)
+    return weights
+
+
+class ContractSectionScorer:
+    """Score contract lines by how likely they hold key contract details"""
+
+    def __init__(self, weights: Optional[Dict[str, Any]] = None, matcher: Optional[KeywordMatcher] = None):
+        self.weights = weights or load_section_weights()
+        self.matcher = matcher or get_keyword_matcher()
+
+    def line_features(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Per-line feature counts for the whole text
+
+        Returns:
+            One dict per line of text.split('\\n') with keywords, money and
+            date pattern counts, capitalized word count and address flag
+        """
+        text_lower = text.lower()
+        _, starts, ends = segment_bounds(text_lower, '\n')
+        keywords = self.matcher.find_in_segments(text_lower, starts, ends, groups=["section", "address"])
+
+        # Distinct money/date patterns per line, from one pass over the document
+        patterns: List[set] = [set() for _ in starts]
+        for match in FEATURE_PATTERN.finditer(text_lower):
+            position = match.start()
+            index = bisect_right(starts, position) - 1
+            # Patterns before lastgroup already failed here; the later ones may match too
+            for name, regex in FEATURE_REGEXES[_FEATURE_INDEX[match.lastgroup]:]:
+                if name in patterns[index]:
+                    continue
+                found = regex.match(text_lower, position)
+                if found is not None and found.end() <= ends[index]:
+                    patterns[index].add(name)
+
+        # Lowercasing almost never changes offsets; recompute bounds only if it did
+        case_starts = starts if len(text_lower) == len(text) else segment_bounds(text, '\n')[1]
+        capitalized = [0] * len(case_starts)
+        for match in CAPITALIZED_WORD_PATTERN.finditer(text):
+            capitalized[bisect_right(case_starts, match.start()) - 1] += 1
+
+        features = []
+        for i in range(len(starts)):
+            money_patterns = sum(1 for name in patterns[i] if name[0] == "m")
+            features.append({
+                "keywords": keywords[i] & SECTION_KEYWORD_SET,
+                "address": bool(keywords[i] & ADDRESS_INDICATOR_SET),
+                "money_patterns": money_patterns,
+                "date_patterns": len(patterns[i]) - money_patterns,
+                "capitalized_words": capitalized[i]
+            })
+        return features
+
+    def score_line(self, index: int, line: str, features: Dict[str, Any]) -> int:
+        """Weighted score of one line from its features"""
+        w = self.weights
+        keyword_weights = w["keywords"]
+
+        score = sum(keyword_weights.get(keyword, w["keyword_default"]) for keyword in features["keywords"])
+        score += w["money_pattern"] * features["money_patterns"]
+        score += w["date_pattern"] * features["date_patterns"]
+
+        if features["capitalized_words"] >= w["capitalized_min_words"]:
+            score += w["capitalized_words"]
+        if features["address"]:
+            score += w["address"]
+
+        for limit, bonus in w["early_line_bonus"]:
+            if index < limit:
+                score += bonus
+                break
+
+        if len(line) > w["long_line_chars"]:
+            score -= w["long_line_penalty"]
+
+        return score
+
+    def score_lines(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Score every non-trivial line of text
+
+        Returns:
+            (score, line index, line) tuples in line order
+        """
+        lines = text.split('\n')
+        features = self.line_features(text)
+        min_chars = self.weights["min_line_chars"]
+
+        scored_lines = []
+        for i, line in enumerate(lines):
+            if len(line.strip()) < min_chars:
+                continue
+            scored_lines.append((self.score_line(i, line, features[i]), i, line))
+        return scored_lines